@@ -0,0 +1,137 @@
+import re
+from typing import Dict, List, NamedTuple
+
+from app.agents import url_intelligence
+
+# ============ SPAN TYPES ============
+
+UPI = "upi"
+URL = "url"
+IFSC = "ifsc"
+BANK_ACCOUNT = "bank_account"
+PHONE = "phone"
+KEYWORD = "keyword"
+
+
+class IntelSpan(NamedTuple):
+    kind: str
+    value: str
+    start: int
+    end: int
+
+
+SUSPICIOUS_KEYWORDS = [
+    "urgent", "verify", "blocked", "suspended", "immediately",
+    "kyc", "update", "expire", "lottery", "winner", "prize",
+    "refund", "cashback", "otp", "pin", "password", "click",
+    "link", "form", "bank", "account", "transfer", "pay"
+]
+
+# ============ COMPILED PATTERNS ============
+
+# Every pattern is compiled once at import time and written so sre can
+# skip ahead cheaply: numbers and IFSC codes share one digit-led pattern
+# (an IFSC's fifth character is always "0"), and the UPI and URL patterns
+# only run when their trigger substring is present at all. Explicit
+# character classes are used instead of re.IGNORECASE, which is several
+# times slower on CPython.
+NUMERIC_PATTERN = re.compile(
+    r"""
+    [0-9](?:
+        (?<=\b[a-zA-Z]{4}0)(?P<ifsc>[a-zA-Z0-9]{6})
+       |(?<=\b[0-9])(?P<number>[0-9]{8,17})
+    )\b
+    """,
+    re.VERBOSE,
+)
+
+UPI_PATTERN = re.compile(r"(?<![a-zA-Z0-9._\-])[a-zA-Z0-9._\-]{3,}+@[a-zA-Z]{3,}")
+
+URL_PATTERN = re.compile(r'https?://[^\s<>"{}|\\^`\[\]]+')
+
+COUNTRY_CODE_PATTERN = re.compile(r"\+91[\-\s]?$")
+
+# Keywords match whole words only ("pin" but not "shopping", "pay" but not
+# "repay"), allowing plain inflections such as "blocked" or "links". One
+# alternation over the lowercased text; group 1 is the base keyword.
+KEYWORD_PATTERN = re.compile(
+    r"\b("
+    + "|".join(sorted(map(re.escape, SUSPICIOUS_KEYWORDS), key=len, reverse=True))
+    + r")(?:s|es|d|ed|ing)?\b"
+)
+
+MOBILE_PREFIXES = frozenset("6789")
+
+
+def _phone_value(text: str, start: int, number: str) -> str:
+    """Return the Indian mobile number in a numeric match, or ''."""
+    if len(number) == 10 and number[0] in MOBILE_PREFIXES:
+        prefix = COUNTRY_CODE_PATTERN.search(text, max(0, start - 4), start)
+        return prefix.group() + number if prefix else number
+
+    # "+919876543210": the country code is glued to the number
+    if (
+        len(number) == 12 and number.startswith("91")
+        and number[2] in MOBILE_PREFIXES
+        and start > 0 and text[start - 1] == "+"
+    ):
+        return "+" + number
+
+    return ""
+
+
+def scan(text: str) -> List[IntelSpan]:
+    """Scan text and return typed spans, grouped by kind."""
+    spans: List[IntelSpan] = []
+
+    if "://" in text:
+        for match in URL_PATTERN.finditer(text):
+            url = url_intelligence.canonicalize_url(match.group())
+            spans.append(IntelSpan(URL, url, match.start(), match.end()))
+
+    if "@" in text:
+        for match in UPI_PATTERN.finditer(text):
+            spans.append(IntelSpan(UPI, match.group().lower(), match.start(), match.end()))
+
+    for match in NUMERIC_PATTERN.finditer(text):
+        start, end = match.start(), match.end()
+        if match.lastgroup == "ifsc":
+            spans.append(IntelSpan(IFSC, text[start - 4:end].upper(), start - 4, end))
+            continue
+        number = match.group()
+        spans.append(IntelSpan(BANK_ACCOUNT, number, start, end))
+        phone = _phone_value(text, start, number)
+        if phone:
+            spans.append(IntelSpan(PHONE, phone, end - len(phone), end))
+
+    for match in KEYWORD_PATTERN.finditer(text.lower()):
+        spans.append(IntelSpan(KEYWORD, match.group(1), match.start(), match.end()))
+
+    return spans
+
+
+def spans_to_intelligence(spans: List[IntelSpan]) -> Dict[str, List[str]]:
+    """Group spans into the GUVI intelligence dict (deduplicated, ordered)."""
+    buckets: Dict[str, Dict[str, None]] = {
+        UPI: {},
+        BANK_ACCOUNT: {},
+        IFSC: {},
+        URL: {},
+        PHONE: {},
+        KEYWORD: {},
+    }
+    for span in spans:
+        buckets[span.kind][span.value] = None
+
+    return {
+        "upiIds": list(buckets[UPI]),
+        "bankAccounts": list(buckets[BANK_ACCOUNT]) + list(buckets[IFSC]),
+        "phishingLinks": url_intelligence.merge_links([], list(buckets[URL])),
+        "phoneNumbers": list(buckets[PHONE]),
+        "suspiciousKeywords": list(buckets[KEYWORD]),
+    }
+
+
+def extract(text: str) -> Dict[str, List[str]]:
+    """Extract UPI, bank accounts, links, phones and keywords from text."""
+    return spans_to_intelligence(scan(text))
@@ -0,0 +1,205 @@
+import zlib
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from app.models.schemas import Metadata
+from app.prompts.templates import SYSTEM_TEMPLATE, TURN_TEMPLATE
+
+
+class Persona(NamedTuple):
+    key: str
+    name: str
+    age: int
+    occupation: str
+    tech_knowledge: str
+    language: str
+    personality: str
+    phrases: Tuple[str, ...]
+    # Metadata.language values (lowercased) this persona answers in
+    languages: Tuple[str, ...]
+    # Canned replies for the rule-based fast path, keyed by missing intel
+    fast_replies: Dict[str, str]
+    reply_done: str
+    reply_safe: str
+    reply_fallback: str
+    # Metadata.locale regions (ISO 3166 codes) the persona is credible in
+    regions: Tuple[str, ...] = ("IN",)
+
+    @property
+    def short_name(self) -> str:
+        return self.name.split()[0]
+
+
+PERSONAS = [
+    Persona(
+        key="ramesh",
+        name="Ramesh Kumar",
+        age=45,
+        occupation="Small grocery shop owner in Mumbai",
+        tech_knowledge="Very limited, confused by technology",
+        language="Mix of Hindi and English (Hinglish)",
+        personality="Polite, trusting, slightly nervous, asks many questions",
+        phrases=(
+            "Sir, mujhe samajh nahi aaya...",
+            "Kya aap sure hain? Mera account safe hai na?",
+            "Aap konse bank se bol rahe ho?",
+            "UPI ID kya bhejun? Mujhe pata nahi kaise karte hain",
+        ),
+        languages=("hinglish", "hindi", "english"),
+        fast_replies={
+            "upiIds": "Sir, payment kahan karna hai? Aapka UPI ID bhej dijiye, main try karta hoon.",
+            "bankAccounts": "Sir, account number aur IFSC bata dijiye, mera beta transfer kar dega.",
+            "phishingLinks": "Link phir se bhejiye sir, mere phone pe khul nahi raha.",
+            "phoneNumbers": "Aapka number kya hai sir? Main call karke confirm kar leta hoon.",
+        },
+        reply_done="Thik hai sir, thoda time dijiye, main bank jaa ke karta hoon.",
+        reply_safe="Ji, aap kaun bol rahe ho? Mujhe samajh nahi aaya.",
+        reply_fallback="Sir, mujhe samajh nahi aaya. Thoda detail mein bataiye?",
+    ),
+    Persona(
+        key="kamla",
+        name="Kamla Devi",
+        age=63,
+        occupation="Retired school teacher living alone in Lucknow",
+        tech_knowledge="Uses WhatsApp with help from her grandson, nothing else",
+        language="Hindi written in Roman script, a few English words",
+        personality="Warm, talkative, worried about her pension, easily flustered",
+        phrases=(
+            "Beta, main samjhi nahi, dobara batao...",
+            "Meri pension wala account hai, kuch gadbad to nahi hogi?",
+            "Aap kis office se bol rahe ho beta?",
+            "Pota ghar aayega to usse karwa deti hoon, aap details bhej do",
+        ),
+        languages=("hindi", "hinglish"),
+        fast_replies={
+            "upiIds": "Beta, paisa kahan bhejna hai? UPI wala pata likh ke bhej do.",
+            "bankAccounts": "Account number aur IFSC likh do beta, pota bank jaake daal dega.",
+            "phishingLinks": "Beta woh link khul nahi raha, dobara bhejo na.",
+            "phoneNumbers": "Aapka phone number do beta, pota aapse baat kar lega.",
+        },
+        reply_done="Achha beta, kal subah bank jaake karti hoon, thoda ruk jao.",
+        reply_safe="Kaun bol raha hai? Main pehchani nahi beta.",
+        reply_fallback="Beta, main samjhi nahi. Thoda aaram se batao?",
+    ),
+    Persona(
+        key="joseph",
+        name="Joseph Fernandes",
+        age=58,
+        occupation="Retired bank clerk in Bengaluru",
+        tech_knowledge="Knows net banking basics but not apps or UPI",
+        language="Indian English",
+        personality="Polite, formal, a little suspicious but eager to resolve problems",
+        phrases=(
+            "Sorry, I did not follow. Could you explain once more?",
+            "Is my account really at risk? I have my savings there.",
+            "Which branch are you calling from, may I know?",
+            "Please send the details, I will do it carefully",
+        ),
+        languages=("english",),
+        fast_replies={
+            "upiIds": "Where exactly should I pay? Kindly send your UPI ID, I will try.",
+            "bankAccounts": "Please share the account number and IFSC, I will transfer from net banking.",
+            "phishingLinks": "The link is not opening on my phone. Could you send it again?",
+            "phoneNumbers": "May I have your number? I will call back and confirm.",
+        },
+        reply_done="All right, give me some time, I will visit the branch and do it.",
+        reply_safe="Sorry, who is this? I don't think I know you.",
+        reply_fallback="Sorry, I did not understand. Could you explain in detail?",
+    ),
+]
+DEFAULT_PERSONA = "ramesh"
+# Language subtag of a Metadata.locale ("hi-IN") -> Metadata.language value,
+# used when the language itself is missing or unknown
+LOCALE_LANGUAGES = {"hi": "hindi", "en": "english"}
+
+
+def render_system_prompt(persona: Persona) -> str:
+    return SYSTEM_TEMPLATE.substitute(
+        name=persona.name,
+        short_name=persona.short_name,
+        age=persona.age,
+        occupation=persona.occupation,
+        tech_knowledge=persona.tech_knowledge,
+        language=persona.language,
+        personality=persona.personality,
+        phrases="\n".join(f'   - "{phrase}"' for phrase in persona.phrases),
+    )
+
+
+class PersonaRegistry:
+    """Personas and their system prompts, rendered once at registration.
+
+    A session is matched to the personas that speak its Metadata.language
+    (else the language of its locale, "hi" in "hi-IN"), narrowed to those
+    credible in the locale's region when any are, and one of them is picked
+    by a stable hash of the session ID, so the choice needs no storage and
+    never changes mid-conversation.
+    """
+
+    def __init__(self, personas: List[Persona], default: str = DEFAULT_PERSONA):
+        self.default = default
+        self._personas: Dict[str, Persona] = {}
+        self._system_prompts: Dict[str, str] = {}
+        self._by_language: Dict[str, List[str]] = {}
+        for persona in personas:
+            self.register(persona)
+
+    def register(self, persona: Persona) -> None:
+        self._personas[persona.key] = persona
+        self._system_prompts[persona.key] = render_system_prompt(persona)
+        for language in persona.languages:
+            self._by_language.setdefault(language, []).append(persona.key)
+
+    def get(self, key: Optional[str]) -> Persona:
+        return self._personas.get(key) or self._personas[self.default]
+
+    def system_prompt(self, persona: Persona) -> str:
+        return self._system_prompts[persona.key]
+
+    def choose(self, session_id: str, metadata: Optional[Metadata]) -> Persona:
+        language = (metadata.language or "").lower() if metadata else ""
+        locale_language, region = parse_locale(metadata.locale if metadata else None)
+        candidates = (
+            self._by_language.get(language)
+            or self._by_language.get(LOCALE_LANGUAGES.get(locale_language, ""))
+        )
+        if not candidates:
+            return self._personas[self.default]
+        if region:
+            candidates = [k for k in candidates if region in self._personas[k].regions] or candidates
+        return self._personas[candidates[zlib.crc32(session_id.encode("utf-8")) % len(candidates)]]
+
+    def keys(self) -> List[str]:
+        return list(self._personas)
+
+
+def parse_locale(locale: Optional[str]) -> Tuple[str, str]:
+    """(language subtag, region) of "hi-IN", "en_IN", "IN" or "en"; "" if absent."""
+    parts = (locale or "").replace("_", "-").split("-")
+    if len(parts) == 1:
+        tag = parts[0]
+        return ("", tag.upper()) if tag.isupper() else (tag.lower(), "")
+    return parts[0].lower(), parts[-1].upper()
+
+
+persona_registry = PersonaRegistry(PERSONAS)
+
+
+def build_messages(
+    persona: Persona,
+    metadata: Optional[Metadata],
+    intelligence: str,
+    conversation: str,
+    turn: int
+) -> List[dict]:
+    """Chat messages for one turn: the persona's cached system prompt plus
+    the per-turn tail."""
+    return [
+        {"role": "system", "content": persona_registry.system_prompt(persona)},
+        {"role": "user", "content": TURN_TEMPLATE.substitute(
+            channel=metadata.channel if metadata else "SMS",
+            language=metadata.language if metadata else "English",
+            intelligence=intelligence,
+            conversation=conversation,
+            turn=turn,
+        )}
+    ]
@@ -0,0 +1,194 @@
+import math
+import re
+from typing import List, NamedTuple, Optional
+
+from app.agents import intelligence_extractor
+from app.agents.intelligence_extractor import IntelSpan
+from app.agents.url_intelligence import reputation_cache
+from app.config import FASTPATH_SCAM_THRESHOLD, FASTPATH_SAFE_THRESHOLD
+
+# ============ WEIGHTS ============
+
+ENTITY_WEIGHTS = {
+    intelligence_extractor.UPI: 2.0,
+    intelligence_extractor.URL: 1.5,
+    intelligence_extractor.IFSC: 1.5,
+    intelligence_extractor.BANK_ACCOUNT: 1.0,
+    intelligence_extractor.PHONE: 0.5,
+}
+
+KEYWORD_WEIGHTS = {
+    "otp": 2.5, "pin": 1.5, "password": 2.0, "kyc": 2.0,
+    "blocked": 1.5, "suspended": 1.5, "expire": 1.0,
+    "lottery": 2.0, "winner": 1.5, "prize": 1.5,
+    "refund": 1.0, "cashback": 1.0,
+    "urgent": 1.0, "immediately": 1.0, "verify": 1.0, "update": 0.5,
+    "click": 1.0, "link": 0.5, "form": 0.25,
+    "bank": 0.5, "account": 0.5, "transfer": 1.0, "pay": 0.5,
+}
+
+# Structural features, each counted at most once per message
+MONEY_PATTERN = re.compile(r"(?:₹|\brs\.?|\binr)\s?\d", re.IGNORECASE)
+DEADLINE_PATTERN = re.compile(
+    r"\b(?:within \d+ ?(?:hours?|hrs?|minutes?|mins?)|today|tonight|aaj hi|turant|jaldi)\b",
+    re.IGNORECASE,
+)
+SHARE_PATTERN = re.compile(r"\b(?:share|send|bhejo|bhej do|batao|provide)\b", re.IGNORECASE)
+
+STRUCTURE_WEIGHTS = {
+    "money_amount": 1.0,
+    "deadline": 1.0,
+    "share_request": 0.75,
+    "shouting": 0.5,
+}
+
+# Link reputation features, looked up once per domain in the reputation cache
+LINK_WEIGHTS = {
+    "lookalike_domain": 2.5,
+    "punycode_domain": 1.0,
+    "url_shortener": 0.75,
+}
+
+# The score is a logistic over the summed weights; with no evidence at
+# all it sits near 0.05, and about six points of evidence reach 0.95.
+SCORE_BIAS = 3.0
+
+SCAM_TYPES = [
+    ({"otp", "pin", "password"}, "OTP/Credential Fraud"),
+    ({"kyc", "blocked", "suspended", "expire"}, "KYC/Account Block Scam"),
+    ({"lottery", "winner", "prize"}, "Lottery/Prize Scam"),
+    ({"refund", "cashback"}, "Refund/Cashback Scam"),
+]
+
+RED_FLAG_LABELS = {
+    "otp": "Asking for OTP",
+    "pin": "Asking for PIN",
+    "password": "Asking for password",
+    "kyc": "KYC update pressure",
+    "blocked": "Threat of account block",
+    "suspended": "Threat of account suspension",
+    "lottery": "Unsolicited lottery/prize",
+    "urgent": "Creates urgency",
+    "immediately": "Creates urgency",
+    intelligence_extractor.UPI: "UPI payment request",
+    intelligence_extractor.URL: "Contains a link",
+    intelligence_extractor.BANK_ACCOUNT: "Bank account details",
+    "money_amount": "Mentions a money amount",
+    "deadline": "Tight deadline",
+    "share_request": "Asks to share or send something",
+    "lookalike_domain": "Link imitates a bank's website",
+    "punycode_domain": "Internationalized (punycode) domain",
+    "url_shortener": "Shortened link hides destination",
+}
+
+
+class ScamVerdict(NamedTuple):
+    score: float
+    # True/False when the score crosses a fast-path threshold, else None
+    is_scam: Optional[bool]
+    scam_type: Optional[str]
+    red_flags: List[str]
+    features: List[str]
+
+
+def _features(text: str, spans: List[IntelSpan]) -> List[str]:
+    """Distinct evidence names: entity kinds, keywords and structure."""
+    features = {}
+    for span in spans:
+        if span.kind == intelligence_extractor.KEYWORD:
+            features[span.value] = None
+        else:
+            features[span.kind] = None
+        if span.kind == intelligence_extractor.URL:
+            reputation = reputation_cache.check(span.value)
+            if reputation is None:
+                continue
+            if reputation.brand:
+                features["lookalike_domain"] = None
+            if reputation.punycode:
+                features["punycode_domain"] = None
+            if reputation.shortener:
+                features["url_shortener"] = None
+
+    if MONEY_PATTERN.search(text):
+        features["money_amount"] = None
+    if DEADLINE_PATTERN.search(text):
+        features["deadline"] = None
+    if SHARE_PATTERN.search(text):
+        features["share_request"] = None
+
+    letters = [c for c in text if c.isalpha()]
+    if len(letters) >= 12 and sum(c.isupper() for c in letters) / len(letters) > 0.6:
+        features["shouting"] = None
+
+    return list(features)
+
+
+def _weight(feature: str) -> float:
+    return (
+        ENTITY_WEIGHTS.get(feature)
+        or KEYWORD_WEIGHTS.get(feature)
+        or STRUCTURE_WEIGHTS.get(feature)
+        or LINK_WEIGHTS.get(feature, 0.0)
+    )
+
+
+def _scam_type(features: List[str]) -> str:
+    present = set(features)
+    for keywords, scam_type in SCAM_TYPES:
+        if present & keywords:
+            return scam_type
+    return "Financial Scam"
+
+
+def classify(
+    text: str,
+    spans: Optional[List[IntelSpan]] = None,
+    scam_threshold: float = FASTPATH_SCAM_THRESHOLD,
+    safe_threshold: float = FASTPATH_SAFE_THRESHOLD
+) -> ScamVerdict:
+    """Score a message from extractor hits, keywords and structure."""
+    if spans is None:
+        spans = intelligence_extractor.scan(text)
+
+    features = _features(text, spans)
+    total = sum(_weight(feature) for feature in features)
+    score = 1.0 / (1.0 + math.exp(SCORE_BIAS - total))
+
+    if score >= scam_threshold:
+        is_scam = True
+    elif score <= safe_threshold:
+        is_scam = False
+    else:
+        is_scam = None
+
+    red_flags = list(dict.fromkeys(
+        RED_FLAG_LABELS[f] for f in features if f in RED_FLAG_LABELS
+    ))
+
+    return ScamVerdict(
+        score=score,
+        is_scam=is_scam,
+        scam_type=_scam_type(features) if score >= 0.5 else None,
+        red_flags=red_flags,
+        features=features
+    )
+
+
+def verdict_to_analysis(verdict: ScamVerdict) -> dict:
+    """Render a verdict in the AnalysisResponse shape used by /analyze."""
+    is_scam = verdict.score >= 0.5
+    return {
+        "is_scam": is_scam,
+        "confidence": int(round(verdict.score * 100)),
+        "scam_type": verdict.scam_type,
+        "red_flags": verdict.red_flags,
+        "explanation": (
+            "Rule-based match: " + ", ".join(verdict.features)
+            if is_scam else "No major scam indicators detected"
+        ),
+        "advice": (
+            "Do not share OTP, PIN or money. Block the sender and report at cybercrime.gov.in"
+            if is_scam else "Stay cautious"
+        )
+    }
@@ -0,0 +1,361 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from app.config import URL_REPUTATION_CACHE_SIZE
+
+# ============ PUBLIC SUFFIXES ============
+
+# Free-hosting and tunnel domains ("private" PSL entries): every customer
+# gets its own registrable name under them, and phishing pages are
+# usually served from one
+FREE_HOSTING_SUFFIXES = frozenset({
+    "blogspot.com", "github.io", "gitlab.io", "netlify.app", "vercel.app",
+    "pages.dev", "workers.dev", "web.app", "firebaseapp.com", "appspot.com",
+    "herokuapp.com", "onrender.com", "glitch.me", "repl.co", "replit.app",
+    "ngrok.io", "ngrok-free.app", "trycloudflare.com", "azurewebsites.net",
+    "000webhostapp.com", "wixsite.com", "weebly.com", "wordpress.com",
+    "duckdns.org", "ddns.net", "r2.dev", "surge.sh",
+})
+
+# Offline subset of the Public Suffix List: Indian and other multi-label
+# suffixes seen in scam traffic plus the free-hosting ones. Hosts under an
+# unlisted suffix fall back to the PSL default rule (the last label).
+PUBLIC_SUFFIXES = frozenset({
+    "co.in", "net.in", "org.in", "firm.in", "gen.in", "ind.in", "gov.in",
+    "nic.in", "ac.in", "edu.in", "res.in", "mil.in", "bank.in", "fin.in",
+    "co.uk", "org.uk", "com.au", "com.sg", "com.my", "com.pk", "com.bd",
+    "com.np", "co.za", "com.br", "com.cn", "com.hk",
+}) | FREE_HOSTING_SUFFIXES
+
+URL_SHORTENERS = frozenset({
+    "bit.ly", "tinyurl.com", "t.co", "goo.gl", "cutt.ly", "is.gd", "v.gd",
+    "rb.gy", "shorturl.at", "tiny.cc", "ow.ly", "buff.ly", "rebrand.ly",
+    "t.ly", "s.id", "bl.ink", "shorte.st", "adf.ly", "qr.ae", "lnkd.in",
+    "surl.li", "tinu.be", "wa.link", "wa.me",
+})
+
+RISKY_TLDS = frozenset({
+    "xyz", "top", "tk", "ml", "ga", "cf", "gq", "buzz", "icu", "click",
+    "link", "online", "site", "live", "shop", "rest", "support", "info",
+})
+
+# Query parameters that only track the click
+TRACKING_PARAMS = frozenset({"fbclid", "gclid", "igshid", "mc_cid", "mc_eid", "ref_src"})
+
+# ============ BRANDS ============
+
+# Brand token -> registered domains the brand really uses
+# (group companies' domains included: "icicidirect.com" is ICICI's own)
+BANK_BRANDS = {
+    "sbi": {
+        "sbi.co.in", "onlinesbi.sbi", "sbi.bank.in", "onlinesbi.com",
+        "sbicard.com", "sbilife.co.in", "sbimf.com", "sbigeneral.in",
+    },
+    "onlinesbi": {"onlinesbi.sbi", "onlinesbi.com"},
+    "hdfc": {
+        "hdfcbank.com", "hdfc.com", "hdfcbank.bank.in",
+        "hdfclife.com", "hdfcergo.com", "hdfcsec.com", "hdfcfund.com",
+    },
+    "hdfcbank": {"hdfcbank.com"},
+    "icici": {
+        "icicibank.com", "icici.bank.in",
+        "icicidirect.com", "icicisecurities.com", "icicilombard.com", "iciciprulife.com",
+    },
+    "icicibank": {"icicibank.com"},
+    "axisbank": {"axisbank.com"},
+    "kotak": {"kotak.com", "kotak.bank.in", "kotaksecurities.com", "kotaklife.com", "kotakmf.com"},
+    "pnb": {"pnbindia.in", "pnb.bank.in"},
+    "pnbindia": {"pnbindia.in"},
+    "bankofbaroda": {"bankofbaroda.in", "bankofbaroda.com"},
+    "canarabank": {"canarabank.com", "canarabank.in"},
+    "unionbank": {"unionbankofindia.co.in"},
+    "yesbank": {"yesbank.in"},
+    "indusind": {"indusind.com"},
+    "idfcfirst": {"idfcfirstbank.com"},
+    "paytm": {"paytm.com", "paytmbank.com", "paytmmall.com", "paytmmoney.com"},
+    "phonepe": {"phonepe.com"},
+    "npci": {"npci.org.in"},
+    "bhimupi": {"bhimupi.org.in"},
+    "rbi": {"rbi.org.in"},
+    "incometax": {"incometax.gov.in"},
+}
+OFFICIAL_DOMAINS = frozenset(domain for domains in BANK_BRANDS.values() for domain in domains)
+# Registration under these is restricted to government bodies and licensed
+# banks, so a brand name there is never a lookalike
+RESTRICTED_SUFFIXES = frozenset({"gov.in", "nic.in", "bank.in"})
+# Short tokens match only as a whole hyphen/dot-separated part ("sbi-kyc"),
+# not inside longer words ("sbiz"); longer ones match anywhere
+MIN_SUBSTRING_BRAND = 5
+
+# Confusable characters (Cyrillic/Greek homoglyphs, digit swaps) -> ASCII
+CONFUSABLES = str.maketrans({
+    "а": "a", "е": "e", "о": "o", "р": "p", "с": "c", "у": "y", "х": "x",
+    "і": "i", "ј": "j", "ԁ": "d", "ѕ": "s", "ԛ": "q", "ԝ": "w", "һ": "h",
+    "ӏ": "l", "к": "k", "м": "m", "т": "t", "в": "b", "н": "h",
+    "α": "a", "ο": "o", "ν": "v", "ι": "i", "κ": "k", "τ": "t", "ρ": "p",
+    "ɡ": "g", "ɑ": "a", "ı": "i",
+    "0": "o", "1": "l", "3": "e", "5": "s", "@": "a", "$": "s",
+})
+
+
+# ============ CANONICALIZATION ============
+
+def url_host(url: str) -> str:
+    """Lowercased ASCII (punycode) host of a URL or bare host, or ''."""
+    url = url.strip()
+    if "://" not in url:
+        url = "http://" + url
+    try:
+        host = (urlsplit(url).hostname or "").rstrip(".")
+    except ValueError:
+        return ""
+    return to_ascii(host)
+
+
+def to_ascii(host: str) -> str:
+    if host.isascii():
+        return host.lower()
+    try:
+        return host.encode("idna").decode("ascii").lower()
+    except UnicodeError:
+        return host.lower()
+
+
+def to_unicode(host: str) -> str:
+    if "xn--" not in host:
+        return host
+    try:
+        return host.encode("ascii").decode("idna")
+    except UnicodeError:
+        return host
+
+
+def canonicalize_url(url: str) -> str:
+    """One spelling per link: lowercase scheme and punycode host, no default
+    port, fragment or tracking parameters, remaining parameters sorted."""
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url.strip()
+
+    scheme = parts.scheme.lower() or "http"
+    host = to_ascii((parts.hostname or "").rstrip("."))
+    netloc = host
+    if port and not (scheme, port) in (("http", 80), ("https", 443)):
+        netloc = f"{host}:{port}"
+
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+def link_key(url: str) -> str:
+    """Links that differ only in scheme or query (per-victim tokens) share a key."""
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    return url_host(url) + (parts.path.rstrip("/") or "")
+
+
+def merge_links(existing: List[str], new: List[str]) -> List[str]:
+    """Union of two link lists, one link (the first seen) per link_key."""
+    links: Dict[str, str] = {}
+    for url in list(existing) + list(new):
+        links.setdefault(link_key(url), url)
+    return list(links.values())
+
+
+def public_suffix(host: str) -> str:
+    labels = host.split(".")
+    for i in range(len(labels)):
+        candidate = ".".join(labels[i:])
+        if candidate in PUBLIC_SUFFIXES:
+            return candidate
+    return labels[-1]
+
+
+def registered_domain(host: str) -> str:
+    """eTLD+1 of a host ("sbi-kyc.co.in" for "www.sbi-kyc.co.in")."""
+    host = to_ascii(host.rstrip("."))
+    if not host or is_ip(host):
+        return host
+    suffix = public_suffix(host)
+    if host == suffix:
+        return host
+    label = host[:-len(suffix) - 1].rpartition(".")[2]
+    return f"{label}.{suffix}"
+
+
+def is_ip(host: str) -> bool:
+    return host.replace(".", "").isdigit() or ":" in host
+
+
+# ============ LOOKALIKES ============
+
+def skeleton(label: str) -> str:
+    """ASCII skeleton of a (possibly IDN) label for brand comparison."""
+    return to_unicode(label).lower().translate(CONFUSABLES).replace("rn", "m").replace("vv", "w")
+
+
+def _one_edit_apart(a: str, b: str) -> bool:
+    """Substitution, insertion, deletion or adjacent swap."""
+    if abs(len(a) - len(b)) > 1 or a == b:
+        return False
+    if len(a) == len(b):
+        diff = [i for i in range(len(a)) if a[i] != b[i]]
+        return len(diff) == 1 or (
+            len(diff) == 2 and diff[1] == diff[0] + 1
+            and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]]
+        )
+    short, long_ = (a, b) if len(a) < len(b) else (b, a)
+    return any(long_[:i] + long_[i + 1:] == short for i in range(len(long_)))
+
+
+def impersonated_brand(host: str) -> Optional[str]:
+    """The Indian bank/payments brand a non-official host imitates, if any."""
+    domain = registered_domain(host)
+    if domain in OFFICIAL_DOMAINS or public_suffix(domain) in RESTRICTED_SUFFIXES:
+        return None
+
+    # Brand names are checked in the registrable label and the subdomains
+    # ("sbi.verify-kyc.xyz"), not in the public suffix
+    names = host[:-len(public_suffix(host)) - 1] if "." in host else host
+    text = skeleton(names)
+    parts = [part for part in text.replace("-", ".").split(".") if part]
+    for brand in BANK_BRANDS:
+        if len(brand) >= MIN_SUBSTRING_BRAND:
+            if brand in text or any(_one_edit_apart(part, brand) for part in parts if len(brand) >= 6):
+                return brand
+        elif brand in parts:
+            return brand
+    return None
+
+
+# ============ REPUTATION ============
+
+class DomainReputation(NamedTuple):
+    domain: str
+    score: float
+    reasons: List[str]
+    brand: Optional[str]
+    official: bool
+    shortener: bool
+    punycode: bool
+    first_seen: float
+
+    def to_dict(self) -> dict:
+        return {
+            "domain": self.domain,
+            "score": self.score,
+            "reasons": self.reasons,
+            "brand": self.brand,
+            "official": self.official,
+            "shortener": self.shortener,
+            "punycode": self.punycode,
+            "firstSeen": self.first_seen,
+        }
+
+
+REASON_WEIGHTS = {
+    "lookalike": 0.6,
+    "ip_host": 0.4,
+    "punycode": 0.3,
+    "shortener": 0.3,
+    "free_hosting": 0.2,
+    "risky_tld": 0.2,
+    "many_hyphens": 0.1,
+}
+
+
+def score_host(host: str) -> DomainReputation:
+    """Offline risk score (0..1) of the domain behind a host."""
+    domain = registered_domain(host)
+    suffix = public_suffix(host) if not is_ip(host) else ""
+    brand = impersonated_brand(host)
+    punycode = "xn--" in host
+
+    reasons = []
+    if brand:
+        reasons.append("lookalike")
+    if is_ip(host):
+        reasons.append("ip_host")
+    if punycode:
+        reasons.append("punycode")
+    if domain in URL_SHORTENERS:
+        reasons.append("shortener")
+    if suffix in FREE_HOSTING_SUFFIXES:
+        reasons.append("free_hosting")
+    if suffix.rpartition(".")[2] in RISKY_TLDS:
+        reasons.append("risky_tld")
+    if to_unicode(domain).count("-") >= 2:
+        reasons.append("many_hyphens")
+
+    return DomainReputation(
+        domain=domain,
+        score=round(min(1.0, sum(REASON_WEIGHTS[r] for r in reasons)), 2),
+        reasons=reasons,
+        brand=brand,
+        official=domain in OFFICIAL_DOMAINS,
+        shortener=domain in URL_SHORTENERS,
+        punycode=punycode,
+        first_seen=time.time(),
+    )
+
+
+class ReputationCache:
+    """LRU of domain reputations, keyed by registered domain.
+
+    A domain is scored the first time one of its URLs is seen; later URLs
+    on it, whatever their path or query, are answered from the cache.
+    Hosts with a subdomain other than www get their own entry because the
+    subdomain can carry the brand ("sbi.secure-login.xyz").
+    """
+
+    def __init__(self, max_entries: int = URL_REPUTATION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, DomainReputation]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, url: str) -> Optional[DomainReputation]:
+        """Reputation of the domain behind a URL or bare host."""
+        host = url_host(url)
+        if not host:
+            return None
+        domain = registered_domain(host)
+        key = domain if host in (domain, "www." + domain) else host
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = score_host(host)
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+reputation_cache = ReputationCache()
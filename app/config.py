@@ -6,16 +6,138 @@ load_dotenv()
 
 # API Keys
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "your_groq_key_here")
+# Override to point the Groq clients at another OpenAI-compatible server
+# (e.g. benchmarks/fake_llm.py); unset means the Groq default
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
 SECRET_API_KEY = os.getenv("SECRET_API_KEY", "my_secret_hackathon_key_789")
 
 # Database Configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./honeypot.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# Threads that run blocking DB work for async endpoints
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "4"))
+# Write-behind queue for bookkeeping writes, committed in batches off the request path
+DB_WRITE_QUEUE_SIZE = int(os.getenv("DB_WRITE_QUEUE_SIZE", "10000"))
+DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "200"))
 
 # GUVI API Settings
 GUVI_CALLBACK_URL = os.getenv("GUVI_CALLBACK_URL", "https://hackathon.guvi.in/api/updateHoneyPotFinalResult")
+CALLBACK_QUEUE_SIZE = int(os.getenv("CALLBACK_QUEUE_SIZE", "1000"))
+CALLBACK_MAX_RETRIES = int(os.getenv("CALLBACK_MAX_RETRIES", "4"))
+CALLBACK_BACKOFF_SECONDS = float(os.getenv("CALLBACK_BACKOFF_SECONDS", "1.0"))
+CALLBACK_TIMEOUT_SECONDS = float(os.getenv("CALLBACK_TIMEOUT_SECONDS", "10"))
+
+# Scam report emails (digests sent over one persistent SMTP connection).
+# Reporting is on when SMTP_HOST and REPORT_EMAIL_TO are set; credentials
+# are only needed by servers that require AUTH (Gmail, the default host
+# when a password is given; not a local debugging server)
+REPORT_EMAIL = os.getenv("REPORT_EMAIL")
+REPORT_EMAIL_PASSWORD = os.getenv("REPORT_EMAIL_PASSWORD")
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com" if REPORT_EMAIL_PASSWORD else "")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "15"))
+REPORT_EMAIL_TO = os.getenv("REPORT_EMAIL_TO", "report@cybercrime.gov.in")
+REPORT_DIGEST_SECONDS = float(os.getenv("REPORT_DIGEST_SECONDS", "60"))
+REPORT_MAX_RETRIES = int(os.getenv("REPORT_MAX_RETRIES", "4"))
+REPORT_BACKOFF_SECONDS = float(os.getenv("REPORT_BACKOFF_SECONDS", "2.0"))
+
+# Live dashboard WebSockets (per-client send queue, oldest dropped when full)
+DASHBOARD_CLIENT_QUEUE = int(os.getenv("DASHBOARD_CLIENT_QUEUE", "100"))
+DASHBOARD_HEARTBEAT_SECONDS = float(os.getenv("DASHBOARD_HEARTBEAT_SECONDS", "20"))
+DASHBOARD_SEND_TIMEOUT_SECONDS = float(os.getenv("DASHBOARD_SEND_TIMEOUT_SECONDS", "5"))
+# Aggregated dashboard protocol (snapshot on connect, then throttled deltas)
+DASHBOARD_MAX_UPDATES_PER_SECOND = float(os.getenv("DASHBOARD_MAX_UPDATES_PER_SECOND", "4"))
+DASHBOARD_RECENT_ROWS = int(os.getenv("DASHBOARD_RECENT_ROWS", "50"))
+DASHBOARD_TOP_N = int(os.getenv("DASHBOARD_TOP_N", "10"))
+# Lifetime of the token /dashboard embeds for opening its WebSocket
+DASHBOARD_TOKEN_TTL_SECONDS = int(os.getenv("DASHBOARD_TOKEN_TTL_SECONDS", "300"))
+
+# /metrics: how long a costly gauge reading (e.g. the SQL session count) is reused
+METRICS_GAUGE_CACHE_SECONDS = float(os.getenv("METRICS_GAUGE_CACHE_SECONDS", "15"))
+
+# Telegram bot (polling via run_bot.py, or a webhook served by the API
+# process when TELEGRAM_WEBHOOK_URL - the public base URL - is set)
+TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+TELEGRAM_WEBHOOK_URL = os.getenv("TELEGRAM_WEBHOOK_URL", "")
+TELEGRAM_WEBHOOK_PATH = os.getenv("TELEGRAM_WEBHOOK_PATH", "/telegram/webhook")
+TELEGRAM_WEBHOOK_SECRET = os.getenv("TELEGRAM_WEBHOOK_SECRET", "")
+# Updates handled at once across all chats; each chat is still handled in order
+TELEGRAM_CONCURRENT_UPDATES = int(os.getenv("TELEGRAM_CONCURRENT_UPDATES", "256"))
+TELEGRAM_CHAT_QUEUE = int(os.getenv("TELEGRAM_CHAT_QUEUE", "20"))
+# Messages kept in a bot session's conversation_log (sent back as history)
+TELEGRAM_HISTORY_MESSAGES = int(os.getenv("TELEGRAM_HISTORY_MESSAGES", "200"))
 
 # Model Configuration
 MODEL_NAME = os.getenv("MODEL_NAME", "llama-3.1-8b-instant")
 
+# LLM Gateway (async client shared by the async endpoints)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "32"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "20"))
+
+# LLM router: ordered OpenAI-compatible endpoints as a JSON list, e.g.
+#   [{"name": "groq", "base_url": "https://api.groq.com/openai/v1",
+#     "api_key_env": "GROQ_API_KEY", "model": "llama-3.1-8b-instant", "rpm": 30, "tpm": 6000}, ...]
+# Unset means a single Groq endpoint from GROQ_API_KEY / GROQ_BASE_URL / MODEL_NAME
+LLM_ENDPOINTS = os.getenv("LLM_ENDPOINTS", "")
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+# Skip an endpoint whose average latency is this many times the fastest one's
+LLM_LATENCY_SLACK = float(os.getenv("LLM_LATENCY_SLACK", "2.0"))
+# Hedging: send a second request once the first has run past the endpoint's
+# p95 latency (LLM_HEDGE_DELAY_SECONDS until there are enough samples)
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() == "true"
+LLM_HEDGE_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_DELAY_SECONDS", "2.0"))
+
+# Prompt budgeting (estimated tokens for the conversation part of the prompt)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))
+CONTEXT_KEEP_TURNS = int(os.getenv("CONTEXT_KEEP_TURNS", "6"))
+CONTEXT_SUMMARY_TOKENS = int(os.getenv("CONTEXT_SUMMARY_TOKENS", "300"))
+
+# Batch ingestion (/honeypot/batch): items per transaction, sessions in flight
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "500"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "16"))
+
+# Rule-based fast path (skip the LLM when the pre-classifier is confident).
+# A safe threshold of 0 disables the "clearly not a scam" shortcut.
+FASTPATH_SCAM_THRESHOLD = float(os.getenv("FASTPATH_SCAM_THRESHOLD", "0.9"))
+FASTPATH_SAFE_THRESHOLD = float(os.getenv("FASTPATH_SAFE_THRESHOLD", "0"))
+# Also answer confident honeypot turns with a canned persona reply
+FASTPATH_HONEYPOT_REPLIES = os.getenv("FASTPATH_HONEYPOT_REPLIES", "false").lower() == "true"
+
+# /analyze response cache (ANALYSIS_CACHE_DB = SQLite path for persistence)
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "10000"))
+ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", "86400"))
+ANALYSIS_CACHE_DB = os.getenv("ANALYSIS_CACHE_DB", "")
+
+# Phishing URL reputation (offline scores, cached per registered domain)
+URL_REPUTATION_CACHE_SIZE = int(os.getenv("URL_REPUTATION_CACHE_SIZE", "50000"))
+
+# Campaign clustering (MinHash permutations, LSH bands, join threshold)
+CAMPAIGN_NUM_PERM = int(os.getenv("CAMPAIGN_NUM_PERM", "64"))
+CAMPAIGN_BANDS = int(os.getenv("CAMPAIGN_BANDS", "16"))
+CAMPAIGN_SIMILARITY = float(os.getenv("CAMPAIGN_SIMILARITY", "0.5"))
+# Only messages the rule-based detector scores at least this high join campaigns
+CAMPAIGN_MIN_SCORE = float(os.getenv("CAMPAIGN_MIN_SCORE", "0.5"))
+# Bounds on the in-memory index (least recently active campaigns are evicted)
+CAMPAIGN_MAX_CAMPAIGNS = int(os.getenv("CAMPAIGN_MAX_CAMPAIGNS", "5000"))
+CAMPAIGN_MAX_BUCKETS = int(os.getenv("CAMPAIGN_MAX_BUCKETS", "256"))
+CAMPAIGN_MAX_MEMBERS = int(os.getenv("CAMPAIGN_MAX_MEMBERS", "1000"))
+
+# Session Store ("memory" = per-process LRU/TTL, "sql" = HoneypotSession table)
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+SESSION_IDLE_TTL_SECONDS = int(os.getenv("SESSION_IDLE_TTL_SECONDS", "3600"))
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+# SqlSessionStore: retries of a put that lost a concurrent-write race
+SESSION_WRITE_RETRIES = int(os.getenv("SESSION_WRITE_RETRIES", "3"))
+# Message IDs a session remembers as already extracted; older ones are
+# covered by a timestamp watermark (SessionState.seen_before)
+SESSION_SEEN_MESSAGES = int(os.getenv("SESSION_SEEN_MESSAGES", "500"))
+
 # Print for debugging (remove later)
 print(f"Config loaded: DATABASE_URL = {DATABASE_URL}")
\ No newline at end of file
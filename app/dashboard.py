@@ -1,4 +1,5 @@
-def get_dashboard_html():
+def get_dashboard_html(ws_token: str) -> str:
+    """The dashboard page; `ws_token` authorizes its WebSocket connection."""
     return """
 <!DOCTYPE html>
 <html>
@@ -9,12 +10,32 @@ def get_dashboard_html():
     table { border-collapse: collapse; width: 100%; }
     th, td { border: 1px solid #ccc; padding: 8px; }
     th { background: #f2f2f2; }
+    .stats { display: flex; gap: 24px; margin-bottom: 16px; flex-wrap: wrap; }
+    .stat b { display: block; font-size: 24px; }
+    .tops { display: flex; gap: 48px; margin-bottom: 16px; }
+    .tops ol { margin: 4px 0; }
   </style>
 </head>
 
 <body>
   <h2>🚨 Live Scam Dashboard</h2>
 
+  <div class="stats">
+    <div class="stat"><b id="messages">0</b>Messages</div>
+    <div class="stat"><b id="sessions">0</b>Sessions</div>
+    <div class="stat"><b id="scam_messages">0</b>Scam messages</div>
+    <div class="stat"><b id="messages_per_minute">0</b>Messages / min</div>
+    <div class="stat"><b id="intel_upi">0</b>UPI IDs</div>
+    <div class="stat"><b id="intel_phone">0</b>Phones</div>
+    <div class="stat"><b id="intel_bank_account">0</b>Bank accounts</div>
+    <div class="stat"><b id="intel_url">0</b>Links</div>
+  </div>
+
+  <div class="tops">
+    <div>Top UPI handles<ol id="topUpiHandles"></ol></div>
+    <div>Top domains<ol id="topDomains"></ol></div>
+  </div>
+
   <table>
     <thead>
       <tr>
@@ -29,30 +50,77 @@ def get_dashboard_html():
   </table>
 
 <script>
+  // Rows kept in the table; older ones are removed
+  const MAX_ROWS = 200;
+  const table = document.getElementById("sessionsTable");
+
+  function setText(id, value) {
+    document.getElementById(id).textContent = value;
+  }
+
+  function renderTop(id, entries) {
+    const list = document.getElementById(id);
+    list.replaceChildren(...entries.map(([key, count]) => {
+      const item = document.createElement("li");
+      item.textContent = `${key} (${count})`;
+      return item;
+    }));
+  }
+
+  function renderStats(stats) {
+    for (const key of ["messages", "sessions", "scam_messages", "messages_per_minute"]) {
+      setText(key, stats[key]);
+    }
+    for (const [type, count] of Object.entries(stats.intel)) {
+      setText("intel_" + type, count);
+    }
+    renderTop("topUpiHandles", stats.top_upi_handles);
+    renderTop("topDomains", stats.top_domains);
+  }
+
+  function addRows(rows) {
+    const fragment = document.createDocumentFragment();
+    for (const data of rows.slice(-MAX_ROWS).reverse()) {
+      const row = document.createElement("tr");
+      for (const value of [
+        data.session_id,
+        data.message,
+        data.upi_ids.join(", "),
+        data.phone_numbers.join(", "),
+        data.timestamp
+      ]) {
+        const cell = document.createElement("td");
+        cell.textContent = value;
+        row.appendChild(cell);
+      }
+      fragment.appendChild(row);
+    }
+    table.prepend(fragment);
+
+    while (table.rows.length > MAX_ROWS) {
+      table.deleteRow(-1);
+    }
+  }
+
   const ws = new WebSocket(
     (location.protocol === "https:" ? "wss://" : "ws://") +
     location.host +
-    "/ws/dashboard"
+    "/ws/dashboard?token=" + encodeURIComponent("__WS_TOKEN__")
   );
 
   ws.onmessage = function(event) {
     const data = JSON.parse(event.data);
 
-    const table = document.getElementById("sessionsTable");
-    const row = document.createElement("tr");
-
-    row.innerHTML = `
-      <td>${data.session_id}</td>
-      <td>${data.message}</td>
-      <td>${data.upi_ids.join(", ")}</td>
-      <td>${data.phone_numbers.join(", ")}</td>
-      <td>${data.timestamp}</td>
-    `;
-
-    table.prepend(row);
+    if (data.type === "snapshot") {
+      table.replaceChildren();
+    }
+    if (data.type === "snapshot" || data.type === "delta") {
+      renderStats(data.stats);
+      addRows(data.rows);
+    }
   };
 </script>
 
 </body>
 </html>
-"""
+""".replace("__WS_TOKEN__", ws_token)
@@ -1,8 +1,208 @@
-from sqlalchemy import create_engine
+import asyncio
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Hashable, Optional, Set
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from app.config import DATABASE_URL
+from app.config import (
+    DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE_SECONDS,
+    SQLITE_BUSY_TIMEOUT_MS,
+    DB_EXECUTOR_WORKERS,
+    DB_WRITE_QUEUE_SIZE,
+    DB_WRITE_BATCH_SIZE
+)
+
+
+def normalize_database_url(url: str) -> str:
+    """Accept Heroku/Railway style postgres:// URLs."""
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers run alongside the single writer; NORMAL sync is
+    durable across application crashes in WAL mode; busy_timeout makes
+    writers wait for the lock instead of failing immediately."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+def engine_options(url: str) -> dict:
+    """Dialect-specific create_engine keyword arguments."""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {
+            "connect_args": {
+                "check_same_thread": False,
+                "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000
+            }
+        }
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_pre_ping": True,
+        "pool_recycle": DB_POOL_RECYCLE_SECONDS
+    }
+
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+def create_db_engine(url: str = DATABASE_URL) -> Engine:
+    """Build a sync engine tuned for the URL's dialect."""
+    url = normalize_database_url(url)
+    engine = create_engine(url, **engine_options(url))
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+# Dedicated threads for sync ORM work called from async code, so a slow
+# flush never blocks the event loop and DB work can't starve to_thread users
+db_executor = ThreadPoolExecutor(
+    max_workers=DB_EXECUTOR_WORKERS,
+    thread_name_prefix="db"
+)
+
+
+async def run_in_db(fn, *args, **kwargs):
+    """Run a blocking DB function on the DB executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, partial(fn, *args, **kwargs))
+
+
+class WriteBehind:
+    """Apply bookkeeping writes from a background thread, off the request path.
+
+    `submit` queues a `write(db)` callable and returns at once. The worker
+    runs everything that has queued up (up to `batch_size`) in one session
+    and commits once; each write gets its own savepoint, so a failing write
+    is logged and skipped without losing the rest of the batch. Writes
+    submitted with a `key` are queued at most once until they run, for
+    callers that keep their own buffer and drain it inside the write.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = DB_WRITE_QUEUE_SIZE,
+        batch_size: int = DB_WRITE_BATCH_SIZE,
+        session_factory=None
+    ):
+        self.batch_size = batch_size
+        self.session_factory = session_factory
+        self.stats = {"queued": 0, "dropped": 0, "written": 0, "failed": 0, "batches": 0}
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._keys: Set[Hashable] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, write: Callable, key: Optional[Hashable] = None) -> bool:
+        """Queue a write; returns False if the queue was full."""
+        with self._lock:
+            if key is not None and key in self._keys:
+                return True
+            try:
+                self._queue.put_nowait((key, write))
+            except queue.Full:
+                self.stats["dropped"] += 1
+                print("❌ DB write queue full, dropping a write")
+                return False
+            if key is not None:
+                self._keys.add(key)
+            self.stats["queued"] += 1
+            self._ensure_worker()
+            return True
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything submitted so far is committed."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Let the worker drain the queue, then stop it."""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="db-write-behind", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            writes = [item for item in batch if isinstance(item, tuple)]
+            if writes:
+                self._write_batch(writes)
+
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if any(item is None for item in batch):
+                return
+
+    def _write_batch(self, writes) -> None:
+        with self._lock:
+            for key, _ in writes:
+                self._keys.discard(key)
+
+        db = (self.session_factory or SessionLocal)()
+        written = 0
+        try:
+            for _, write in writes:
+                try:
+                    with db.begin_nested():
+                        write(db)
+                    written += 1
+                except Exception as e:
+                    self.stats["failed"] += 1
+                    print(f"DB write-behind error: {e}")
+            db.commit()
+            self.stats["written"] += written
+            self.stats["batches"] += 1
+        except Exception as e:
+            db.rollback()
+            self.stats["failed"] += written
+            print(f"DB write-behind commit error: {e}")
+        finally:
+            db.close()
+
+
+# Shared write-behind queue for bookkeeping writes (campaigns, entities)
+db_writer = WriteBehind()
@@ -1,4 +1,7 @@
-from sqlalchemy import Column, String, Integer, Boolean, Text, DateTime
+from sqlalchemy import (
+    Column, String, Integer, Boolean, Text, DateTime,
+    ForeignKey, Index, UniqueConstraint
+)
 from datetime import datetime
 from app.db import Base
 
@@ -10,16 +13,65 @@ class HoneypotSession(Base):
     scam_detected = Column(Boolean, default=False)
     total_messages = Column(Integer, default=0)
     
-    # Extracted Intelligence
-    bank_accounts = Column(Text, default="[]")  # JSON array
-    upi_ids = Column(Text, default="[]")  # JSON array
-    phone_numbers = Column(Text, default="[]")  # JSON array
-    phishing_links = Column(Text, default="[]")  # JSON array
-    suspicious_keywords = Column(Text, default="[]")  # JSON array
+    # Extracted intelligence lives in intel_entities / session_entities;
+    # the old JSON-array columns are read only by app/migrate_entities.py
     
     # Metadata
     scammer_ip = Column(String, nullable=True)
     agent_notes = Column(Text, default="")
     callback_sent = Column(Boolean, default=False)
+    state_json = Column(Text, nullable=True)  # Serialized SessionState
+    # Bumped on every UPDATE; a write based on an older read fails with StaleDataError
+    version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __mapper_args__ = {"version_id_col": version}
+
+class ScamCampaign(Base):
+    __tablename__ = "scam_campaigns"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    campaign_id = Column(String, unique=True, index=True)
+    signature = Column(Text)  # JSON array (MinHash of the first message)
+    sample_text = Column(Text, default="")
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class CampaignMember(Base):
+    __tablename__ = "campaign_members"
+    __table_args__ = (
+        UniqueConstraint("campaign_id", "session_id", name="uq_campaign_member"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    campaign_id = Column(String, index=True)
+    session_id = Column(String, index=True)
+    message_hash = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+# ============ NORMALIZED INTELLIGENCE ============
+
+class IntelEntity(Base):
+    __tablename__ = "intel_entities"
+    __table_args__ = (
+        UniqueConstraint("entity_type", "value", name="uq_intel_entity_type_value"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    entity_type = Column(String, nullable=False)  # upi, bank_account, url, phone, keyword
+    value = Column(String, nullable=False)
+    first_seen = Column(DateTime, default=datetime.utcnow)
+    last_seen = Column(DateTime, default=datetime.utcnow)
+
+class SessionEntity(Base):
+    __tablename__ = "session_entities"
+    __table_args__ = (
+        UniqueConstraint("session_id", "entity_id", name="uq_session_entity"),
+        Index("ix_session_entities_entity_id", "entity_id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    session_id = Column(String, nullable=False)
+    entity_id = Column(Integer, ForeignKey("intel_entities.id"), nullable=False)
+    first_seen = Column(DateTime, default=datetime.utcnow)
@@ -1,9 +1,13 @@
 from app.db import engine, Base
-from app.db_models import HoneypotSession
+from app.db_models import (
+    HoneypotSession, ScamCampaign, CampaignMember, IntelEntity, SessionEntity
+)
+from app.migrate_schema import upgrade_schema
 
 def init_database():
     Base.metadata.create_all(bind=engine)
+    upgrade_schema()
     print("✅ Database initialized!")
 
 if __name__ == "__main__":
-    init_database()
\ No newline at end of file
+    init_database()
@@ -1,10 +1,33 @@
-from fastapi import FastAPI, Depends, HTTPException, Security
-from fastapi.security.api_key import APIKeyHeader
+from fastapi import FastAPI, Depends, Header, HTTPException, Request, Security, WebSocket, status
+from fastapi.responses import HTMLResponse, PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from fastapi.security.api_key import APIKeyHeader, APIKeyQuery
 from dotenv import load_dotenv
+from typing import Optional
+import hashlib
+import hmac
 import os
+import time
 
 load_dotenv()
 
+from app.config import (
+    TELEGRAM_WEBHOOK_URL,
+    TELEGRAM_WEBHOOK_PATH,
+    TELEGRAM_WEBHOOK_SECRET,
+    DASHBOARD_TOKEN_TTL_SECONDS,
+    METRICS_GAUGE_CACHE_SECONDS
+)
+from app.dashboard import get_dashboard_html
+from app.db import db_writer
+from app.services.dashboard_hub import dashboard_hub
+from app.services.dashboard_stats import dashboard_stats
+from app.services.guvi_service import process_guvi_event
+from app.services.callback_service import callback_dispatcher
+from app.services.session_store import session_store
+from app.utils import metrics
+from app.utils.email_reporter import scam_reporter
+
 app = FastAPI(title="Scam Honeypot API")
 
 
@@ -16,6 +39,24 @@ async def health():
     return {"status": "ok"}
 
 
+# -----------------------------
+# METRICS (Prometheus text format)
+# -----------------------------
+# len() of the SQL store is a COUNT query, so it is refreshed at most every
+# METRICS_GAUGE_CACHE_SECONDS rather than on every scrape
+metrics.Gauge("honeypot_live_sessions", "Sessions held by the session store.",
+              lambda: len(session_store), cache_seconds=METRICS_GAUGE_CACHE_SECONDS)
+metrics.Gauge("dashboard_websocket_clients", "Connected dashboard WebSockets.",
+              lambda: dashboard_hub.stats()["clients"])
+metrics.Gauge("guvi_callback_queue_depth", "GUVI callbacks waiting to be sent.",
+              callback_dispatcher.depth)
+metrics.Gauge("scam_report_digests_pending", "Session digests waiting for the next email flush.",
+              scam_reporter.pending)
+metrics.Gauge("db_write_queue_depth", "Bookkeeping writes waiting for the write-behind thread.",
+              db_writer.depth)
+
+
+
 # -----------------------------
 # API KEY
 # -----------------------------
@@ -35,6 +76,35 @@ def verify_key(api_key: str = Security(api_key_header)):
     return api_key
 
 
+# Prometheus scrapers send `Authorization: Bearer <key>`; x-api-key works too
+bearer_token = HTTPBearer(auto_error=False)
+
+def verify_metrics_key(
+    api_key: str = Security(api_key_header),
+    bearer: Optional[HTTPAuthorizationCredentials] = Security(bearer_token)
+):
+    if SECRET_API_KEY not in (api_key, bearer.credentials if bearer else None):
+        raise HTTPException(401, "Invalid API Key")
+
+
+# Sync handler: FastAPI runs it in the threadpool, so gauges that touch the
+# database never block the event loop
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics(api_key: str = Depends(verify_metrics_key)):
+    return PlainTextResponse(
+        metrics.render(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
+# -----------------------------
+# HONEYPOT AGENT API (/honeypot, /analyze, ...)
+# -----------------------------
+from app.routes import router
+
+app.include_router(router, dependencies=[Depends(verify_key)])
+
+
 # -----------------------------
 # HONEYPOT ENDPOINT
 # -----------------------------
@@ -43,23 +113,101 @@ async def honeypot(
     data: dict,
     api_key: str = Depends(verify_key)
 ):
-    message = data.get("message", {}).get(
-        "text",
-        "No message"
-    )
+    message = data.get("message")
+    if (
+        not isinstance(data.get("sessionId"), str)
+        or not isinstance(message, dict)
+        or not isinstance(message.get("text"), str)
+    ):
+        raise HTTPException(422, "sessionId and message.text are required")
 
-    # Simple honeypot reply
-    if "otp" in message.lower():
-        reply = "I received a code but not sure if I should share it."
-    elif "money" in message.lower():
-        reply = "How much money do you need?"
-    else:
-        reply = "Can you explain more?"
+    reply = await process_guvi_event(data)
 
     return {
         "reply": reply
     }
 
+# -----------------------------
+# TELEGRAM WEBHOOK (bot runs in this process)
+# -----------------------------
+if TELEGRAM_WEBHOOK_URL:
+    # Without the secret anyone who finds the path can post fake updates
+    if not TELEGRAM_WEBHOOK_SECRET:
+        raise RuntimeError("TELEGRAM_WEBHOOK_SECRET must be set when TELEGRAM_WEBHOOK_URL is")
+
+    from app.services import telegram_bot
+
+    app.add_event_handler("startup", telegram_bot.start_webhook)
+    app.add_event_handler("shutdown", telegram_bot.stop_webhook)
+    metrics.Gauge("telegram_active_chats", "Telegram chats with messages being handled.",
+                  telegram_bot.chat_queues.active)
+
+    @app.post(TELEGRAM_WEBHOOK_PATH)
+    async def telegram_webhook(
+        request: Request,
+        x_telegram_bot_api_secret_token: Optional[str] = Header(None)
+    ):
+        if not hmac.compare_digest(
+            (x_telegram_bot_api_secret_token or "").encode(), TELEGRAM_WEBHOOK_SECRET.encode()
+        ):
+            raise HTTPException(403, "Invalid webhook secret")
+        # Acknowledge at once; the bot handles the update in the background
+        if not await telegram_bot.feed_update(await request.json()):
+            # Telegram redelivers updates that were not acknowledged
+            raise HTTPException(503, "Telegram bot is not running")
+        return {"ok": True}
+
+# -----------------------------
+# LIVE DASHBOARD
+# -----------------------------
+# Browsers cannot set headers on a page load or a WebSocket handshake: the
+# page also accepts ?key=, and embeds a short-lived signed token that the
+# WebSocket must present as ?token=.
+api_key_query = APIKeyQuery(
+    name="key",
+    auto_error=False
+)
+
+def verify_dashboard_key(
+    header_key: str = Security(api_key_header),
+    query_key: str = Security(api_key_query)
+):
+    if SECRET_API_KEY not in (header_key, query_key):
+        raise HTTPException(401, "Invalid API Key")
+
+
+def _sign_dashboard_token(expires: int) -> str:
+    return hmac.new(
+        SECRET_API_KEY.encode("utf-8"),
+        f"dashboard:{expires}".encode("utf-8"),
+        hashlib.sha256
+    ).hexdigest()
+
+def issue_dashboard_token(ttl: int = DASHBOARD_TOKEN_TTL_SECONDS) -> str:
+    expires = int(time.time()) + ttl
+    return f"{expires}.{_sign_dashboard_token(expires)}"
+
+def valid_dashboard_token(token: Optional[str]) -> bool:
+    expires, _, signature = (token or "").partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, _sign_dashboard_token(int(expires)))
+
+
+@app.get("/dashboard", response_class=HTMLResponse)
+async def dashboard(api_key: str = Depends(verify_dashboard_key)):
+    return get_dashboard_html(issue_dashboard_token())
+
+
+@app.websocket("/ws/dashboard")
+async def dashboard_ws(websocket: WebSocket):
+    if not valid_dashboard_token(websocket.query_params.get("token")):
+        # Closing before accept rejects the handshake (HTTP 403)
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await dashboard_hub.serve(websocket, snapshot=dashboard_stats.snapshot())
+
+
 @app.get("/")
 async def root():
     return {
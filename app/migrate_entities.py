@@ -0,0 +1,62 @@
+"""Copy intelligence from the legacy JSON-array columns on honeypot_sessions
+into the normalized intel_entities / session_entities tables.
+
+Safe to re-run: entities and links are upserted. The legacy columns are
+left in place (SQLite cannot drop them cheaply) but are no longer written.
+"""
+import json
+
+from sqlalchemy import inspect, text
+
+from app.db import engine, Base, SessionLocal
+from app.services.intel_repository import upsert_session_entities
+
+LEGACY_COLUMNS = {
+    "upi_ids": "upiIds",
+    "bank_accounts": "bankAccounts",
+    "phishing_links": "phishingLinks",
+    "phone_numbers": "phoneNumbers",
+    "suspicious_keywords": "suspiciousKeywords",
+}
+BATCH_SIZE = 500
+
+
+def migrate_entities() -> int:
+    Base.metadata.create_all(bind=engine)
+
+    present = {c["name"] for c in inspect(engine).get_columns("honeypot_sessions")}
+    columns = [c for c in LEGACY_COLUMNS if c in present]
+    if not columns:
+        print("✅ No legacy intelligence columns found, nothing to migrate")
+        return 0
+
+    db = SessionLocal()
+    migrated = 0
+    try:
+        rows = db.execute(text(
+            f"SELECT session_id, {', '.join(columns)} FROM honeypot_sessions"
+        )).fetchall()
+
+        for row in rows:
+            intelligence = {}
+            for column, value in zip(columns, row[1:]):
+                try:
+                    intelligence[LEGACY_COLUMNS[column]] = json.loads(value or "[]")
+                except ValueError:
+                    continue
+            upsert_session_entities(db, row[0], intelligence)
+            migrated += 1
+
+            if migrated % BATCH_SIZE == 0:
+                db.commit()
+
+        db.commit()
+    finally:
+        db.close()
+
+    print(f"✅ Migrated intelligence for {migrated} sessions")
+    return migrated
+
+
+if __name__ == "__main__":
+    migrate_entities()
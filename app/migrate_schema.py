@@ -0,0 +1,84 @@
+"""Bring an existing database up to the current models.
+
+`create_all` creates missing tables but never alters existing ones; this
+adds the columns and unique indexes introduced since a table was first
+created. Safe to re-run: only missing columns and indexes are added.
+"""
+from sqlalchemy import inspect, text
+
+from app.db import engine
+
+# table -> column -> DDL type and default for rows that already exist
+ADDED_COLUMNS = {
+    "honeypot_sessions": {
+        "version": "INTEGER NOT NULL DEFAULT 0",
+    },
+    "scam_campaigns": {
+        "message_count": "INTEGER NOT NULL DEFAULT 0",
+    },
+}
+
+# (table, column) -> statement that fills a newly added column
+BACKFILLS = {
+    # Before message counts were stored, members were all there was to count
+    ("scam_campaigns", "message_count"): (
+        "UPDATE scam_campaigns SET message_count = ("
+        "SELECT COUNT(*) FROM campaign_members m "
+        "WHERE m.campaign_id = scam_campaigns.campaign_id)"
+    ),
+}
+
+# index name -> (table, unique columns); duplicate rows are removed first,
+# keeping the oldest
+ADDED_UNIQUE_INDEXES = {
+    "uq_campaign_member": ("campaign_members", ("campaign_id", "session_id")),
+}
+
+
+def upgrade_schema() -> int:
+    """Add missing columns and unique indexes; returns how many were added."""
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    added = 0
+
+    with engine.begin() as conn:
+        for table, columns in ADDED_COLUMNS.items():
+            if table not in tables:
+                continue
+            present = {c["name"] for c in inspector.get_columns(table)}
+            for column, ddl in columns.items():
+                if column not in present:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+                    if (table, column) in BACKFILLS:
+                        conn.execute(text(BACKFILLS[(table, column)]))
+                    added += 1
+
+        for name, (table, columns) in ADDED_UNIQUE_INDEXES.items():
+            if table not in tables or _has_unique(inspector, table, name, columns):
+                continue
+            column_list = ", ".join(columns)
+            conn.execute(text(
+                f"DELETE FROM {table} WHERE id NOT IN "
+                f"(SELECT MIN(id) FROM {table} GROUP BY {column_list})"
+            ))
+            conn.execute(text(f"CREATE UNIQUE INDEX {name} ON {table} ({column_list})"))
+            added += 1
+
+    if added:
+        print(f"✅ Added {added} column(s)/index(es) to existing tables")
+    return added
+
+
+def _has_unique(inspector, table: str, name: str, columns: tuple) -> bool:
+    """Whether the table already enforces uniqueness on `columns`."""
+    existing = inspector.get_unique_constraints(table) + [
+        index for index in inspector.get_indexes(table) if index.get("unique")
+    ]
+    return any(
+        item.get("name") == name or tuple(item["column_names"]) == columns
+        for item in existing
+    )
+
+
+if __name__ == "__main__":
+    upgrade_schema()
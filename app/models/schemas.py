@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, ValidationInfo, field_validator
 from typing import Optional, List
 
 # ============ GUVI API SCHEMAS ============
@@ -56,6 +56,40 @@ class SessionState(BaseModel):
     scam_detected: bool = False
     scam_type: Optional[str] = None
     agent_notes: List[str] = []
+    # IDs (see message_id) of the newest scammer messages already run
+    # through extraction; messages at or before `seen_before` (a timestamp)
+    # count as seen too, their IDs having aged out
+    seen_messages: List[str] = []
+    seen_before: int = 0
+    # Near-duplicate campaign the latest scammer message was assigned to
+    campaign_id: Optional[str] = None
+    # Rolling summary of history that aged out of the verbatim prompt window
+    summary: str = ""
+    summarized_count: int = 0
+    # Persona key chosen for this session (see persona_manager)
+    persona: Optional[str] = None
+    # honeypot_sessions.version this state was read at (SqlSessionStore)
+    version: int = 0
+
+# ============ LLM OUTPUT SCHEMAS ============
+
+class HoneypotAIResult(BaseModel):
+    """The JSON object the honeypot prompt asks the model for."""
+    is_scam: bool = True
+    scam_type: Optional[str] = "unknown"
+    confidence: float = 0.0
+    reply: str = Field(..., min_length=1)
+    suspicious_keywords: Optional[List[str]] = []
+    reasoning: Optional[str] = ""
+
+    @field_validator("scam_type", "suspicious_keywords", "reasoning", mode="before")
+    @classmethod
+    def null_as_default(cls, value, info: ValidationInfo):
+        # Models often send null for fields that do not apply (e.g. the
+        # scam_type of a non-scam turn); that is not a malformed reply
+        if value is None:
+            return cls.model_fields[info.field_name].get_default(call_default_factory=True)
+        return value
 
 # ============ BASIC ANALYSIS SCHEMAS ============
 
@@ -65,7 +99,7 @@ class MessageRequest(BaseModel):
 class AnalysisResponse(BaseModel):
     is_scam: bool
     confidence: int
-    scam_type: Optional[str]
+    scam_type: Optional[str] = None
     red_flags: List[str]
     explanation: str
     advice: str
\ No newline at end of file
@@ -3,6 +3,7 @@ import requests
 from datetime import datetime
 from app.db import SessionLocal
 from app.db_models import HoneypotSession
+from app.services.intel_repository import get_session_intelligence
 
 def report_to_cybercrime(session_id: str):
     """
@@ -15,14 +16,15 @@ def report_to_cybercrime(session_id: str):
     if not session or not session.scam_detected:
         return False
     
+    intel = get_session_intelligence(db, session_id)
     report_data = {
         "incident_type": "Financial Fraud",
         "platform": "WhatsApp/Telegram",
         "date_time": session.created_at.isoformat(),
         "evidence": {
-            "upi_ids": json.loads(session.upi_ids),
-            "phone_numbers": json.loads(session.phone_numbers),
-            "phishing_links": json.loads(session.phishing_links),
+            "upi_ids": intel["upiIds"],
+            "phone_numbers": intel["phoneNumbers"],
+            "phishing_links": intel["phishingLinks"],
             "total_messages": session.total_messages
         },
         "description": session.agent_notes,
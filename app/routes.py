@@ -1,4 +1,5 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from app.models.schemas import (
     HoneypotRequest, 
     HoneypotResponse,
@@ -6,25 +7,106 @@ from app.models.schemas import (
     AnalysisResponse
 )
 from app.services.honeypot_agent import (
-    process_honeypot_request,
+    process_honeypot_request_async,
+    stream_honeypot_request,
     get_session_state,
     reset_session
 )
-from app.services.ai_service import analyze_message
+from app.services.ai_service import analyze_message_async
+from app.services.batch_service import process_batch, parse_ndjson, iter_list
+from app.services import llm_gateway
+from app.services.llm_router import llm_router
+from app.services.analysis_cache import analysis_cache
+from app.services.campaign_index import campaign_index
+from app.services.intel_index import intel_index
+from app.agents.url_intelligence import reputation_cache
+from app.db import db_writer
+from app.services.callback_service import callback_dispatcher
+from app.utils.email_reporter import scam_reporter
+from app.utils.llm_json import LLMOutputError
 import json
 
 router = APIRouter()
 
+@router.on_event("startup")
+def load_intel_index():
+    intel_index.load()
+
+@router.on_event("shutdown")
+async def close_llm_gateway():
+    await llm_gateway.aclose()
+
+@router.on_event("shutdown")
+def drain_callbacks():
+    callback_dispatcher.stop()
+
+@router.on_event("shutdown")
+def flush_scam_reports():
+    scam_reporter.stop()
+
+@router.on_event("shutdown")
+def flush_db_writes():
+    db_writer.stop()
+
 @router.post("/honeypot", response_model=HoneypotResponse)
-def honeypot_endpoint(request: HoneypotRequest):
+async def honeypot_endpoint(request: HoneypotRequest):
     """
     Main Honeypot API Endpoint (GUVI Format)
     
     Accepts scam messages and returns AI agent responses.
     """
-    result = process_honeypot_request(request)
+    result = await process_honeypot_request_async(request)
     return result
 
+@router.post("/honeypot/stream")
+async def honeypot_stream_endpoint(request: HoneypotRequest):
+    """
+    Streaming Honeypot Endpoint (Server-Sent Events)
+    
+    Emits `reply` events with text deltas as the model generates them,
+    then a `done` event carrying the same body as /honeypot.
+    """
+    async def events():
+        async for event, data in stream_honeypot_request(request):
+            body = {"delta": data} if event == "reply" else data
+            yield f"event: {event}\ndata: {json.dumps(body, ensure_ascii=False)}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/honeypot/batch")
+async def honeypot_batch_endpoint(request: Request):
+    """
+    Bulk Honeypot Ingestion
+    
+    Accepts a JSON array of HoneypotRequest objects, or NDJSON (one per
+    line, Content-Type: application/x-ndjson), decoded a chunk at a time.
+    Responds with NDJSON, one result per item in completion order, each
+    tagged with the item's `index`.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        # Read up front: the streaming response's disconnect listener
+        # would otherwise compete with us for the request body
+        items = parse_ndjson(await request.body())
+    else:
+        try:
+            body = await request.json()
+        except ValueError:
+            raise HTTPException(400, "Body must be a JSON array or NDJSON")
+        if not isinstance(body, list):
+            raise HTTPException(400, "Body must be a JSON array or NDJSON")
+        items = iter_list(body)
+    
+    async def results():
+        async for result in process_batch(items):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 @router.get("/session/{session_id}")
 def get_session(session_id: str):
     """Get current session state (for debugging)."""
@@ -36,10 +118,79 @@ def delete_session(session_id: str):
     return reset_session(session_id)
 
 @router.post("/analyze", response_model=AnalysisResponse)
-def analyze_scam(request: MessageRequest):
+async def analyze_scam(request: MessageRequest):
     """Basic scam analysis (non-honeypot)."""
-    result = analyze_message(request.message)
-    return json.loads(result)
+    try:
+        result = await analyze_message_async(request.message)
+    except LLMOutputError:
+        raise HTTPException(502, "Model returned an unusable analysis")
+    return AnalysisResponse.parse_raw(result)
+
+@router.get("/llm/endpoints")
+def llm_endpoint_stats():
+    """Breaker state and latency of each LLM router endpoint."""
+    return llm_router.stats()
+
+@router.get("/analyze/cache")
+def analyze_cache_stats():
+    """Hit/miss counters for the /analyze response cache."""
+    return analysis_cache.stats()
+
+@router.get("/campaigns")
+def list_campaigns():
+    """Near-duplicate scam campaigns, largest first."""
+    return campaign_index.list_campaigns()
+
+@router.get("/campaigns/{campaign_id}")
+def get_campaign(campaign_id: str):
+    """A campaign's sample text and member sessions."""
+    campaign = campaign_index.get_campaign(campaign_id)
+    if campaign is None:
+        raise HTTPException(404, "Campaign not found")
+    return campaign
+
+@router.get("/intel/upi/{handle}")
+def lookup_upi(handle: str, limit: int = 100):
+    """Sessions in which a UPI handle was seen."""
+    return intel_index.lookup_upi(handle, limit)
+
+@router.get("/intel/psp/{suffix}")
+def lookup_psp(suffix: str, limit: int = 100):
+    """UPI handles seen on a PSP (e.g. ybl, paytm)."""
+    return intel_index.lookup_psp(suffix, limit)
+
+@router.get("/intel/phone/{number}")
+def lookup_phone(number: str, limit: int = 100):
+    """Sessions in which a phone number was seen (any format, matched as E.164)."""
+    return intel_index.lookup_phone(number, limit)
+
+@router.get("/intel/domain/{domain:path}")
+def lookup_domain(domain: str, limit: int = 100):
+    """Sessions and phishing URLs under a registered domain (host or full URL)."""
+    return intel_index.lookup_domain(domain, limit)
+
+@router.get("/intel/bank/{account}")
+def lookup_bank_account(account: str, limit: int = 100):
+    """Sessions in which a bank account number was seen."""
+    return intel_index.lookup_account(account, limit)
+
+@router.get("/intel/stats")
+def intel_index_stats():
+    """Number of distinct keys in each intel index."""
+    return intel_index.stats()
+
+@router.get("/intel/reputation/stats")
+def reputation_cache_stats():
+    """Size and hit rate of the domain reputation cache."""
+    return reputation_cache.stats()
+
+@router.get("/intel/reputation/{value:path}")
+def lookup_reputation(value: str):
+    """Offline reputation of the domain behind a URL or host (lookalike, shortener, punycode...)."""
+    reputation = reputation_cache.check(value)
+    if reputation is None:
+        raise HTTPException(400, "Not a URL or host")
+    return reputation.to_dict()
 
 @router.get("/health")
 def health_check():
@@ -1,7 +1,9 @@
-from groq import Groq
-from app.config import GROQ_API_KEY, MODEL_NAME
-
-client = Groq(api_key=GROQ_API_KEY)
+import json
+from app.agents import scam_detector
+from app.models.schemas import AnalysisResponse
+from app.services import llm_gateway
+from app.services.analysis_cache import analysis_cache
+from app.utils.llm_json import parse_llm_output
 
 SYSTEM_PROMPT = """You are a scam detection expert. Analyze messages for scam indicators.
 
@@ -26,16 +28,60 @@ Respond in this JSON format only:
     "advice": "what the user should do"
 }"""
 
+def build_messages(message: str) -> list:
+    """Build the chat messages for a scam analysis request."""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Analyze this message:\n\n{message}"}
+    ]
+
+def fast_path_analysis(message: str):
+    """Rule-based analysis JSON when the pre-classifier is confident, else None."""
+    verdict = scam_detector.classify(message)
+    if verdict.is_scam is None:
+        return None
+    return json.dumps(scam_detector.verdict_to_analysis(verdict))
+
+def parse_analysis(result_text: str) -> AnalysisResponse:
+    """Validate the model's analysis; LLMOutputError if it is unusable."""
+    return parse_llm_output(result_text, AnalysisResponse, "analysis")
+
+def normalize_analysis(result_text: str) -> str:
+    """The model's analysis as plain AnalysisResponse JSON.
+    
+    Raises LLMOutputError if it cannot be parsed, so nothing gets cached.
+    """
+    return json.dumps(parse_analysis(result_text).dict())
+
 def analyze_message(message: str) -> dict:
     """Analyze a message for scam indicators."""
     
-    response = client.chat.completions.create(
-        model=MODEL_NAME,
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": f"Analyze this message:\n\n{message}"}
-        ],
-        temperature=0.1
+    fast_result = fast_path_analysis(message)
+    if fast_result is not None:
+        return fast_result
+    
+    cached = analysis_cache.get(message)
+    if cached is not None:
+        return cached
+    
+    result = normalize_analysis(
+        llm_gateway.chat_completion_sync(build_messages(message), temperature=0.1)
     )
+    analysis_cache.put(message, result)
+    return result
+
+async def analyze_message_async(message: str) -> str:
+    """Analyze a message for scam indicators without blocking a worker thread."""
+    fast_result = fast_path_analysis(message)
+    if fast_result is not None:
+        return fast_result
     
-    return response.choices[0].message.content
\ No newline at end of file
+    cached = await analysis_cache.get_async(message)
+    if cached is not None:
+        return cached
+    
+    result = normalize_analysis(
+        await llm_gateway.chat_completion(build_messages(message), temperature=0.1)
+    )
+    await analysis_cache.put_async(message, result)
+    return result
\ No newline at end of file
@@ -0,0 +1,192 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.config import (
+    ANALYSIS_CACHE_SIZE,
+    ANALYSIS_CACHE_TTL_SECONDS,
+    ANALYSIS_CACHE_DB
+)
+from app.db import run_in_db
+
+URL_PATTERN = re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE)
+NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)*")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+# SQLite writes between prunes of expired and over-capacity rows
+PRUNE_EVERY_WRITES = 100
+
+
+def normalize_message(text: str) -> str:
+    """Fold case and whitespace and template URLs and numbers.
+
+    Campaign copies that differ only in the link, amount, phone number or
+    spacing normalize to the same string.
+    """
+    text = URL_PATTERN.sub("<url>", text.casefold())
+    text = NUMBER_PATTERN.sub("<num>", text)
+    return WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+def cache_key(text: str) -> str:
+    return hashlib.sha256(normalize_message(text).encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """Content-addressed LRU/TTL cache of analysis results.
+
+    Values are the raw JSON strings returned by the analyzer. When `db_path`
+    is set, entries are also written through to a SQLite table so a
+    restarted process starts warm; the table is pruned to the same TTL and
+    `max_entries` (newest kept) at startup and every PRUNE_EVERY_WRITES
+    writes. The async methods do their SQLite I/O on the DB executor; the
+    in-memory LRU is only ever touched under `_lock`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = ANALYSIS_CACHE_SIZE,
+        ttl: float = ANALYSIS_CACHE_TTL_SECONDS,
+        db_path: str = ANALYSIS_CACHE_DB
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # key -> (value, stored_at wall-clock time)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Serializes use of the SQLite connection, separately from `_lock`
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._writes_since_prune = 0
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS ix_analysis_cache_stored_at ON analysis_cache (stored_at)"
+            )
+            self._db.commit()
+            self._prune()
+
+    def get(self, text: str) -> Optional[str]:
+        key = cache_key(text)
+        entry = self._memory_entry(key)
+        if entry is None and self._db is not None:
+            entry = self._load(key)
+
+        value, expired = self._check(key, entry)
+        if expired and self._db is not None:
+            self._delete(key)
+        return value
+
+    async def get_async(self, text: str) -> Optional[str]:
+        """`get` with the SQLite read and delete run off the event loop."""
+        key = cache_key(text)
+        entry = self._memory_entry(key)
+        if entry is None and self._db is not None:
+            entry = await run_in_db(self._load, key)
+
+        value, expired = self._check(key, entry)
+        if expired and self._db is not None:
+            await run_in_db(self._delete, key)
+        return value
+
+    def put(self, text: str, value: str) -> None:
+        key = cache_key(text)
+        now = time.time()
+        self._insert(key, (value, now))
+        if self._db is not None:
+            self._write(key, value, now)
+
+    async def put_async(self, text: str, value: str) -> None:
+        """`put` with the SQLite write run off the event loop."""
+        key = cache_key(text)
+        now = time.time()
+        self._insert(key, (value, now))
+        if self._db is not None:
+            await run_in_db(self._write, key, value, now)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def _memory_entry(self, key: str) -> Optional[tuple]:
+        with self._lock:
+            return self._entries.get(key)
+
+    def _insert(self, key: str, entry: tuple) -> None:
+        """Add or refresh an in-memory entry, evicting past `max_entries`."""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _check(self, key: str, entry: Optional[tuple]) -> Tuple[Optional[str], bool]:
+        """Count the lookup; returns (value or None, whether it had expired)."""
+        expired = entry is not None and time.time() - entry[1] > self.ttl
+        if entry is None or expired:
+            with self._lock:
+                if expired:
+                    self._entries.pop(key, None)
+                self.misses += 1
+            return None, expired
+
+        self._insert(key, entry)
+        with self._lock:
+            self.hits += 1
+        return entry[0], False
+
+    def _load(self, key: str) -> Optional[tuple]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, stored_at FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+        return (row[0], row[1]) if row is not None else None
+
+    def _write(self, key: str, value: str, stored_at: float) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, value, stored_at)
+            )
+            self._db.commit()
+            self._writes_since_prune += 1
+            if self._writes_since_prune < PRUNE_EVERY_WRITES:
+                return
+        self._prune()
+
+    def _prune(self) -> None:
+        """Delete expired rows, then all but the `max_entries` newest."""
+        with self._db_lock:
+            self._writes_since_prune = 0
+            self._db.execute(
+                "DELETE FROM analysis_cache WHERE stored_at < ?", (time.time() - self.ttl,)
+            )
+            self._db.execute(
+                "DELETE FROM analysis_cache WHERE key IN "
+                "(SELECT key FROM analysis_cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._db.commit()
+
+    def _delete(self, key: str) -> None:
+        with self._db_lock:
+            self._db.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+            self._db.commit()
+
+
+analysis_cache = AnalysisCache()
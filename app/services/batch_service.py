@@ -0,0 +1,135 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.config import BATCH_CHUNK_SIZE, BATCH_CONCURRENCY
+from app.db import db_writer, run_in_db
+from app.models.schemas import HoneypotRequest
+from app.services.honeypot_agent import process_honeypot_request_async
+from app.services.session_store import session_batch
+
+
+async def parse_ndjson(body: bytes) -> AsyncIterator[Optional[dict]]:
+    """Decode one JSON object per line, lazily (None for bad lines)."""
+    for line in body.splitlines():
+        if line.strip():
+            yield _loads(line)
+
+
+def _loads(line: bytes) -> Optional[dict]:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+async def iter_list(items: List) -> AsyncIterator:
+    for item in items:
+        yield item
+
+
+async def iter_chunks(items: AsyncIterator, size: int) -> AsyncIterator[List[Tuple[int, object]]]:
+    """Number the items and group them into lists of `size`."""
+    chunk: List[Tuple[int, object]] = []
+    index = 0
+    async for item in items:
+        chunk.append((index, item))
+        index += 1
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def process_item(index: int, request: HoneypotRequest) -> dict:
+    try:
+        result = await process_honeypot_request_async(request)
+    except Exception as e:
+        return {"index": index, "sessionId": request.sessionId, "status": "error", "error": str(e)}
+    return {"index": index, "sessionId": request.sessionId, **result}
+
+
+async def process_session(
+    items: List[Tuple[int, HoneypotRequest]],
+    semaphore: asyncio.Semaphore,
+    results: asyncio.Queue
+) -> None:
+    """Run one session's items in their original order."""
+    async with semaphore:
+        for index, request in items:
+            await results.put(await process_item(index, request))
+
+
+@asynccontextmanager
+async def bookkeeping_flushed():
+    """On exit, wait until the queued bookkeeping writes are committed.
+
+    Campaign, entity and callback writes go through the shared write-behind
+    queue, which commits them in batches of its own (separate from the
+    chunk's session transaction); this makes a chunk end only once they
+    are in the database.
+    """
+    try:
+        yield
+    finally:
+        await run_in_db(db_writer.flush)
+
+
+async def process_chunk(chunk: List[Tuple[int, object]], concurrency: int) -> AsyncIterator[dict]:
+    """Process one chunk, yielding results as they complete.
+
+    Items are grouped by sessionId so each session sees its messages in
+    order; up to `concurrency` sessions run at once. The chunk's session
+    writes are committed together when the chunk finishes, and the chunk
+    waits for its queued bookkeeping writes before it ends.
+    """
+    sessions: Dict[str, List[Tuple[int, HoneypotRequest]]] = {}
+    for index, raw in chunk:
+        if raw is None:
+            yield {"index": index, "status": "error", "error": "Invalid JSON"}
+            continue
+        try:
+            request = HoneypotRequest.parse_obj(raw)
+        except ValidationError as e:
+            yield {"index": index, "status": "error", "error": str(e)}
+            continue
+        sessions.setdefault(request.sessionId, []).append((index, request))
+
+    if not sessions:
+        return
+
+    semaphore = asyncio.Semaphore(concurrency)
+    results: asyncio.Queue = asyncio.Queue()
+    async with session_batch(), bookkeeping_flushed():
+        tasks = [
+            asyncio.create_task(process_session(items, semaphore, results))
+            for items in sessions.values()
+        ]
+        remaining = sum(len(items) for items in sessions.values())
+        try:
+            while remaining:
+                yield await results.get()
+                remaining -= 1
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+async def process_batch(
+    items: AsyncIterator,
+    chunk_size: int = BATCH_CHUNK_SIZE,
+    concurrency: int = BATCH_CONCURRENCY
+) -> AsyncIterator[dict]:
+    """Per-item results for a stream of raw honeypot requests.
+
+    Chunks run one after another, so a session's messages keep their order
+    across chunk boundaries; results within a chunk arrive in completion
+    order and carry the item's `index`.
+    """
+    async for chunk in iter_chunks(items, chunk_size):
+        async for result in process_chunk(chunk, concurrency):
+            yield result
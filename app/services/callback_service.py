@@ -1,17 +1,44 @@
+import hashlib
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Dict, Optional
+
 import requests
-from app.config import GUVI_CALLBACK_URL
+from requests.adapters import HTTPAdapter
+
+from app.config import (
+    GUVI_CALLBACK_URL,
+    CALLBACK_QUEUE_SIZE,
+    CALLBACK_MAX_RETRIES,
+    CALLBACK_BACKOFF_SECONDS,
+    CALLBACK_TIMEOUT_SECONDS
+)
+from app.db import db_writer
+from app.db_models import HoneypotSession
 from app.models.schemas import ExtractedIntelligence
+from app.services.intel_repository import upsert_session_entities
+from app.utils import metrics
 
-def send_guvi_callback(
+# One pooled HTTP session for every callback
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+http_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+http_session.headers.update({"Content-Type": "application/json"})
+
+
+def build_callback_payload(
     session_id: str,
     scam_detected: bool,
     total_messages: int,
     intelligence: ExtractedIntelligence,
     agent_notes: str
 ) -> dict:
-    """Send final results to GUVI evaluation endpoint."""
-    
-    payload = {
+    """Build the GUVI final-result payload."""
+    return {
         "sessionId": session_id,
         "scamDetected": scam_detected,
         "totalMessagesExchanged": total_messages,
@@ -24,20 +51,222 @@ def send_guvi_callback(
         },
         "agentNotes": agent_notes
     }
-    
+
+
+def post_callback(payload: dict) -> dict:
+    """POST one payload to GUVI and report the outcome."""
     print(f"📤 Sending callback to GUVI: {payload}")
-    
+
     try:
-        response = requests.post(
-            GUVI_CALLBACK_URL,
-            json=payload,
-            timeout=10,
-            headers={"Content-Type": "application/json"}
-        )
-        
+        with metrics.stage("callback"):
+            response = http_session.post(
+                GUVI_CALLBACK_URL,
+                json=payload,
+                timeout=CALLBACK_TIMEOUT_SECONDS
+            )
+
         print(f"✅ Callback response: {response.status_code}")
+        metrics.CALLBACK_RESULTS.inc(1, f"{response.status_code // 100}xx")
         return {"status": "sent", "response_code": response.status_code}
-        
+
     except requests.exceptions.RequestException as e:
         print(f"❌ Callback failed: {e}")
-        return {"status": "failed", "error": str(e)}
\ No newline at end of file
+        metrics.CALLBACK_RESULTS.inc(1, "error")
+        return {"status": "failed", "error": str(e)}
+
+
+def send_guvi_callback(
+    session_id: str,
+    scam_detected: bool,
+    total_messages: int,
+    intelligence: ExtractedIntelligence,
+    agent_notes: str
+) -> dict:
+    """Send final results to GUVI evaluation endpoint (blocking)."""
+    return post_callback(build_callback_payload(
+        session_id, scam_detected, total_messages, intelligence, agent_notes
+    ))
+
+
+def queue_guvi_callback(
+    session_id: str,
+    scam_detected: bool,
+    total_messages: int,
+    intelligence: ExtractedIntelligence,
+    agent_notes: str
+) -> bool:
+    """Hand final results to the background dispatcher (non-blocking)."""
+    return callback_dispatcher.submit(build_callback_payload(
+        session_id, scam_detected, total_messages, intelligence, agent_notes
+    ))
+
+
+def mark_callback_sent(payload: dict) -> None:
+    """Queue recording a delivered callback on the session's HoneypotSession row."""
+    db_writer.submit(partial(_record_callback_sent, payload=payload))
+
+
+def _record_callback_sent(db, payload: dict) -> None:
+    """Runs on the write-behind thread, batched with other bookkeeping writes."""
+    session = db.query(HoneypotSession).filter_by(
+        session_id=payload["sessionId"]
+    ).first()
+
+    if not session:
+        session = HoneypotSession(
+            session_id=payload["sessionId"],
+            scam_detected=payload["scamDetected"],
+            total_messages=payload["totalMessagesExchanged"],
+            agent_notes=payload["agentNotes"]
+        )
+        db.add(session)
+        upsert_session_entities(db, payload["sessionId"], payload["extractedIntelligence"])
+
+    session.callback_sent = True
+
+
+# =====================================================
+# 📮 Background Dispatcher
+# =====================================================
+
+class CallbackDispatcher:
+    """Deliver GUVI callbacks from a background thread.
+
+    Only the latest payload per sessionId is kept while it waits in the
+    queue, payloads that add nothing over the last delivered one are
+    skipped, and failed posts are retried with exponential backoff. A
+    retry is abandoned as soon as a newer payload for the same session
+    is queued.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = CALLBACK_QUEUE_SIZE,
+        max_retries: int = CALLBACK_MAX_RETRIES,
+        backoff: float = CALLBACK_BACKOFF_SECONDS,
+        sender=post_callback,
+        on_delivered=mark_callback_sent
+    ):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.sender = sender
+        self.on_delivered = on_delivered
+        self.stats = {"queued": 0, "coalesced": 0, "skipped": 0, "dropped": 0, "sent": 0, "failed": 0}
+
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=max_queue)
+        self._pending: Dict[str, dict] = {}
+        # session_id -> digest of the last delivered payload (bounded)
+        self._delivered: "OrderedDict[str, str]" = OrderedDict()
+        self._max_delivered = max_queue * 10
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, payload: dict) -> bool:
+        """Queue a payload; returns False if it was dropped or unchanged."""
+        session_id = payload["sessionId"]
+        digest = _payload_digest(payload)
+
+        with self._lock:
+            if session_id in self._pending:
+                self._pending[session_id] = payload
+                self.stats["coalesced"] += 1
+                return True
+
+            if self._delivered.get(session_id) == digest:
+                self.stats["skipped"] += 1
+                return False
+
+            try:
+                self._queue.put_nowait(session_id)
+            except queue.Full:
+                self.stats["dropped"] += 1
+                print(f"❌ Callback queue full, dropping session {session_id}")
+                return False
+
+            self._pending[session_id] = payload
+            self.stats["queued"] += 1
+            self._ensure_worker()
+            return True
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Let the worker drain the queue, then stop it."""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="guvi-callback", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            session_id = self._queue.get()
+            if session_id is None:
+                return
+
+            with self._lock:
+                payload = self._pending.pop(session_id, None)
+            if payload is not None:
+                self._deliver(payload)
+
+    def _deliver(self, payload: dict) -> None:
+        session_id = payload["sessionId"]
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+                with self._lock:
+                    if session_id in self._pending:
+                        # A newer payload supersedes this one
+                        return
+
+            result = self.sender(payload)
+            code = result.get("response_code") or 0
+            if 400 <= code < 500:
+                # Rejected by GUVI; retrying the same payload will not help
+                break
+            if 200 <= code < 300:
+                with self._lock:
+                    self._delivered[session_id] = _payload_digest(payload)
+                    self._delivered.move_to_end(session_id)
+                    while len(self._delivered) > self._max_delivered:
+                        self._delivered.popitem(last=False)
+                self.stats["sent"] += 1
+                self.on_delivered(payload)
+                return
+
+        self.stats["failed"] += 1
+
+
+def _payload_digest(payload: dict) -> str:
+    """Digest of the fields that make a callback worth re-sending.
+
+    Message counts and notes change every turn; a new callback is only
+    sent when the detection verdict or the extracted intelligence changes.
+    Intelligence lists are sorted first: they are built from sets, so the
+    same intel can arrive in any order.
+    """
+    material = {
+        "scamDetected": payload["scamDetected"],
+        "extractedIntelligence": {
+            field: sorted(values)
+            for field, values in payload["extractedIntelligence"].items()
+        }
+    }
+    return hashlib.sha1(
+        json.dumps(material, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+callback_dispatcher = CallbackDispatcher()
@@ -0,0 +1,316 @@
+import hashlib
+import json
+import random
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from app.config import (
+    CAMPAIGN_NUM_PERM,
+    CAMPAIGN_BANDS,
+    CAMPAIGN_SIMILARITY,
+    CAMPAIGN_MAX_CAMPAIGNS,
+    CAMPAIGN_MAX_BUCKETS,
+    CAMPAIGN_MAX_MEMBERS
+)
+from app.db import SessionLocal, WriteBehind, db_writer
+from app.db_models import ScamCampaign, CampaignMember
+from app.services.analysis_cache import normalize_message
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+SHINGLE_SIZE = 3
+# Wait before retrying a failed load from the DB
+LOAD_RETRY_SECONDS = 30.0
+
+# Fixed seed so signatures stay comparable across processes and restarts
+_rng = random.Random(1337)
+PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME))
+    for _ in range(CAMPAIGN_NUM_PERM)
+]
+
+
+def shingles(text: str) -> set:
+    """Hashed word 3-grams of the normalized text."""
+    words = normalize_message(text).split()
+    if len(words) < SHINGLE_SIZE:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))}
+    return {
+        zlib.crc32(" ".join(words[i:i + SHINGLE_SIZE]).encode("utf-8"))
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def minhash(text: str) -> Tuple[int, ...]:
+    """MinHash signature of the text's shingle set."""
+    hashes = shingles(text)
+    return tuple(
+        min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in hashes)
+        for a, b in PERMUTATIONS
+    )
+
+
+def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+
+class CampaignIndex:
+    """Assign near-duplicate scam texts to campaigns with MinHash + LSH.
+
+    Each signature is split into bands; texts that share any band bucket
+    are candidates, and a candidate campaign is joined when the estimated
+    Jaccard similarity to its representative signature reaches the
+    threshold. A new campaign's first message is its representative.
+
+    The in-memory index is bounded: the least recently active campaigns
+    are evicted past `max_campaigns` (with their bucket keys), a campaign
+    keeps at most `max_buckets` bucket keys and its `max_members` most
+    recent members. New campaigns, members and message counts are written
+    through `writer` in the background; the DB keeps every member.
+    """
+
+    def __init__(
+        self,
+        bands: int = CAMPAIGN_BANDS,
+        threshold: float = CAMPAIGN_SIMILARITY,
+        max_campaigns: int = CAMPAIGN_MAX_CAMPAIGNS,
+        max_buckets: int = CAMPAIGN_MAX_BUCKETS,
+        max_members: int = CAMPAIGN_MAX_MEMBERS,
+        writer: WriteBehind = db_writer
+    ):
+        self.bands = bands
+        self.rows = CAMPAIGN_NUM_PERM // bands
+        self.threshold = threshold
+        self.max_campaigns = max_campaigns
+        self.max_buckets = max_buckets
+        self.max_members = max_members
+        self.writer = writer
+        self._buckets: Dict[tuple, str] = {}
+        # campaign -> signature, least recently active first
+        self._signatures: "OrderedDict[str, Tuple[int, ...]]" = OrderedDict()
+        self._bucket_keys: Dict[str, List[tuple]] = {}
+        # campaign -> {session_id: message_hash}, most recent members last
+        self._members: Dict[str, "OrderedDict[str, str]"] = {}
+        self._samples: Dict[str, str] = {}
+        self._message_counts: Dict[str, int] = {}
+        self._session_counts: Dict[str, int] = {}
+        # Not yet written: new campaigns, new members, message count deltas
+        self._unsaved_campaigns: List[tuple] = []
+        self._unsaved_members: List[tuple] = []
+        self._unsaved_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._retry_load_at = 0.0
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[tuple]:
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+    def assign(self, text: str, session_id: str) -> str:
+        """Return the campaign ID for a message, creating one if needed."""
+        self.load()
+        signature = minhash(text)
+        band_keys = self._band_keys(signature)
+
+        with self._lock:
+            candidates = {self._buckets[key] for key in band_keys if key in self._buckets}
+            campaign_id = None
+            best = self.threshold
+            for candidate in candidates:
+                score = similarity(signature, self._signatures[candidate])
+                if score >= best:
+                    campaign_id, best = candidate, score
+
+            if campaign_id is None:
+                campaign_id = "cmp-" + hashlib.sha1(
+                    json.dumps(signature).encode("utf-8")
+                ).hexdigest()[:12]
+                self._add_campaign(campaign_id, signature, text[:500], 0, 0)
+                self._unsaved_campaigns.append((campaign_id, json.dumps(signature), text[:500]))
+            self._signatures.move_to_end(campaign_id)
+
+            # Variants widen the campaign's buckets as the script drifts
+            keys = self._bucket_keys[campaign_id]
+            for key in band_keys:
+                if len(keys) >= self.max_buckets:
+                    break
+                if key not in self._buckets:
+                    self._buckets[key] = campaign_id
+                    keys.append(key)
+
+            self._message_counts[campaign_id] += 1
+            self._unsaved_counts[campaign_id] = self._unsaved_counts.get(campaign_id, 0) + 1
+            members = self._members[campaign_id]
+            if session_id in members:
+                members.move_to_end(session_id)
+            else:
+                message_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()
+                self._add_member(campaign_id, session_id, message_hash)
+                self._session_counts[campaign_id] += 1
+                self._unsaved_members.append((campaign_id, session_id, message_hash))
+
+            self._evict()
+
+        self.writer.submit(self._save, key=id(self))
+        return campaign_id
+
+    def list_campaigns(self) -> List[dict]:
+        self.load()
+        with self._lock:
+            campaigns = [
+                {
+                    "campaignId": campaign_id,
+                    "sessions": self._session_counts[campaign_id],
+                    "messages": self._message_counts[campaign_id],
+                    "sample": self._samples[campaign_id]
+                }
+                for campaign_id in self._signatures
+            ]
+        return sorted(campaigns, key=lambda c: c["sessions"], reverse=True)
+
+    def get_campaign(self, campaign_id: str) -> Optional[dict]:
+        self.load()
+        with self._lock:
+            if campaign_id not in self._signatures:
+                return None
+            return {
+                "campaignId": campaign_id,
+                "sample": self._samples[campaign_id],
+                "messages": self._message_counts[campaign_id],
+                "sessions": self._session_counts[campaign_id],
+                "members": [
+                    {"sessionId": session_id, "messageHash": message_hash}
+                    for session_id, message_hash in self._members[campaign_id].items()
+                ]
+            }
+
+    def _add_campaign(
+        self, campaign_id: str, signature: Tuple[int, ...], sample: str,
+        message_count: int, session_count: int
+    ) -> None:
+        self._signatures[campaign_id] = signature
+        self._samples[campaign_id] = sample
+        self._members[campaign_id] = OrderedDict()
+        self._message_counts[campaign_id] = message_count
+        self._session_counts[campaign_id] = session_count
+        keys = self._bucket_keys[campaign_id] = []
+        for key in self._band_keys(signature):
+            if key not in self._buckets:
+                self._buckets[key] = campaign_id
+                keys.append(key)
+
+    def _add_member(self, campaign_id: str, session_id: str, message_hash: str) -> None:
+        members = self._members[campaign_id]
+        members[session_id] = message_hash
+        while len(members) > self.max_members:
+            members.popitem(last=False)
+
+    def _evict(self) -> None:
+        """Drop the least recently active campaigns past `max_campaigns`."""
+        while len(self._signatures) > self.max_campaigns:
+            campaign_id, _ = self._signatures.popitem(last=False)
+            for key in self._bucket_keys.pop(campaign_id):
+                del self._buckets[key]
+            del self._members[campaign_id]
+            del self._samples[campaign_id]
+            del self._message_counts[campaign_id]
+            del self._session_counts[campaign_id]
+
+    # =============================
+    # 🗄 Persistence
+    # =============================
+
+    def load(self) -> None:
+        """Rebuild the in-memory index from the DB (once per process)."""
+        if self._loaded or time.monotonic() < self._retry_load_at:
+            return
+        with self._lock:
+            if self._loaded or time.monotonic() < self._retry_load_at:
+                return
+
+            db = SessionLocal()
+            try:
+                session_counts = dict(
+                    db.query(CampaignMember.campaign_id, func.count(CampaignMember.id))
+                    .group_by(CampaignMember.campaign_id)
+                    .all()
+                )
+                recent = (
+                    db.query(ScamCampaign)
+                    .order_by(ScamCampaign.id.desc())
+                    .limit(self.max_campaigns)
+                    .all()
+                )
+                for campaign in reversed(recent):
+                    if campaign.campaign_id in self._signatures:
+                        # Created here while an earlier load was failing
+                        continue
+                    signature = tuple(json.loads(campaign.signature))
+                    if len(signature) != CAMPAIGN_NUM_PERM:
+                        continue
+                    self._add_campaign(
+                        campaign.campaign_id,
+                        signature,
+                        campaign.sample_text or "",
+                        campaign.message_count or 0,
+                        session_counts.get(campaign.campaign_id, 0)
+                    )
+
+                members = db.query(CampaignMember).order_by(CampaignMember.id).yield_per(1000)
+                for member in members:
+                    if member.campaign_id in self._members:
+                        self._add_member(member.campaign_id, member.session_id, member.message_hash)
+                self._loaded = True
+            except Exception as e:
+                self._retry_load_at = time.monotonic() + LOAD_RETRY_SECONDS
+                print(f"Campaign index load error: {e}")
+            finally:
+                db.close()
+
+    def _save(self, db) -> None:
+        """Write buffered campaigns, members and counts (on the write-behind thread)."""
+        with self._lock:
+            campaigns, self._unsaved_campaigns = self._unsaved_campaigns, []
+            members, self._unsaved_members = self._unsaved_members, []
+            counts, self._unsaved_counts = self._unsaved_counts, {}
+
+        for campaign_id, signature, sample in campaigns:
+            _insert_once(db, ScamCampaign(
+                campaign_id=campaign_id,
+                signature=signature,
+                sample_text=sample
+            ))
+        for campaign_id, session_id, message_hash in members:
+            _insert_once(db, CampaignMember(
+                campaign_id=campaign_id,
+                session_id=session_id,
+                message_hash=message_hash,
+                created_at=datetime.utcnow()
+            ))
+        for campaign_id, count in counts.items():
+            db.query(ScamCampaign).filter_by(campaign_id=campaign_id).update(
+                {ScamCampaign.message_count: ScamCampaign.message_count + count},
+                synchronize_session=False
+            )
+
+
+def _insert_once(db, row) -> None:
+    """Insert a row, ignoring it if a unique constraint says it exists."""
+    try:
+        with db.begin_nested():
+            db.add(row)
+    except IntegrityError:
+        pass
+
+
+campaign_index = CampaignIndex()
@@ -0,0 +1,119 @@
+import asyncio
+import json
+from collections import deque
+from typing import Dict, Optional, Set
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from app.config import (
+    DASHBOARD_CLIENT_QUEUE,
+    DASHBOARD_HEARTBEAT_SECONDS,
+    DASHBOARD_SEND_TIMEOUT_SECONDS
+)
+
+HEARTBEAT = json.dumps({"type": "ping"})
+
+
+class DashboardClient:
+    """One connected dashboard and its bounded outbox."""
+
+    def __init__(self, websocket: WebSocket, max_queue: int):
+        self.websocket = websocket
+        self.outbox: deque = deque(maxlen=max_queue)
+        self.ready = asyncio.Event()
+        self.dropped = 0
+
+    def push(self, payload: str) -> None:
+        if len(self.outbox) == self.outbox.maxlen:
+            # Full: the deque discards the oldest message
+            self.dropped += 1
+        self.outbox.append(payload)
+        self.ready.set()
+
+
+class DashboardHub:
+    """Fan dashboard updates out to every connected WebSocket.
+
+    `publish` serializes a message once and only appends it to each
+    client's outbox, so the publisher never waits on a socket. Each client
+    has its own sender task; a slow client loses its oldest messages
+    instead of delaying the others, and a client whose send times out or
+    fails is disconnected. Idle clients get a heartbeat so dead
+    connections are noticed.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = DASHBOARD_CLIENT_QUEUE,
+        heartbeat: float = DASHBOARD_HEARTBEAT_SECONDS,
+        send_timeout: float = DASHBOARD_SEND_TIMEOUT_SECONDS
+    ):
+        self.max_queue = max_queue
+        self.heartbeat = heartbeat
+        self.send_timeout = send_timeout
+        self.published = 0
+        self._clients: Set[DashboardClient] = set()
+
+    def publish(self, data: Dict) -> int:
+        """Queue a message for every client; returns the number of clients."""
+        payload = json.dumps(data, ensure_ascii=False)
+        for client in self._clients:
+            client.push(payload)
+        self.published += 1
+        return len(self._clients)
+
+    def stats(self) -> Dict:
+        return {
+            "clients": len(self._clients),
+            "published": self.published,
+            "dropped": sum(client.dropped for client in self._clients)
+        }
+
+    async def serve(self, websocket: WebSocket, snapshot: Optional[Dict] = None) -> None:
+        """Run one dashboard connection until it closes.
+
+        `snapshot`, if given, is the first message the client receives.
+        """
+        await websocket.accept()
+        client = DashboardClient(websocket, self.max_queue)
+        if snapshot is not None:
+            client.push(json.dumps(snapshot, ensure_ascii=False))
+        self._clients.add(client)
+
+        sender = asyncio.create_task(self._send_loop(client))
+        receiver = asyncio.create_task(self._receive_loop(websocket))
+        try:
+            await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self._clients.discard(client)
+            sender.cancel()
+            receiver.cancel()
+
+    async def _send_loop(self, client: DashboardClient) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(client.ready.wait(), self.heartbeat)
+            except asyncio.TimeoutError:
+                client.outbox.append(HEARTBEAT)
+            client.ready.clear()
+
+            while client.outbox:
+                payload = client.outbox.popleft()
+                try:
+                    await asyncio.wait_for(
+                        client.websocket.send_text(payload), self.send_timeout
+                    )
+                except (asyncio.TimeoutError, WebSocketDisconnect, RuntimeError, OSError):
+                    # Too slow or already gone
+                    return
+
+    async def _receive_loop(self, websocket: WebSocket) -> None:
+        # Dashboards don't send anything; reading is how a close is noticed
+        try:
+            while True:
+                await websocket.receive_text()
+        except (WebSocketDisconnect, RuntimeError):
+            return
+
+
+dashboard_hub = DashboardHub()
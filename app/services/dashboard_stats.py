@@ -0,0 +1,200 @@
+import asyncio
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, List, Optional
+
+from app.agents import url_intelligence
+from app.config import (
+    DASHBOARD_MAX_UPDATES_PER_SECOND,
+    DASHBOARD_RECENT_ROWS,
+    DASHBOARD_TOP_N
+)
+from app.services.dashboard_hub import DashboardHub, dashboard_hub
+
+# intelligence field -> counter name shown on the dashboard
+INTEL_COUNTERS = {
+    "upiIds": "upi",
+    "phoneNumbers": "phone",
+    "bankAccounts": "bank_account",
+    "phishingLinks": "url",
+}
+RATE_WINDOW_SECONDS = 60
+
+
+def upi_handle(upi_id: str) -> str:
+    """The PSP handle of a UPI ID (`name@ybl` -> `ybl`)."""
+    return upi_id.rsplit("@", 1)[-1].lower()
+
+
+def url_domain(url: str) -> str:
+    host = url_intelligence.url_host(url)
+    return url_intelligence.registered_domain(host) if host else url.lower()
+
+
+class TopCounter:
+    """Counter that keeps memory bounded by pruning its long tail."""
+
+    def __init__(self, top_n: int, capacity_factor: int = 20):
+        self.top_n = top_n
+        self.capacity = top_n * capacity_factor
+        self.counts: Counter = Counter()
+
+    def add(self, key: str) -> None:
+        self.counts[key] += 1
+        if len(self.counts) > self.capacity:
+            self.counts = Counter(dict(self.counts.most_common(self.capacity // 2)))
+
+    def top(self) -> List[List]:
+        return [[key, count] for key, count in self.counts.most_common(self.top_n)]
+
+
+class DashboardAggregator:
+    """Rolling dashboard counters plus a snapshot/delta protocol.
+
+    A client gets one `snapshot` message on connect (counters and the most
+    recent rows). After that, `record` only updates counters and buffers
+    rows; a `delta` with the current counters and the rows since the last
+    delta is published at most `max_updates_per_second` times a second,
+    however fast events arrive.
+
+    `record` may be called from worker threads (honeypot turns finish in
+    `asyncio.to_thread`); the flush is then scheduled onto the event loop
+    the dashboard runs on.
+    """
+
+    def __init__(
+        self,
+        hub: DashboardHub = dashboard_hub,
+        max_updates_per_second: float = DASHBOARD_MAX_UPDATES_PER_SECOND,
+        recent_rows: int = DASHBOARD_RECENT_ROWS,
+        top_n: int = DASHBOARD_TOP_N
+    ):
+        self.hub = hub
+        self.interval = 1.0 / max_updates_per_second
+        self.totals: Counter = Counter()
+        self.intel: Counter = Counter()
+        self.upi_handles = TopCounter(top_n)
+        self.domains = TopCounter(top_n)
+
+        # (second, count) buckets for the messages-per-minute rate
+        self._rate: deque = deque()
+        self._recent: deque = deque(maxlen=recent_rows)
+        self._pending: deque = deque(maxlen=recent_rows)
+        self._last_flush = 0.0
+        self._flusher: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_requested = False
+
+    def record(self, event: Dict) -> None:
+        """Count one processed message; scam messages also become rows."""
+        with self._lock:
+            self._record(event)
+        self._schedule_flush()
+
+    def _record(self, event: Dict) -> None:
+        self.totals["messages"] += 1
+        if event.get("new_session"):
+            self.totals["sessions"] += 1
+        self._count_rate(int(time.time()))
+
+        if event.get("scam_detected"):
+            self.totals["scam_messages"] += 1
+            intelligence = event.get("intelligence", {})
+            for field, name in INTEL_COUNTERS.items():
+                self.intel[name] += len(intelligence.get(field, []))
+            for upi_id in intelligence.get("upiIds", []):
+                self.upi_handles.add(upi_handle(upi_id))
+            for url in intelligence.get("phishingLinks", []):
+                self.domains.add(url_domain(url))
+
+            row = {
+                "session_id": event["session_id"],
+                "message": event["message"],
+                "upi_ids": intelligence.get("upiIds", []),
+                "phone_numbers": intelligence.get("phoneNumbers", []),
+                "campaign_id": event.get("campaign_id"),
+                "timestamp": event["timestamp"]
+            }
+            self._recent.append(row)
+            self._pending.append(row)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return self._stats()
+
+    def _stats(self) -> Dict:
+        now = int(time.time())
+        return {
+            "messages": self.totals["messages"],
+            "sessions": self.totals["sessions"],
+            "scam_messages": self.totals["scam_messages"],
+            "messages_per_minute": sum(
+                count for second, count in self._rate
+                if second > now - RATE_WINDOW_SECONDS
+            ),
+            "intel": {name: self.intel[name] for name in INTEL_COUNTERS.values()},
+            "top_upi_handles": self.upi_handles.top(),
+            "top_domains": self.domains.top()
+        }
+
+    def snapshot(self) -> Dict:
+        """Initial state for a newly connected dashboard (call on the event loop)."""
+        self._loop = asyncio.get_running_loop()
+        with self._lock:
+            return {"type": "snapshot", "stats": self._stats(), "rows": list(self._recent)}
+
+    def _count_rate(self, second: int) -> None:
+        if self._rate and self._rate[-1][0] == second:
+            self._rate[-1] = (second, self._rate[-1][1] + 1)
+        else:
+            self._rate.append((second, 1))
+        while self._rate[0][0] <= second - RATE_WINDOW_SECONDS:
+            self._rate.popleft()
+
+    def _schedule_flush(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is not None:
+            self._loop = loop
+            self._start_flusher()
+            return
+
+        # Called from a worker thread: hand the flush to the dashboard's loop
+        loop = self._loop
+        if loop is None:
+            return
+        with self._lock:
+            if self._flush_requested:
+                return
+            self._flush_requested = True
+        try:
+            loop.call_soon_threadsafe(self._start_flusher)
+        except RuntimeError:
+            # The loop has been closed
+            self._loop = None
+            self._flush_requested = False
+
+    def _start_flusher(self) -> None:
+        self._flush_requested = False
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_soon())
+
+    async def _flush_soon(self) -> None:
+        wait = self._last_flush + self.interval - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        with self._lock:
+            rows = list(self._pending)
+            self._pending.clear()
+            stats = self._stats()
+        self._last_flush = time.monotonic()
+        self.hub.publish({"type": "delta", "stats": stats, "rows": rows})
+
+
+dashboard_stats = DashboardAggregator()
@@ -1,46 +1,38 @@
-import json
-import re
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict
 
-from app.db import SessionLocal
+from sqlalchemy.exc import IntegrityError
+
+from app.agents import intelligence_extractor, scam_detector
+from app.config import CAMPAIGN_MIN_SCORE
+from app.db import SessionLocal, run_in_db
 from app.db_models import HoneypotSession
+from app.services.campaign_index import campaign_index
+from app.services.dashboard_stats import dashboard_stats
+from app.services.intel_index import intel_index
+from app.services.intel_repository import upsert_session_entities
+from app.utils import metrics
 from app.utils.email_reporter import send_scam_report
 
-# 🔴 Import active WebSocket connections
-from app.main import active_connections
-
 
 # =====================================================
 # 📡 Broadcast to Live Dashboard
 # =====================================================
 
-async def broadcast_dashboard_update(data: Dict):
-    """Send real-time update to dashboard clients"""
-    dead_connections: List = []
-
-    for ws in active_connections:
-        try:
-            await ws.send_text(json.dumps(data))
-        except:
-            dead_connections.append(ws)
-
-    # Remove disconnected sockets
-    for ws in dead_connections:
-        active_connections.remove(ws)
+def broadcast_dashboard_update(data: Dict) -> None:
+    """Feed the dashboard aggregator (clients get throttled deltas)"""
+    dashboard_stats.record(data)
 
 
 # =====================================================
-# 🧠 Process Honeypot Event
+# 🗄 Record Event (runs on the DB executor)
 # =====================================================
 
-async def process_guvi_event(event: dict) -> str:
-    """Process incoming message and return honeypot reply"""
+def record_guvi_event(session_id: str, message_text: str) -> Dict:
+    """Blocking part of an event: session row, intelligence, campaign.
 
-    session_id = event["sessionId"]
-    message_text = event["message"]["text"]
-
-    scam_found = False
+    Runs on `db_executor`, never on the event loop.
+    """
     db = SessionLocal()
 
     try:
@@ -51,99 +43,117 @@ async def process_guvi_event(event: dict) -> str:
             session_id=session_id
         ).first()
 
-        if not session:
+        new_session = session is None
+        if new_session:
             session = HoneypotSession(
                 session_id=session_id,
                 scam_detected=False,
-                total_messages=0,
-                bank_accounts="[]",
-                upi_ids="[]",
-                phone_numbers="[]",
-                phishing_links="[]",
-                suspicious_keywords="[]"
+                total_messages=0
             )
-            db.add(session)
+            try:
+                with db.begin_nested():
+                    db.add(session)
+            except IntegrityError:
+                # Created concurrently by another event for the same session
+                new_session = False
+                session = db.query(HoneypotSession).filter_by(
+                    session_id=session_id
+                ).one()
 
         # Update message count
         session.total_messages += 1
 
         # =============================
-        # 🔎 Extract UPI IDs
+        # 🔎 Extract Intelligence (single pass)
         # =============================
-        upi_pattern = r'\b[a-zA-Z0-9.\-_]{2,}@[a-zA-Z]{2,}\b'
-        upi_matches = re.findall(upi_pattern, message_text)
-
-        if upi_matches:
-            existing_upi = json.loads(session.upi_ids or "[]")
-            session.upi_ids = json.dumps(
-                list(set(existing_upi + upi_matches))
-            )
-            session.scam_detected = True
-            scam_found = True
-
-        # =============================
-        # 📞 Extract Phone Numbers
-        # =============================
-        phone_pattern = r'\b[6-9]\d{9}\b'
-        phone_matches = re.findall(phone_pattern, message_text)
-
-        if phone_matches:
-            existing_phones = json.loads(
-                session.phone_numbers or "[]"
-            )
-            session.phone_numbers = json.dumps(
-                list(set(existing_phones + phone_matches))
-            )
+        with metrics.stage("extraction"):
+            spans = intelligence_extractor.scan(message_text)
+            intel = intelligence_extractor.spans_to_intelligence(spans)
+            verdict = scam_detector.classify(message_text, spans)
+        campaign_id = None
+        if verdict.score >= CAMPAIGN_MIN_SCORE:
+            with metrics.stage("campaign"):
+                campaign_id = campaign_index.assign(message_text, session_id)
+        upi_matches = intel["upiIds"]
+        phone_matches = intel["phoneNumbers"]
+
+        upsert_session_entities(db, session_id, intel)
+
+        scam_found = bool(upi_matches or phone_matches)
+        if scam_found:
             session.scam_detected = True
-            scam_found = True
 
         # =============================
         # ⏱ Timestamp
         # =============================
         session.updated_at = datetime.utcnow()
 
-        db.commit()
+        with metrics.stage("db_commit"):
+            db.commit()
+        intel_index.add(session_id, intel)
 
-        # =============================
-        # 📧 Send Email Report
-        # =============================
-        if scam_found:
-            try:
-                send_scam_report(
-                    session_id=session_id,
-                    message=message_text,
-                    upi=", ".join(upi_matches) if upi_matches else "N/A",
-                    phone=", ".join(phone_matches) if phone_matches else "N/A",
-                    timestamp=str(datetime.utcnow())
-                )
-            except Exception as e:
-                print("Email error:", e)
+        return {
+            "scam_found": scam_found,
+            "new_session": new_session,
+            "intelligence": intel,
+            "upi_ids": upi_matches,
+            "phone_numbers": phone_matches,
+            "campaign_id": campaign_id
+        }
 
-        # =============================
-        # 📡 Broadcast to Dashboard
-        # =============================
-        if scam_found:
-            await broadcast_dashboard_update({
-                "session_id": session_id,
-                "message": message_text,
-                "upi_ids": upi_matches,
-                "phone_numbers": phone_matches,
-                "timestamp": datetime.utcnow().isoformat()
-            })
+    except Exception:
+        db.rollback()
+        raise
 
-        # =============================
-        # 🤖 Honeypot Reply
-        # =============================
-        response = generate_honeypot_response(message_text)
-        return response
+    finally:
+        db.close()
+
+
+# =====================================================
+# 🧠 Process Honeypot Event
+# =====================================================
 
+async def process_guvi_event(event: dict) -> str:
+    """Process incoming message and return honeypot reply"""
+
+    session_id = event["sessionId"]
+    message_text = event["message"]["text"]
+
+    try:
+        result = await run_in_db(record_guvi_event, session_id, message_text)
     except Exception as e:
-        db.rollback()
         print(f"Error: {e}")
         return "I'm not sure I understand. Can you explain?"
 
-    finally:
-        db.close()
+    if result["scam_found"]:
+        # =============================
+        # 📧 Queue Email Report (sent in periodic digests)
+        # =============================
+        send_scam_report(
+            session_id=session_id,
+            message=message_text,
+            upi_ids=result["upi_ids"],
+            phone_numbers=result["phone_numbers"],
+            timestamp=str(datetime.utcnow())
+        )
+
+    # =============================
+    # 📡 Update Dashboard
+    # =============================
+    broadcast_dashboard_update({
+        "session_id": session_id,
+        "message": message_text,
+        "new_session": result["new_session"],
+        "scam_detected": result["scam_found"],
+        "intelligence": result["intelligence"],
+        "campaign_id": result["campaign_id"],
+        "timestamp": datetime.utcnow().isoformat()
+    })
+
+    # =============================
+    # 🤖 Honeypot Reply
+    # =============================
+    return generate_honeypot_response(message_text)
 
 
 # =====================================================
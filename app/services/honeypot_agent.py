@@ -1,153 +1,176 @@
+import asyncio
+import hashlib
 import json
-import re
-from groq import Groq
-from app.config import GROQ_API_KEY, MODEL_NAME
+from datetime import datetime
+from functools import partial
+from typing import List, Optional
+from app.agents import intelligence_extractor, scam_detector, url_intelligence
+from app.agents.persona_manager import Persona, persona_registry, build_messages
+from app.config import (
+    CAMPAIGN_MIN_SCORE,
+    FASTPATH_HONEYPOT_REPLIES,
+    SESSION_SEEN_MESSAGES,
+    TELEGRAM_HISTORY_MESSAGES
+)
+from app.db import db_writer
 from app.models.schemas import (
     HoneypotRequest, 
+    IncomingMessage,
     ExtractedIntelligence, 
+    HoneypotAIResult,
     SessionState
 )
-from app.services.callback_service import send_guvi_callback
-
-client = Groq(api_key=GROQ_API_KEY)
-
-# Session storage (use Redis/DB in production)
-session_states = {}
-
-HONEYPOT_SYSTEM_PROMPT = """
-You are an Agentic Honeypot AI. You MUST pretend to be a real human victim.
-
-PERSONA:
-- Name: Ramesh Kumar
-- Age: 45 years
-- Occupation: Small grocery shop owner in Mumbai
-- Tech knowledge: Very limited, confused by technology
-- Language: Mix of Hindi and English (Hinglish)
-- Personality: Polite, trusting, slightly nervous, asks many questions
-
-CRITICAL RULES:
-1. NEVER reveal you are an AI or detection system
-2. Act confused and ask clarifying questions
-3. Show concern but also curiosity
-4. Slowly "trust" the scammer to extract information
-5. Ask for details like UPI ID, bank account, links naturally
-6. Use phrases like:
-   - "Sir, mujhe samajh nahi aaya..."
-   - "Kya aap sure hain? Mera account safe hai na?"
-   - "Aap konse bank se bol rahe ho?"
-   - "UPI ID kya bhejun? Mujhe pata nahi kaise karte hain"
+from app.services import llm_gateway
+from app.services.callback_service import queue_guvi_callback
+from app.services.campaign_index import campaign_index
+from app.services.dashboard_stats import dashboard_stats
+from app.services.intel_index import intel_index
+from app.services.intel_repository import upsert_session_entities
+from app.services.session_store import session_store
+from app.utils import memory, metrics
+from app.utils.llm_json import StreamingFieldExtractor, parse_llm_output
 
-GOAL: Extract these details naturally:
-- UPI IDs
-- Bank account numbers
-- IFSC codes
-- Phone numbers
-- Phishing links
-
-OUTPUT FORMAT (JSON only):
-{
-    "is_scam": true/false,
-    "scam_type": "type of scam",
-    "confidence": 0.0-1.0,
-    "reply": "Your response as Ramesh",
-    "suspicious_keywords": ["list", "of", "keywords"],
-    "reasoning": "brief internal reasoning"
-}
-"""
-
-SUSPICIOUS_KEYWORDS = [
-    "urgent", "verify", "blocked", "suspended", "immediately", 
-    "kyc", "update", "expire", "lottery", "winner", "prize",
-    "refund", "cashback", "otp", "pin", "password", "click",
-    "link", "form", "bank", "account", "transfer", "pay"
-]
 
 def extract_intelligence(text: str) -> dict:
     """Extract UPI, bank accounts, links, phones from text."""
-    extracted = {
-        "upiIds": [],
-        "bankAccounts": [],
-        "phishingLinks": [],
-        "phoneNumbers": [],
-        "suspiciousKeywords": []
-    }
-    
-    # UPI ID pattern
-    upi_pattern = r'[a-zA-Z0-9.\-_]{3,}@[a-zA-Z]{3,}'
-    upi_matches = re.findall(upi_pattern, text.lower())
-    extracted["upiIds"] = list(set(upi_matches))
-    
-    # Bank account (9-18 digits)
-    account_pattern = r'\b\d{9,18}\b'
-    accounts = re.findall(account_pattern, text)
-    extracted["bankAccounts"] = list(set(accounts))
-    
-    # IFSC code
-    ifsc_pattern = r'\b[A-Z]{4}0[A-Z0-9]{6}\b'
-    ifsc_matches = re.findall(ifsc_pattern, text.upper())
-    extracted["bankAccounts"].extend(ifsc_matches)
-    
-    # URLs
-    url_pattern = r'https?://[^\s<>"{}|\\^`\[\]]+'
-    urls = re.findall(url_pattern, text)
-    extracted["phishingLinks"] = list(set(urls))
-    
-    # Phone numbers
-    phone_pattern = r'(?:\+91[\-\s]?)?[6-9]\d{9}\b'
-    phones = re.findall(phone_pattern, text)
-    extracted["phoneNumbers"] = list(set(phones))
-    
-    # Suspicious keywords
-    text_lower = text.lower()
-    for keyword in SUSPICIOUS_KEYWORDS:
-        if keyword in text_lower:
-            extracted["suspiciousKeywords"].append(keyword)
-    
-    return extracted
+    return intelligence_extractor.extract(text)
 
 def merge_intelligence(existing: ExtractedIntelligence, new: dict) -> ExtractedIntelligence:
     """Merge new intelligence with existing."""
     return ExtractedIntelligence(
         bankAccounts=list(set(existing.bankAccounts + new.get("bankAccounts", []))),
         upiIds=list(set(existing.upiIds + new.get("upiIds", []))),
-        phishingLinks=list(set(existing.phishingLinks + new.get("phishingLinks", []))),
+        phishingLinks=url_intelligence.merge_links(existing.phishingLinks, new.get("phishingLinks", [])),
         phoneNumbers=list(set(existing.phoneNumbers + new.get("phoneNumbers", []))),
         suspiciousKeywords=list(set(existing.suspiciousKeywords + new.get("suspiciousKeywords", [])))
     )
 
 def get_or_create_session(session_id: str) -> SessionState:
     """Get existing session or create new one."""
-    if session_id not in session_states:
-        session_states[session_id] = SessionState(sessionId=session_id)
-    return session_states[session_id]
+    state = session_store.get(session_id)
+    if state is None:
+        state = SessionState(sessionId=session_id)
+    return state
 
-def build_conversation_context(request: HoneypotRequest, state: SessionState) -> str:
-    """Build context from conversation history."""
-    context_parts = []
+def message_id(timestamp: int, text: str) -> str:
+    """Stable ID of a scammer message (history messages carry no ID of their own).
+    
+    "<timestamp>:<hash>", so IDs can be aged out oldest first.
+    """
+    return f"{timestamp}:" + hashlib.sha1(f"{timestamp}:{text}".encode("utf-8")).hexdigest()[:16]
+
+def id_timestamp(msg_id: str) -> int:
+    # IDs stored before the timestamp prefix sort (and age out) first
+    timestamp, sep, _ = msg_id.partition(":")
+    return int(timestamp) if sep and timestamp.lstrip("-").isdigit() else 0
+
+def unseen_history(request: HoneypotRequest, state: SessionState) -> list:
+    """Scammer history messages the session has not run through extraction.
     
-    # Add conversation history
+    Tracked by message ID rather than by timestamp, so a late message with
+    an older timestamp is still scanned and nothing is scanned twice; only
+    messages older than every remembered ID are judged by timestamp.
+    """
+    seen = set(state.seen_messages)
+    unseen = []
     for msg in request.conversationHistory:
-        role = "SCAMMER" if msg.sender == "scammer" else "RAMESH"
-        context_parts.append(f"{role}: {msg.text}")
+        if msg.sender != "scammer" or msg.timestamp <= state.seen_before:
+            continue
+        msg_id = message_id(msg.timestamp, msg.text)
+        if msg_id not in seen:
+            seen.add(msg_id)
+            unseen.append(msg)
+    return unseen
+
+def mark_seen(state: SessionState, msg_ids: List[str], limit: int = SESSION_SEEN_MESSAGES) -> None:
+    """Remember messages as extracted, keeping the `limit` newest IDs.
+    
+    Older IDs are dropped and state.seen_before moves up past them.
+    """
+    ordered = sorted(dict.fromkeys(state.seen_messages + msg_ids), key=id_timestamp)
+    overflow = len(ordered) - limit
+    if overflow > 0:
+        state.seen_before = max(state.seen_before, id_timestamp(ordered[overflow - 1]))
+        del ordered[:overflow]
+    state.seen_messages = ordered
+
+def build_conversation_context(request: HoneypotRequest, state: SessionState) -> str:
+    """Build context from conversation history (bounded by the token budget)."""
+    return memory.build_context(request, state, persona_name=session_persona(state).short_name)
+
+FALLBACK_RESULT = {
+    "is_scam": True,
+    "scam_type": "unknown",
+    "confidence": 0.7,
+    "reply": "Sir, mujhe samajh nahi aaya. Thoda detail mein bataiye?",
+    "suspicious_keywords": [],
+    "reasoning": "Fallback response due to error"
+}
+
+def session_persona(state: SessionState) -> Persona:
+    return persona_registry.get(state.persona)
+
+def fallback_result(state: SessionState) -> dict:
+    """FALLBACK_RESULT in the session persona's voice, counted towards the
+    fallback rate."""
+    metrics.LLM_JSON_RESULTS.inc(1, "fallback")
+    result = dict(FALLBACK_RESULT)
+    result["reply"] = session_persona(state).reply_fallback
+    return result
+
+def fast_path_result(state: SessionState, verdict: scam_detector.ScamVerdict) -> dict:
+    """Canned persona result for a turn the pre-classifier is sure about.
     
-    # Add current message
-    context_parts.append(f"SCAMMER: {request.message.text}")
+    The persona asks for whichever piece of intelligence is still missing.
+    """
+    persona = session_persona(state)
+    if not verdict.is_scam:
+        reply = persona.reply_safe
+    else:
+        intel = state.extracted_intelligence.dict()
+        missing = [field for field in persona.fast_replies if not intel[field]]
+        reply = persona.fast_replies[missing[state.turn_count % len(missing)]] if missing else persona.reply_done
     
-    return "\n".join(context_parts)
+    return {
+        "is_scam": verdict.is_scam,
+        "scam_type": verdict.scam_type,
+        "confidence": verdict.score,
+        "reply": reply,
+        "suspicious_keywords": [],
+        "reasoning": f"Rule-based fast path ({verdict.score:.2f}): " + ", ".join(verdict.features)
+    }
 
-def process_honeypot_request(request: HoneypotRequest) -> dict:
-    """Main honeypot processing function."""
+def apply_verdict(ai_result: dict, verdict: scam_detector.ScamVerdict) -> dict:
+    """Let a confident rule-based verdict override the LLM's classification."""
+    if verdict.is_scam is not None:
+        ai_result["is_scam"] = verdict.is_scam
+        ai_result["scam_type"] = verdict.scam_type or ai_result.get("scam_type")
+    return ai_result
+
+def prepare_turn(request: HoneypotRequest) -> tuple:
+    """Update session state for an incoming message and build the LLM messages.
+    
+    Returns (state, messages, verdict, new_intel): verdict is the
+    rule-based pre-classification of the current message, new_intel what
+    this turn's extraction found (handed on to complete_turn).
+    """
     
     # Get or create session
     state = get_or_create_session(request.sessionId)
     state.turn_count += 1
+    if state.persona is None:
+        state.persona = persona_registry.choose(request.sessionId, request.metadata).key
     
     # Extract intelligence from current message
-    new_intel = extract_intelligence(request.message.text)
+    with metrics.stage("extraction"):
+        spans = intelligence_extractor.scan(request.message.text)
+        verdict = scam_detector.classify(request.message.text, spans)
+        new_intel = intelligence_extractor.spans_to_intelligence(spans)
     
-    # Also extract from conversation history
-    for msg in request.conversationHistory:
-        if msg.sender == "scammer":
+        # Also extract from conversation history we have not seen yet
+        seen_now = [message_id(request.message.timestamp, request.message.text)]
+        for msg in unseen_history(request, state):
+            seen_now.append(message_id(msg.timestamp, msg.text))
             hist_intel = extract_intelligence(msg.text)
             new_intel["upiIds"].extend(hist_intel["upiIds"])
             new_intel["bankAccounts"].extend(hist_intel["bankAccounts"])
@@ -155,72 +178,51 @@ def process_honeypot_request(request: HoneypotRequest) -> dict:
             new_intel["phoneNumbers"].extend(hist_intel["phoneNumbers"])
             new_intel["suspiciousKeywords"].extend(hist_intel["suspiciousKeywords"])
     
+    if verdict.score >= CAMPAIGN_MIN_SCORE:
+        with metrics.stage("campaign"):
+            state.campaign_id = campaign_index.assign(request.message.text, request.sessionId)
+    
+    mark_seen(state, seen_now)
+    
     # Merge with existing intelligence
     state.extracted_intelligence = merge_intelligence(state.extracted_intelligence, new_intel)
+    intel_index.add(request.sessionId, new_intel)
     
     # Build conversation context
-    conversation_context = build_conversation_context(request, state)
+    with metrics.stage("context_build"):
+        conversation_context = build_conversation_context(request, state)
     
-    # Build prompt for AI
+    # Build prompt for AI: cached persona prefix + per-turn tail
     intel_summary = json.dumps({
         "upiIds": state.extracted_intelligence.upiIds,
         "bankAccounts": state.extracted_intelligence.bankAccounts,
         "phishingLinks": state.extracted_intelligence.phishingLinks,
         "phoneNumbers": state.extracted_intelligence.phoneNumbers
-    }, indent=2)
+    }, ensure_ascii=False)
     
-    prompt = f"""
-CONVERSATION SO FAR:
-{conversation_context}
-
-INTELLIGENCE ALREADY COLLECTED:
-{intel_summary}
-
-METADATA:
-- Channel: {request.metadata.channel if request.metadata else 'SMS'}
-- Language: {request.metadata.language if request.metadata else 'English'}
-- Turn: {state.turn_count}
-
-TASK: 
-1. Determine if this is a scam
-2. Generate a response as Ramesh to continue the conversation
-3. Try to extract more information naturally
-4. Do NOT ask for information already collected
+    messages = build_messages(
+        session_persona(state),
+        request.metadata,
+        intel_summary,
+        conversation_context,
+        state.turn_count
+    )
+    return state, messages, verdict, new_intel
 
-Respond with JSON only.
-"""
+def parse_ai_result(result_text: str) -> dict:
+    """Parse and validate the JSON object in the model's reply.
     
-    # Call AI
-    try:
-        response = client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[
-                {"role": "system", "content": HONEYPOT_SYSTEM_PROMPT},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=500
-        )
-        
-        result_text = response.choices[0].message.content.strip()
-        
-        # Parse JSON
-        json_match = re.search(r'\{[\s\S]*\}', result_text)
-        if json_match:
-            ai_result = json.loads(json_match.group())
-        else:
-            raise ValueError("No JSON found")
-            
-    except Exception as e:
-        # Fallback response
-        ai_result = {
-            "is_scam": True,
-            "scam_type": "unknown",
-            "confidence": 0.7,
-            "reply": "Sir, mujhe samajh nahi aaya. Thoda detail mein bataiye?",
-            "suspicious_keywords": [],
-            "reasoning": "Fallback response due to error"
-        }
+    Prose and code fences around it and common defects (single quotes,
+    trailing commas, a cut-off end) are tolerated; LLMOutputError if no
+    usable result remains.
+    """
+    with metrics.stage("json_parse"):
+        result = parse_llm_output(result_text, HoneypotAIResult, "honeypot").dict()
+    metrics.LLM_JSON_RESULTS.inc(1, "ok")
+    return result
+
+def complete_turn(request: HoneypotRequest, state: SessionState, ai_result: dict, new_intel: dict) -> dict:
+    """Apply the AI result to the session, send the callback and save state."""
     
     # Update state
     state.scam_detected = ai_result.get("is_scam", True)
@@ -255,7 +257,7 @@ Respond with JSON only.
         
         # Send callback asynchronously (don't block response)
         try:
-            send_guvi_callback(
+            queue_guvi_callback(
                 session_id=request.sessionId,
                 scam_detected=state.scam_detected,
                 total_messages=total_messages,
@@ -266,7 +268,28 @@ Respond with JSON only.
             print(f"Callback error: {e}")
     
     # Save updated state
-    session_states[request.sessionId] = state
+    with metrics.stage("session_save"):
+        session_store.put(state)
+    
+    # The SQL store links entities on every put; with any other store the
+    # intel would otherwise only reach intel_entities with a sent callback
+    if has_intel and not session_store.writes_entities:
+        db_writer.submit(partial(
+            upsert_session_entities,
+            session_id=request.sessionId,
+            intelligence=state.extracted_intelligence.dict()
+        ))
+    
+    # Feed the live dashboard (safe from worker threads)
+    dashboard_stats.record({
+        "session_id": request.sessionId,
+        "message": request.message.text,
+        "new_session": state.turn_count == 1,
+        "scam_detected": state.scam_detected,
+        "intelligence": new_intel,
+        "campaign_id": state.campaign_id,
+        "timestamp": datetime.utcnow().isoformat()
+    })
     
     # Return response in GUVI format
     return {
@@ -274,10 +297,124 @@ Respond with JSON only.
         "reply": ai_result.get("reply", "Sir, mujhe samajh nahi aaya.")
     }
 
+def process_honeypot_request(request: HoneypotRequest) -> dict:
+    """Main honeypot processing function."""
+    state, messages, verdict, new_intel = prepare_turn(request)
+    
+    if verdict.is_scam is not None and FASTPATH_HONEYPOT_REPLIES:
+        return complete_turn(request, state, fast_path_result(state, verdict), new_intel)
+    
+    # Call AI
+    try:
+        result_text = llm_gateway.chat_completion_sync(
+            messages,
+            temperature=0.7,
+            max_tokens=500
+        )
+        ai_result = parse_ai_result(result_text)
+    except Exception as e:
+        ai_result = fallback_result(state)
+    
+    return complete_turn(request, state, apply_verdict(ai_result, verdict), new_intel)
+
+async def process_honeypot_request_async(request: HoneypotRequest) -> dict:
+    """Async honeypot processing: the LLM call does not hold a worker thread.
+    
+    Session bookkeeping still runs in a thread because the store and the
+    callback may block; only those short steps borrow the threadpool.
+    """
+    state, messages, verdict, new_intel = await asyncio.to_thread(prepare_turn, request)
+    
+    if verdict.is_scam is not None and FASTPATH_HONEYPOT_REPLIES:
+        return await asyncio.to_thread(complete_turn, request, state, fast_path_result(state, verdict), new_intel)
+    
+    try:
+        result_text = await llm_gateway.chat_completion(
+            messages,
+            temperature=0.7,
+            max_tokens=500
+        )
+        ai_result = parse_ai_result(result_text)
+    except Exception as e:
+        ai_result = fallback_result(state)
+    
+    return await asyncio.to_thread(complete_turn, request, state, apply_verdict(ai_result, verdict), new_intel)
+
+async def stream_honeypot_request(request: HoneypotRequest):
+    """Streaming honeypot turn.
+    
+    Yields ("reply", text) events as the persona's reply is decoded from
+    the model stream, then one ("done", response) event once the full
+    result has been parsed and the session updated.
+    """
+    state, messages, verdict, new_intel = await asyncio.to_thread(prepare_turn, request)
+    
+    if verdict.is_scam is not None and FASTPATH_HONEYPOT_REPLIES:
+        ai_result = fast_path_result(state, verdict)
+        yield "reply", ai_result["reply"]
+        yield "done", await asyncio.to_thread(complete_turn, request, state, ai_result, new_intel)
+        return
+    
+    extractor = StreamingFieldExtractor("reply")
+    try:
+        async for delta in llm_gateway.stream_chat_completion(
+            messages,
+            temperature=0.7,
+            max_tokens=500
+        ):
+            reply_delta = extractor.feed(delta)
+            if reply_delta:
+                yield "reply", reply_delta
+        ai_result = parse_ai_result(extractor.text)
+    except Exception as e:
+        ai_result = fallback_result(state)
+        if extractor.value:
+            # Keep what the client has already been shown
+            ai_result["reply"] = extractor.value
+        else:
+            yield "reply", ai_result["reply"]
+    
+    yield "done", await asyncio.to_thread(complete_turn, request, state, apply_verdict(ai_result, verdict), new_intel)
+
+def log_exchange(
+    session_id: str,
+    message: IncomingMessage,
+    reply: str,
+    max_messages: int = TELEGRAM_HISTORY_MESSAGES
+) -> Optional[SessionState]:
+    """Append a finished turn to the session's conversation_log.
+    
+    For channels whose clients send no conversationHistory (the Telegram
+    bot); the log is passed back as the history of the next turn. The
+    oldest entries are dropped past `max_messages`, and summarized_count is
+    shifted to match.
+    """
+    state = session_store.get(session_id)
+    if state is None:
+        return None
+    
+    state.conversation_log.append(
+        {"sender": message.sender, "text": message.text, "timestamp": message.timestamp}
+    )
+    state.conversation_log.append({
+        "sender": "user",
+        "text": reply,
+        # Just after the message it answers, so sorting by timestamp keeps
+        # each reply ahead of the next message even at second resolution
+        "timestamp": message.timestamp + 1
+    })
+    overflow = len(state.conversation_log) - max_messages
+    if overflow > 0:
+        del state.conversation_log[:overflow]
+        state.summarized_count = max(0, state.summarized_count - overflow)
+    
+    session_store.put(state)
+    return state
+
 def get_session_state(session_id: str) -> dict:
     """Get current session state for debugging."""
-    if session_id in session_states:
-        state = session_states[session_id]
+    state = session_store.get(session_id)
+    if state is not None:
         return {
             "sessionId": state.sessionId,
             "turnCount": state.turn_count,
@@ -289,7 +426,6 @@ def get_session_state(session_id: str) -> dict:
 
 def reset_session(session_id: str) -> dict:
     """Reset a session."""
-    if session_id in session_states:
-        del session_states[session_id]
+    if session_store.delete(session_id):
         return {"status": "reset", "sessionId": session_id}
     return {"status": "not_found", "sessionId": session_id}
\ No newline at end of file
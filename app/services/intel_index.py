@@ -0,0 +1,214 @@
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from app.agents.url_intelligence import registered_domain, url_host
+from app.db import SessionLocal
+from app.db_models import IntelEntity, SessionEntity
+from app.services.intel_repository import INTEL_FIELDS
+from app.utils import metrics
+
+NON_DIGITS = re.compile(r"\D")
+# After a failed load, lookups serve what is indexed and retry this much later
+LOAD_RETRY_SECONDS = 30.0
+# The value maps, rebuilt together by load()
+INDEX_MAPS = ("_upi", "_psp", "_phone", "_domain", "_domain_urls", "_account")
+
+
+def normalize_upi(value: str) -> str:
+    return value.strip().lower()
+
+
+def upi_psp(handle: str) -> str:
+    """The PSP suffix of a UPI handle ("ybl" for "name@ybl")."""
+    return handle.rpartition("@")[2]
+
+
+def normalize_phone(value: str) -> Optional[str]:
+    """E.164 form of an Indian or international number, or None."""
+    digits = NON_DIGITS.sub("", value)
+    if value.strip().startswith("+"):
+        return "+" + digits if 8 <= len(digits) <= 15 else None
+    if len(digits) == 11 and digits.startswith("0"):
+        digits = digits[1:]
+    if len(digits) == 10:
+        return "+91" + digits
+    if len(digits) == 12 and digits.startswith("91"):
+        return "+" + digits
+    return None
+
+
+def normalize_account(value: str) -> str:
+    return NON_DIGITS.sub("", value)
+
+
+class IntelIndex:
+    """Reverse lookup from scam intel to the sessions that revealed it.
+
+    Hash indexes keyed by normalized value: UPI handles (and handles by PSP
+    suffix), phones in E.164, URLs by registered domain, bank account
+    digits. Rebuilt from intel_entities / session_entities once per process
+    and updated as each message is extracted, so lookups never touch SQL.
+    Session lists keep first-seen order (dicts used as ordered sets).
+
+    The rebuild reads the DB into maps of its own, without `_lock`; adds
+    and lookups meanwhile use the live maps, and the two are merged once
+    the rebuild is done.
+    """
+
+    def __init__(self):
+        self._upi: Dict[str, Dict[str, None]] = {}
+        self._psp: Dict[str, Dict[str, None]] = {}  # psp -> handles
+        self._phone: Dict[str, Dict[str, None]] = {}
+        self._domain: Dict[str, Dict[str, None]] = {}
+        self._domain_urls: Dict[str, Dict[str, None]] = {}
+        self._account: Dict[str, Dict[str, None]] = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self._retry_load_at = 0.0
+
+    def add(self, session_id: str, intelligence: Dict[str, List[str]]) -> None:
+        """Index a session's intel (GUVI intelligence dict shape); idempotent."""
+        self.load()
+        with self._lock:
+            self._add(session_id, intelligence)
+
+    def _add(self, session_id: str, intelligence: Dict[str, List[str]]) -> None:
+        for value in intelligence.get("upiIds", ()):
+            handle = normalize_upi(value)
+            self._upi.setdefault(handle, {})[session_id] = None
+            self._psp.setdefault(upi_psp(handle), {})[handle] = None
+
+        for value in intelligence.get("phoneNumbers", ()):
+            phone = normalize_phone(value)
+            if phone:
+                self._phone.setdefault(phone, {})[session_id] = None
+
+        for value in intelligence.get("phishingLinks", ()):
+            host = url_host(value)
+            if host:
+                domain = registered_domain(host)
+                self._domain.setdefault(domain, {})[session_id] = None
+                self._domain_urls.setdefault(domain, {})[value] = None
+
+        for value in intelligence.get("bankAccounts", ()):
+            account = normalize_account(value)
+            if account:
+                self._account.setdefault(account, {})[session_id] = None
+
+    # =============================
+    # 🔎 Lookups
+    # =============================
+
+    def _sessions(self, index: Dict[str, Dict[str, None]], key: str, limit: int) -> dict:
+        with self._lock:
+            sessions = index.get(key)
+            found = list(sessions)[:limit] if sessions else []
+            total = len(sessions) if sessions else 0
+        return {"key": key, "found": total > 0, "sessionCount": total, "sessions": found}
+
+    def lookup_upi(self, handle: str, limit: int = 100) -> dict:
+        self.load()
+        return self._sessions(self._upi, normalize_upi(handle), limit)
+
+    def lookup_psp(self, suffix: str, limit: int = 100) -> dict:
+        """Handles seen on a PSP, with how many sessions each appeared in."""
+        self.load()
+        psp = suffix.strip().lower().lstrip("@")
+        with self._lock:
+            handles = list(self._psp.get(psp, ()))
+            total = len(handles)
+            rows = [
+                {"handle": handle, "sessionCount": len(self._upi[handle])}
+                for handle in handles[:limit]
+            ]
+        return {"key": psp, "found": total > 0, "handleCount": total, "handles": rows}
+
+    def lookup_phone(self, number: str, limit: int = 100) -> dict:
+        self.load()
+        phone = normalize_phone(number)
+        if phone is None:
+            return {"key": None, "found": False, "sessionCount": 0, "sessions": []}
+        return self._sessions(self._phone, phone, limit)
+
+    def lookup_domain(self, value: str, limit: int = 100) -> dict:
+        """Sessions and URLs for a domain; accepts a bare host or a full URL."""
+        self.load()
+        domain = registered_domain(url_host(value))
+        result = self._sessions(self._domain, domain, limit)
+        with self._lock:
+            result["urls"] = list(self._domain_urls.get(domain, ()))[:limit]
+        return result
+
+    def lookup_account(self, account: str, limit: int = 100) -> dict:
+        self.load()
+        return self._sessions(self._account, normalize_account(account), limit)
+
+    def stats(self) -> dict:
+        self.load()
+        with self._lock:
+            return {
+                "upiHandles": len(self._upi),
+                "psps": len(self._psp),
+                "phones": len(self._phone),
+                "domains": len(self._domain),
+                "bankAccounts": len(self._account)
+            }
+
+    # =============================
+    # 🗄 Persistence
+    # =============================
+
+    def load(self) -> None:
+        """Rebuild the index from the DB (once per process).
+
+        Returns at once if another thread is already loading.
+        """
+        if self._loaded or time.monotonic() < self._retry_load_at:
+            return
+        if not self._load_lock.acquire(blocking=False):
+            return
+        try:
+            if self._loaded or time.monotonic() < self._retry_load_at:
+                return
+
+            rebuilt = IntelIndex()
+            db = SessionLocal()
+            try:
+                rows = (
+                    db.query(SessionEntity.session_id, IntelEntity.entity_type, IntelEntity.value)
+                    .join(IntelEntity, SessionEntity.entity_id == IntelEntity.id)
+                    .order_by(SessionEntity.id)
+                    .yield_per(1000)
+                )
+                for session_id, entity_type, value in rows:
+                    field = INTEL_FIELDS.get(entity_type)
+                    if field:
+                        rebuilt._add(session_id, {field: [value]})
+            except Exception:
+                self._retry_load_at = time.monotonic() + LOAD_RETRY_SECONDS
+                metrics.INDEX_LOADS.inc(1, "intel", "failed")
+                return
+            finally:
+                db.close()
+
+            with self._lock:
+                self._swap_in(rebuilt)
+                self._loaded = True
+            metrics.INDEX_LOADS.inc(1, "intel", "ok")
+        finally:
+            self._load_lock.release()
+
+    def _swap_in(self, rebuilt: "IntelIndex") -> None:
+        """Adopt the rebuilt maps, keeping what was added during the load
+        (after the DB rows, which came first)."""
+        for name in INDEX_MAPS:
+            merged = getattr(rebuilt, name)
+            for key, members in getattr(self, name).items():
+                merged.setdefault(key, {}).update(members)
+            setattr(self, name, merged)
+
+
+intel_index = IntelIndex()
@@ -0,0 +1,100 @@
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db_models import IntelEntity, SessionEntity
+
+# GUVI intelligence field -> entity_type
+ENTITY_TYPES = {
+    "upiIds": "upi",
+    "bankAccounts": "bank_account",
+    "phishingLinks": "url",
+    "phoneNumbers": "phone",
+    "suspiciousKeywords": "keyword",
+}
+INTEL_FIELDS = {entity_type: field for field, entity_type in ENTITY_TYPES.items()}
+
+
+def _get_or_create_entities(db: Session, entity_type: str, values: List[str]) -> List[int]:
+    """Entity IDs for `values`, inserting the ones not seen before."""
+    now = datetime.utcnow()
+    existing = {
+        entity.value: entity
+        for entity in db.query(IntelEntity).filter(
+            IntelEntity.entity_type == entity_type,
+            IntelEntity.value.in_(values)
+        )
+    }
+    for entity in existing.values():
+        entity.last_seen = now
+
+    for value in values:
+        if value in existing:
+            continue
+        entity = IntelEntity(entity_type=entity_type, value=value, first_seen=now, last_seen=now)
+        try:
+            with db.begin_nested():
+                db.add(entity)
+        except IntegrityError:
+            # Inserted concurrently by another worker
+            entity = db.query(IntelEntity).filter_by(entity_type=entity_type, value=value).one()
+        existing[value] = entity
+
+    return [existing[value].id for value in values]
+
+
+def upsert_session_entities(db: Session, session_id: str, intelligence: Dict[str, List[str]]) -> int:
+    """Link a session to every entity in a GUVI intelligence dict.
+
+    Entities and links are created as needed; the caller commits. Returns
+    the number of new session links.
+    """
+    entity_ids: List[int] = []
+    for field, entity_type in ENTITY_TYPES.items():
+        values = list(dict.fromkeys(v for v in intelligence.get(field, []) if v))
+        if values:
+            entity_ids.extend(_get_or_create_entities(db, entity_type, values))
+
+    if not entity_ids:
+        return 0
+
+    linked = {
+        entity_id for (entity_id,) in db.query(SessionEntity.entity_id).filter(
+            SessionEntity.session_id == session_id,
+            SessionEntity.entity_id.in_(entity_ids)
+        )
+    }
+    new_ids = [entity_id for entity_id in dict.fromkeys(entity_ids) if entity_id not in linked]
+    db.add_all([
+        SessionEntity(session_id=session_id, entity_id=entity_id)
+        for entity_id in new_ids
+    ])
+    return len(new_ids)
+
+
+def get_session_intelligence(db: Session, session_id: str) -> Dict[str, List[str]]:
+    """A session's entities in the GUVI intelligence dict shape."""
+    intelligence = {field: [] for field in ENTITY_TYPES}
+    rows = (
+        db.query(IntelEntity.entity_type, IntelEntity.value)
+        .join(SessionEntity, SessionEntity.entity_id == IntelEntity.id)
+        .filter(SessionEntity.session_id == session_id)
+        .order_by(SessionEntity.id)
+    )
+    for entity_type, value in rows:
+        if entity_type in INTEL_FIELDS:
+            intelligence[INTEL_FIELDS[entity_type]].append(value)
+    return intelligence
+
+
+def find_sessions(db: Session, entity_type: str, value: str) -> List[str]:
+    """Sessions that mention an entity, oldest link first (indexed lookup)."""
+    rows = (
+        db.query(SessionEntity.session_id)
+        .join(IntelEntity, SessionEntity.entity_id == IntelEntity.id)
+        .filter(IntelEntity.entity_type == entity_type, IntelEntity.value == value)
+        .order_by(SessionEntity.id)
+    )
+    return [session_id for (session_id,) in rows]
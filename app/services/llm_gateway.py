@@ -0,0 +1,105 @@
+"""Async LLM calls for the endpoints.
+
+Callers go through here for the process-wide concurrency cap, timing and
+token metrics; which provider answers is decided by the LLM router.
+"""
+import asyncio
+import time
+from typing import AsyncIterator, List, Optional
+
+from app.config import LLM_MAX_CONCURRENCY, LLM_TIMEOUT_SECONDS
+from app.services.llm_router import llm_router
+from app.utils import metrics
+from app.utils.memory import estimate_tokens
+
+# Caps in-flight upstream calls; callers beyond the limit wait here
+# instead of piling up against the provider's rate limits.
+_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+
+async def chat_completion(
+    messages: List[dict],
+    temperature: float = 0.7,
+    max_tokens: Optional[int] = None,
+    timeout: float = LLM_TIMEOUT_SECONDS
+) -> str:
+    """Run one chat completion and return the message content.
+
+    Raises asyncio.TimeoutError if the call (including time spent waiting
+    for a concurrency slot) exceeds `timeout`.
+    """
+    deadline = time.monotonic() + timeout
+
+    async def _call() -> str:
+        async with _semaphore:
+            content, usage = await llm_router.complete(messages, temperature, max_tokens, deadline)
+        record_usage(messages, content, usage)
+        return content
+
+    with metrics.stage("llm_call"):
+        return await asyncio.wait_for(_call(), timeout)
+
+
+async def stream_chat_completion(
+    messages: List[dict],
+    temperature: float = 0.7,
+    max_tokens: Optional[int] = None,
+    timeout: float = LLM_TIMEOUT_SECONDS
+) -> AsyncIterator[str]:
+    """Yield content deltas of one chat completion as they arrive.
+
+    The concurrency slot is held for the whole stream, and `timeout`
+    bounds the total time, not the gap between chunks.
+    """
+    started = time.perf_counter()
+    deadline = time.monotonic() + timeout
+    received: List[str] = []
+    await asyncio.wait_for(_semaphore.acquire(), timeout)
+    try:
+        async for delta in llm_router.stream(messages, temperature, max_tokens, deadline):
+            if not received:
+                metrics.LLM_TTFT_SECONDS.observe(time.perf_counter() - started)
+            received.append(delta)
+            yield delta
+    finally:
+        _semaphore.release()
+        metrics.STAGE_SECONDS.observe(time.perf_counter() - started, "llm_stream")
+        record_usage(messages, "".join(received), None)
+
+
+def chat_completion_sync(
+    messages: List[dict],
+    temperature: float = 0.7,
+    max_tokens: Optional[int] = None,
+    timeout: float = LLM_TIMEOUT_SECONDS
+) -> str:
+    """chat_completion for sync callers (scripts); not for use inside a running loop.
+
+    Runs on a loop of its own, so it uses its own short-lived HTTP client
+    and skips the concurrency cap, both of which belong to the app's loop.
+    """
+    deadline = time.monotonic() + timeout
+
+    async def _call() -> str:
+        async with llm_router.own_client():
+            content, usage = await llm_router.complete(messages, temperature, max_tokens, deadline)
+        record_usage(messages, content, usage)
+        return content
+
+    with metrics.stage("llm_call"):
+        return asyncio.run(asyncio.wait_for(_call(), timeout))
+
+
+def record_usage(messages: List[dict], content: Optional[str], usage: Optional[dict]) -> None:
+    """Count tokens in/out, estimating when the provider reports no usage."""
+    if usage and usage.get("prompt_tokens") is not None:
+        metrics.LLM_TOKENS.inc(usage["prompt_tokens"], "in")
+        metrics.LLM_TOKENS.inc(usage.get("completion_tokens") or 0, "out")
+        return
+    metrics.LLM_TOKENS.inc(sum(estimate_tokens(m.get("content") or "") for m in messages), "in")
+    metrics.LLM_TOKENS.inc(estimate_tokens(content) if content else 0, "out")
+
+
+async def aclose() -> None:
+    """Close pooled connections (call on application shutdown)."""
+    await llm_router.aclose()
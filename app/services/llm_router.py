@@ -0,0 +1,557 @@
+"""Routing chat completions across OpenAI-compatible endpoints.
+
+Endpoints are tried in their configured order. An endpoint is skipped
+while its circuit breaker is open, when it is out of rate-limit budget
+(token buckets for requests and tokens per minute), or when it has become
+much slower than the fastest healthy endpoint. A failed request fails
+over to the next endpoint when the endpoint is at fault (timeout, network
+error, 429 or 5xx); any other error is the request's and is raised. With hedging on, a request that runs past the
+endpoint's p95 latency gets a second copy on another endpoint and the
+first answer wins.
+
+Requests go straight to `{base_url}/chat/completions` over one pooled
+httpx client (sync callers get a short-lived one, see `own_client`), so any
+OpenAI-compatible server (including benchmarks/fake_llm.py) can be an
+endpoint.
+"""
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, List, Optional, Set, Tuple
+
+import httpx
+
+from app.config import (
+    GROQ_API_KEY,
+    GROQ_BASE_URL,
+    MODEL_NAME,
+    LLM_POOL_SIZE,
+    LLM_TIMEOUT_SECONDS,
+    LLM_ENDPOINTS,
+    LLM_BREAKER_FAILURES,
+    LLM_BREAKER_RESET_SECONDS,
+    LLM_LATENCY_SLACK,
+    LLM_HEDGE,
+    LLM_HEDGE_DELAY_SECONDS
+)
+from app.utils import metrics
+from app.utils.memory import estimate_tokens
+
+LATENCY_WINDOW = 200
+# Samples needed before an endpoint's p95 is trusted as the hedge delay
+MIN_LATENCY_SAMPLES = 20
+EWMA_ALPHA = 0.2
+
+# Client for requests made inside `LLMRouter.own_client()`
+_own_client: ContextVar[Optional[httpx.AsyncClient]] = ContextVar("llm_own_client", default=None)
+
+
+class LLMUnavailable(Exception):
+    """No endpoint could serve the request."""
+
+
+class LLMHTTPError(Exception):
+    def __init__(self, endpoint: str, status: int, body: str):
+        super().__init__(f"{endpoint} returned HTTP {status}: {body[:200]}")
+        self.status = status
+        # Rate limited or a server fault; anything else is the request's fault
+        self.retryable = status == 429 or status >= 500
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether the endpoint, not the request, is at fault: a timeout, a
+    network error, 429 or 5xx. Only these trip breakers and fail over."""
+    if isinstance(error, LLMHTTPError):
+        return error.retryable
+    return isinstance(error, (asyncio.TimeoutError, httpx.TransportError))
+
+
+# =====================================================
+# 🪣 Rate limiting and circuit breaking
+# =====================================================
+
+class TokenBucket:
+    """`rate` units per second, bursting up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._level = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (0 if it can be now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self._level) / self.rate)
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self._level -= min(amount, self.capacity)
+
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failures; after
+    `reset_seconds` one probe request is let through (half-open) and its
+    outcome closes or re-opens the circuit."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = LLM_BREAKER_FAILURES,
+        reset_seconds: float = LLM_BREAKER_RESET_SECONDS
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def available(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return time.monotonic() - self._opened_at >= self.reset_seconds
+        return not self._probing
+
+    def allow(self) -> bool:
+        """Claim the right to send a request (the probe, when half-open)."""
+        if not self.available():
+            return False
+        if self.state == self.OPEN:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            self._probing = True
+        return True
+
+    def release(self) -> None:
+        """Give back an unused claim (request not sent or cancelled)."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+
+# =====================================================
+# 🔌 Endpoints
+# =====================================================
+
+class Endpoint:
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        api_key: str,
+        model: str,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None
+    ):
+        self.name = name
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.model = model
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.requests = TokenBucket(rpm / 60, rpm) if rpm else None
+        self.tokens = TokenBucket(tpm / 60, tpm) if tpm else None
+        self.breaker = CircuitBreaker()
+        self.latency: Optional[float] = None  # EWMA, seconds
+        self.in_flight = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def wait_time(self, cost: float) -> float:
+        """Seconds until the rate limits allow a request of `cost` tokens."""
+        return max(
+            self.requests.wait_time(1) if self.requests else 0.0,
+            self.tokens.wait_time(cost) if self.tokens else 0.0
+        )
+
+    def take(self, cost: float) -> None:
+        if self.requests:
+            self.requests.take(1)
+        if self.tokens:
+            self.tokens.take(cost)
+
+    def observe(self, seconds: float) -> None:
+        self._latencies.append(seconds)
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += EWMA_ALPHA * (seconds - self.latency)
+
+    def p95(self) -> Optional[float]:
+        if len(self._latencies) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def stats(self) -> dict:
+        p95 = self.p95()
+        return {
+            "name": self.name,
+            "model": self.model,
+            "breaker": self.breaker.state,
+            "failures": self.breaker.failures,
+            "inFlight": self.in_flight,
+            "latencyMs": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "p95Ms": round(p95 * 1000, 1) if p95 is not None else None
+        }
+
+
+def load_endpoints(spec: str = LLM_ENDPOINTS) -> List[Endpoint]:
+    """Endpoints from the LLM_ENDPOINTS JSON list, or the default Groq one."""
+    if not spec:
+        # The Groq SDK appended /openai/v1 to GROQ_BASE_URL; keep that meaning
+        return [Endpoint(
+            "groq",
+            (GROQ_BASE_URL or "https://api.groq.com").rstrip("/") + "/openai/v1",
+            GROQ_API_KEY,
+            MODEL_NAME
+        )]
+
+    endpoints = []
+    for i, entry in enumerate(json.loads(spec)):
+        api_key = entry.get("api_key") or os.getenv(entry.get("api_key_env", ""), "")
+        endpoints.append(Endpoint(
+            entry.get("name", f"endpoint-{i}"),
+            entry["base_url"],
+            api_key,
+            entry.get("model", MODEL_NAME),
+            rpm=entry.get("rpm"),
+            tpm=entry.get("tpm")
+        ))
+    return endpoints
+
+
+# =====================================================
+# 🧭 Router
+# =====================================================
+
+class LLMRouter:
+    def __init__(
+        self,
+        endpoints: List[Endpoint],
+        hedge: bool = LLM_HEDGE,
+        hedge_delay: float = LLM_HEDGE_DELAY_SECONDS,
+        latency_slack: float = LLM_LATENCY_SLACK,
+        pool_size: int = LLM_POOL_SIZE
+    ):
+        self.endpoints = endpoints
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.latency_slack = latency_slack
+        self.pool_size = pool_size
+        self._http: Optional[httpx.AsyncClient] = None
+
+    def _new_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size
+            ),
+            timeout=LLM_TIMEOUT_SECONDS
+        )
+
+    def _client(self) -> httpx.AsyncClient:
+        client = _own_client.get()
+        if client is not None:
+            return client
+        # The pooled client belongs to the app's event loop
+        if self._http is None:
+            self._http = self._new_client()
+        return self._http
+
+    @asynccontextmanager
+    async def own_client(self):
+        """Send this context's requests over a client of its own, closed on exit.
+
+        For callers on another event loop (a sync caller's asyncio.run): the
+        pooled client's connections are bound to the loop that opened them.
+        """
+        client = self._new_client()
+        token = _own_client.set(client)
+        try:
+            yield
+        finally:
+            _own_client.reset(token)
+            await client.aclose()
+
+    def candidates(self, exclude: Set[Endpoint] = frozenset()) -> List[Endpoint]:
+        """Healthy endpoints in preference order.
+
+        Configured order, except that endpoints much slower than the fastest
+        measured one go to the back. Unmeasured endpoints count as fast so
+        they get probed.
+        """
+        healthy = [e for e in self.endpoints if e not in exclude and e.breaker.available()]
+        measured = [e.latency for e in healthy if e.latency is not None]
+        if not measured:
+            return healthy
+        limit = min(measured) * self.latency_slack
+        return sorted(healthy, key=lambda e: e.latency is not None and e.latency > limit)
+
+    def _claim(self, cost: float, exclude: Set[Endpoint]) -> Tuple[Optional[Endpoint], Optional[float]]:
+        """The first candidate with rate-limit budget now, claimed.
+
+        Otherwise (None, shortest wait); (None, None) if nothing is healthy.
+        """
+        shortest = None
+        for endpoint in self.candidates(exclude):
+            wait = endpoint.wait_time(cost)
+            if wait > 0:
+                shortest = wait if shortest is None else min(shortest, wait)
+                continue
+            if endpoint.breaker.allow():
+                endpoint.take(cost)
+                return endpoint, None
+        return None, shortest
+
+    async def _acquire(self, cost: float, exclude: Set[Endpoint], deadline: float) -> Optional[Endpoint]:
+        """Claim an endpoint, waiting for rate-limit budget if all are spent."""
+        while True:
+            endpoint, wait = self._claim(cost, exclude)
+            if endpoint is not None or wait is None:
+                return endpoint
+            if time.monotonic() + wait > deadline:
+                raise asyncio.TimeoutError()
+            await asyncio.sleep(wait)
+
+    def _payload(self, endpoint: Endpoint, params: dict) -> dict:
+        return dict(params, model=endpoint.model)
+
+    async def _attempt(self, endpoint: Endpoint, params: dict, deadline: float) -> Tuple[str, Optional[dict]]:
+        """One request to an already claimed endpoint."""
+        endpoint.in_flight += 1
+        started = time.monotonic()
+        try:
+            response = await asyncio.wait_for(
+                self._client().post(endpoint.url, json=self._payload(endpoint, params), headers=endpoint.headers),
+                deadline - started
+            )
+            if response.status_code >= 400:
+                raise LLMHTTPError(endpoint.name, response.status_code, response.text)
+            body = response.json()
+            content = body["choices"][0]["message"]["content"]
+        except asyncio.CancelledError:
+            # Lost a hedge race; says nothing about the endpoint's health
+            endpoint.breaker.release()
+            metrics.LLM_ENDPOINT_RESULTS.inc(1, endpoint.name, "cancelled")
+            raise
+        except asyncio.TimeoutError:
+            endpoint.breaker.record_failure()
+            metrics.LLM_ENDPOINT_RESULTS.inc(1, endpoint.name, "timeout")
+            raise
+        except (httpx.HTTPError, LLMHTTPError, KeyError, IndexError, TypeError, ValueError) as e:
+            if is_retryable(e):
+                endpoint.breaker.record_failure()
+            else:
+                # The endpoint answered; a bad request says nothing about its health
+                endpoint.breaker.release()
+            metrics.LLM_ENDPOINT_RESULTS.inc(1, endpoint.name, "error")
+            raise
+        finally:
+            endpoint.in_flight -= 1
+
+        endpoint.observe(time.monotonic() - started)
+        endpoint.breaker.record_success()
+        metrics.LLM_ENDPOINT_RESULTS.inc(1, endpoint.name, "ok")
+        return content, body.get("usage")
+
+    async def _hedged(
+        self,
+        primary: Endpoint,
+        params: dict,
+        cost: float,
+        deadline: float,
+        tried: Set[Endpoint]
+    ) -> Tuple[str, Optional[dict]]:
+        """Run on `primary`; past its p95, race a copy on another endpoint."""
+        first = asyncio.ensure_future(self._attempt(primary, params, deadline))
+        delay = primary.p95() or self.hedge_delay
+        done, _ = await asyncio.wait({first}, timeout=max(0.0, min(delay, deadline - time.monotonic())))
+        if done:
+            return first.result()
+
+        # Another endpoint if one has budget now, else the same one again
+        backup, _ = self._claim(cost, tried)
+        if backup is None:
+            backup, _ = self._claim(cost, set())
+        if backup is None:
+            return await first
+        tried.add(backup)
+
+        second = asyncio.ensure_future(self._attempt(backup, params, deadline))
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        metrics.LLM_HEDGES.inc(1, "primary" if task is first else "hedge")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def complete(
+        self,
+        messages: List[dict],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        deadline: Optional[float] = None
+    ) -> Tuple[str, Optional[dict]]:
+        """Chat completion with failover; returns (content, provider usage).
+
+        Raises asyncio.TimeoutError once `deadline` (time.monotonic) passes,
+        LLMUnavailable when every healthy endpoint has failed, and a
+        non-retryable error (e.g. a 400) as is, without failing over.
+        """
+        deadline = deadline or time.monotonic() + LLM_TIMEOUT_SECONDS
+        params = {"messages": messages, "temperature": temperature}
+        if max_tokens is not None:
+            params["max_tokens"] = max_tokens
+        cost = request_cost(messages, max_tokens)
+
+        tried: Set[Endpoint] = set()
+        last_error: Optional[BaseException] = None
+        while True:
+            endpoint = await self._acquire(cost, tried, deadline)
+            if endpoint is None:
+                raise LLMUnavailable(f"No LLM endpoint available (last error: {last_error})")
+            tried.add(endpoint)
+            try:
+                if self.hedge:
+                    return await self._hedged(endpoint, params, cost, deadline, tried)
+                return await self._attempt(endpoint, params, deadline)
+            except asyncio.TimeoutError:
+                if time.monotonic() >= deadline:
+                    raise
+                last_error = asyncio.TimeoutError()
+            except (httpx.HTTPError, LLMHTTPError, KeyError, IndexError, TypeError, ValueError) as e:
+                if not is_retryable(e):
+                    raise
+                last_error = e
+
+    async def stream(
+        self,
+        messages: List[dict],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        deadline: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """Yield content deltas, failing over only until the first delta.
+
+        Streams are not hedged: two half-read replies cannot be merged.
+        """
+        deadline = deadline or time.monotonic() + LLM_TIMEOUT_SECONDS
+        params = {"messages": messages, "temperature": temperature, "stream": True}
+        if max_tokens is not None:
+            params["max_tokens"] = max_tokens
+        cost = request_cost(messages, max_tokens)
+
+        tried: Set[Endpoint] = set()
+        last_error: Optional[BaseException] = None
+        while True:
+            endpoint = await self._acquire(cost, tried, deadline)
+            if endpoint is None:
+                raise LLMUnavailable(f"No LLM endpoint available (last error: {last_error})")
+            tried.add(endpoint)
+
+            yielded = False
+            try:
+                async for delta in self._stream_attempt(endpoint, params, deadline):
+                    yielded = True
+                    yield delta
+                return
+            except (asyncio.TimeoutError, httpx.HTTPError, LLMHTTPError, KeyError, IndexError, TypeError, ValueError) as e:
+                if yielded or not is_retryable(e) or time.monotonic() >= deadline:
+                    raise
+                last_error = e
+
+    async def _stream_attempt(self, endpoint: Endpoint, params: dict, deadline: float) -> AsyncIterator[str]:
+        endpoint.in_flight += 1
+        started = time.monotonic()
+        outcome = "cancelled"
+        try:
+            async with self._client().stream(
+                "POST", endpoint.url, json=self._payload(endpoint, params), headers=endpoint.headers
+            ) as response:
+                if response.status_code >= 400:
+                    body = await asyncio.wait_for(response.aread(), deadline - time.monotonic())
+                    raise LLMHTTPError(endpoint.name, response.status_code, body.decode("utf-8", "replace"))
+
+                lines = response.aiter_lines().__aiter__()
+                first = True
+                while True:
+                    try:
+                        line = await asyncio.wait_for(lines.__anext__(), deadline - time.monotonic())
+                    except StopAsyncIteration:
+                        break
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get("choices") or []
+                    delta = choices[0].get("delta", {}).get("content") if choices else None
+                    if delta:
+                        if first:
+                            # Time to first token is what routing cares about
+                            endpoint.observe(time.monotonic() - started)
+                            first = False
+                        yield delta
+            outcome = "ok"
+            endpoint.breaker.record_success()
+        except (asyncio.TimeoutError, httpx.HTTPError, LLMHTTPError, KeyError, IndexError, TypeError, ValueError) as e:
+            outcome = "error"
+            if is_retryable(e):
+                endpoint.breaker.record_failure()
+            else:
+                endpoint.breaker.release()
+            raise
+        finally:
+            endpoint.in_flight -= 1
+            if outcome == "cancelled":
+                endpoint.breaker.release()
+            metrics.LLM_ENDPOINT_RESULTS.inc(1, endpoint.name, outcome)
+
+    def stats(self) -> dict:
+        return {
+            "hedging": self.hedge,
+            "endpoints": [e.stats() for e in self.endpoints]
+        }
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+        self._http = None
+
+
+def request_cost(messages: List[dict], max_tokens: Optional[int]) -> float:
+    """Tokens a request may use, for the tokens-per-minute buckets."""
+    prompt = sum(estimate_tokens(m.get("content") or "") for m in messages)
+    return prompt + (max_tokens or 0)
+
+
+llm_router = LLMRouter(load_endpoints())
@@ -0,0 +1,319 @@
+import json
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.config import (
+    SESSION_STORE,
+    SESSION_MAX_ENTRIES,
+    SESSION_IDLE_TTL_SECONDS,
+    SESSION_MAX_BYTES,
+    SESSION_WRITE_RETRIES
+)
+from app.db import SessionLocal, run_in_db
+from app.db_models import HoneypotSession
+from app.models.schemas import ExtractedIntelligence, SessionState
+from app.services.intel_repository import upsert_session_entities
+from app.utils import metrics
+
+# Puts deferred by an open `session_batch` (visible to tasks and threads
+# started inside it, since both copy the current context)
+_pending_puts: ContextVar[Optional[Dict[str, SessionState]]] = ContextVar(
+    "pending_session_puts", default=None
+)
+
+
+class SessionStore(ABC):
+    """Interface for honeypot session state storage."""
+
+    # Whether put() also writes the normalized intelligence entities
+    writes_entities = False
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[SessionState]:
+        ...
+
+    @abstractmethod
+    def put(self, state: SessionState) -> None:
+        ...
+
+    def put_many(self, states: List[SessionState]) -> None:
+        for state in states:
+            self.put(state)
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+def _union(first: list, second: list) -> list:
+    return list(dict.fromkeys(first + second))
+
+
+def merge_states(stored: SessionState, ours: SessionState) -> SessionState:
+    """`ours` plus whatever a concurrent writer saved in `stored` meanwhile.
+
+    Both grew from the same earlier state, so lists are merged as ordered
+    unions, counters take the larger value and flags are or-ed.
+    """
+    merged = ours.copy(deep=True)
+    merged.turn_count = max(stored.turn_count, ours.turn_count)
+    merged.scam_detected = stored.scam_detected or ours.scam_detected
+    merged.persona = stored.persona or ours.persona
+    merged.agent_notes = _union(stored.agent_notes, ours.agent_notes)
+    merged.seen_messages = _union(stored.seen_messages, ours.seen_messages)
+    merged.seen_before = max(stored.seen_before, ours.seen_before)
+    for field in ExtractedIntelligence.__fields__:
+        setattr(merged.extracted_intelligence, field, _union(
+            getattr(stored.extracted_intelligence, field),
+            getattr(ours.extracted_intelligence, field)
+        ))
+
+    log = {json.dumps(entry, sort_keys=True): entry for entry in stored.conversation_log}
+    for entry in ours.conversation_log:
+        log.setdefault(json.dumps(entry, sort_keys=True), entry)
+    merged.conversation_log = sorted(log.values(), key=lambda entry: entry.get("timestamp", 0))
+
+    if stored.summarized_count > ours.summarized_count:
+        merged.summary = stored.summary
+        merged.summarized_count = stored.summarized_count
+    return merged
+
+
+# =====================================================
+# 🧠 In-process backend (LRU + idle TTL)
+# =====================================================
+
+class MemorySessionStore(SessionStore):
+    """Bounded per-process store.
+
+    Entries are kept in least-recently-used order, so idle-expired sessions
+    always sit at the front. Memory is accounted as the size of each
+    state's JSON serialization, measured on every put.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = SESSION_MAX_ENTRIES,
+        idle_ttl: float = SESSION_IDLE_TTL_SECONDS,
+        max_bytes: int = SESSION_MAX_BYTES
+    ):
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.evictions = 0
+        # session_id -> (state, size_bytes, last_access)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[SessionState]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            state, size, last_access = entry
+            if now - last_access > self.idle_ttl:
+                self._remove(session_id)
+                return None
+            self._entries[session_id] = (state, size, now)
+            self._entries.move_to_end(session_id)
+            return state
+
+    def put(self, state: SessionState) -> None:
+        size = len(state.json())
+        now = time.monotonic()
+        with self._lock:
+            if state.sessionId in self._entries:
+                self._remove(state.sessionId)
+            self._entries[state.sessionId] = (state, size, now)
+            self.total_bytes += size
+            self._evict(now)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            if session_id not in self._entries:
+                return False
+            self._remove(session_id)
+            return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, session_id: str) -> None:
+        _, size, _ = self._entries.pop(session_id)
+        self.total_bytes -= size
+
+    def _evict(self, now: float) -> None:
+        """Drop idle-expired sessions, then LRU sessions until within bounds."""
+        while self._entries:
+            session_id, (_, _, last_access) = next(iter(self._entries.items()))
+            over_limit = (
+                len(self._entries) > self.max_entries
+                or self.total_bytes > self.max_bytes
+            )
+            if not over_limit and now - last_access <= self.idle_ttl:
+                break
+            # Never evict the entry that was just written
+            if len(self._entries) == 1:
+                break
+            self._remove(session_id)
+            self.evictions += 1
+
+
+# =====================================================
+# 🗄 Durable backend (HoneypotSession table)
+# =====================================================
+
+class SqlSessionStore(SessionStore):
+    """Store backed by the HoneypotSession table, shared by all workers.
+
+    The full SessionState is kept in `state_json`; the summary columns and
+    the normalized intelligence entities are kept in sync on every put.
+
+    Two workers can read the same session, handle a message each and write
+    it back. Rows are read with SELECT ... FOR UPDATE and carry a version
+    number: a put whose state was read at an older version merges the
+    stored state into its own (merge_states) instead of overwriting it,
+    and a write that still loses the race (StaleDataError, or SQLite's
+    "database is locked", since SQLite ignores FOR UPDATE) is retried. So
+    is an insert that loses to another worker creating the same new
+    session (IntegrityError: FOR UPDATE locks nothing while there is no
+    row yet); the retry finds the row and updates it.
+    """
+
+    writes_entities = True
+
+    def get(self, session_id: str) -> Optional[SessionState]:
+        pending = _pending_puts.get()
+        if pending is not None and session_id in pending:
+            return pending[session_id]
+
+        db = SessionLocal()
+        try:
+            row = db.query(HoneypotSession).filter_by(session_id=session_id).first()
+            if row is None or not row.state_json:
+                return None
+            state = SessionState.parse_raw(row.state_json)
+            state.version = row.version
+            return state
+        finally:
+            db.close()
+
+    def put(self, state: SessionState) -> None:
+        pending = _pending_puts.get()
+        if pending is not None:
+            # Written by the enclosing session_batch
+            pending[state.sessionId] = state
+            return
+        self.put_many([state])
+
+    def put_many(self, states: List[SessionState]) -> None:
+        """Write states in a single transaction."""
+        for attempt in range(SESSION_WRITE_RETRIES + 1):
+            db = SessionLocal()
+            try:
+                written = [self._write(db, state) for state in states]
+                with metrics.stage("db_commit"):
+                    db.commit()
+            except (StaleDataError, OperationalError, IntegrityError):
+                db.rollback()
+                if attempt == SESSION_WRITE_RETRIES:
+                    raise
+                # Jittered so racing writers do not collide again
+                time.sleep(random.uniform(0, 0.02 * 2 ** attempt))
+                continue
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+
+            for state, version in zip(states, written):
+                state.version = version
+            return
+
+    def _write(self, db, state: SessionState) -> int:
+        """Stage one state's row; returns the row version it will have."""
+        row = (
+            db.query(HoneypotSession)
+            .filter_by(session_id=state.sessionId)
+            .with_for_update()
+            .first()
+        )
+        if row is None:
+            row = HoneypotSession(session_id=state.sessionId)
+            db.add(row)
+        elif row.state_json and row.version != state.version:
+            # Saved by another worker since `state` was read
+            state = merge_states(SessionState.parse_raw(row.state_json), state)
+
+        row.state_json = state.json()
+        row.scam_detected = state.scam_detected
+        row.total_messages = state.turn_count
+        row.agent_notes = " ".join(state.agent_notes)
+        upsert_session_entities(db, state.sessionId, state.extracted_intelligence.dict())
+        # Flush so a later state in the same batch sees this row (and the
+        # version check runs now)
+        db.flush()
+        return row.version
+
+    def delete(self, session_id: str) -> bool:
+        db = SessionLocal()
+        try:
+            deleted = db.query(HoneypotSession).filter_by(session_id=session_id).delete()
+            db.commit()
+            return deleted > 0
+        finally:
+            db.close()
+
+    def __len__(self) -> int:
+        db = SessionLocal()
+        try:
+            return db.query(HoneypotSession).filter(HoneypotSession.state_json.isnot(None)).count()
+        finally:
+            db.close()
+
+
+def create_session_store(backend: str = SESSION_STORE) -> SessionStore:
+    """Build the session store selected by SESSION_STORE."""
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sql":
+        return SqlSessionStore()
+    raise ValueError(f"Unknown SESSION_STORE backend: {backend}")
+
+
+session_store = create_session_store()
+
+
+@asynccontextmanager
+async def session_batch(store: SessionStore = session_store):
+    """Group the session writes made inside the block into one transaction.
+
+    Stores that write through to the database (SqlSessionStore) buffer
+    their puts until the block exits, then write the latest state of every
+    touched session with `put_many` on the DB executor. Other stores are
+    unaffected. Gets inside the block see the buffered states.
+    """
+    pending: Dict[str, SessionState] = {}
+    token = _pending_puts.set(pending)
+    try:
+        yield
+    finally:
+        _pending_puts.reset(token)
+        if pending:
+            await run_in_db(store.put_many, list(pending.values()))
@@ -1,12 +1,143 @@
+import asyncio
+import json
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional
+
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
-from app.config import TELEGRAM_BOT_TOKEN
-from app.services.honeypot_agent import honeypot_analyze, reset_conversation
-import json
+from app.config import (
+    TELEGRAM_BOT_TOKEN,
+    TELEGRAM_WEBHOOK_URL,
+    TELEGRAM_WEBHOOK_PATH,
+    TELEGRAM_WEBHOOK_SECRET,
+    TELEGRAM_CONCURRENT_UPDATES,
+    TELEGRAM_CHAT_QUEUE
+)
+from app.agents.persona_manager import persona_registry
+from app.models.schemas import ConversationMessage, HoneypotRequest, IncomingMessage, Metadata
+from app.services.ai_service import analyze_message_async
+from app.services.analysis_cache import cache_key
+from app.services.honeypot_agent import log_exchange, process_honeypot_request_async, reset_session
+from app.services.llm_router import LLMUnavailable
+from app.services.session_store import session_store
+from app.utils.llm_json import LLMOutputError
 
 # Track which users are in honeypot mode
 honeypot_mode_users = set()
 
+# Telegram language_code -> Metadata.language (picks the persona)
+LANGUAGES = {"hi": "Hindi"}
+
+
+# =====================================================
+# 📬 Per-chat ordering
+# =====================================================
+
+class ChatBusy(Exception):
+    pass
+
+
+class ChatQueues:
+    """Run each chat's jobs one at a time, in arrival order.
+
+    Different chats run concurrently. A chat gets a worker task when its
+    first job arrives and the worker exits once the chat's queue is empty,
+    so idle chats cost nothing. A chat with `max_pending` jobs waiting
+    is refused with ChatBusy instead of growing without bound.
+    """
+
+    def __init__(self, max_pending: int = TELEGRAM_CHAT_QUEUE):
+        self.max_pending = max_pending
+        self._queues: Dict[int, deque] = {}
+        self._workers = set()
+
+    async def run(self, chat_id: int, job: Callable[[], Awaitable]):
+        """Queue `job` behind the chat's earlier jobs and wait for its result."""
+        queue = self._queues.get(chat_id)
+        if queue is None:
+            queue = self._queues[chat_id] = deque()
+            worker = asyncio.create_task(self._drain(chat_id, queue))
+            self._workers.add(worker)
+            worker.add_done_callback(self._workers.discard)
+        elif len(queue) >= self.max_pending:
+            raise ChatBusy(chat_id)
+
+        future = asyncio.get_running_loop().create_future()
+        queue.append((job, future))
+        return await future
+
+    def active(self) -> int:
+        return len(self._queues)
+
+    async def _drain(self, chat_id: int, queue: deque) -> None:
+        while queue:
+            job, future = queue.popleft()
+            try:
+                result = await job()
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+        # No await since the last check, so nothing was queued in between
+        del self._queues[chat_id]
+
+
+chat_queues = ChatQueues()
+
+# Analyses in flight, keyed like the analysis cache: the same scam
+# forwarded by many users at once costs one LLM call
+_inflight_analyses: Dict[str, asyncio.Future] = {}
+
+
+async def analyze_shared(message: str) -> dict:
+    """analyze_message_async, shared between concurrent identical messages."""
+    key = cache_key(message)
+    pending = _inflight_analyses.get(key)
+    if pending is None:
+        pending = _inflight_analyses[key] = asyncio.ensure_future(analyze_message_async(message))
+        pending.add_done_callback(lambda _: _inflight_analyses.pop(key, None))
+    # Shielded so one forwarder giving up does not cancel it for the others
+    return json.loads(await asyncio.shield(pending))
+
+
+def honeypot_session_id(user_id: str) -> str:
+    # One honeypot conversation per Telegram user, apart from API sessions
+    return f"telegram-{user_id}"
+
+
+async def honeypot_turn(update: Update) -> tuple:
+    """Run one honeypot turn for the forwarded message; returns (reply, state)."""
+    user = update.effective_user
+    session_id = honeypot_session_id(str(user.id))
+    # Telegram sends no history; the session's own log stands in for it
+    previous = await asyncio.to_thread(session_store.get, session_id)
+    message = IncomingMessage(
+        sender="scammer",
+        text=update.message.text,
+        timestamp=int(update.message.date.timestamp() * 1000)
+    )
+    request = HoneypotRequest(
+        sessionId=session_id,
+        message=message,
+        conversationHistory=[
+            ConversationMessage(**entry) for entry in previous.conversation_log
+        ] if previous else [],
+        metadata=Metadata(
+            channel="Telegram",
+            language=LANGUAGES.get((user.language_code or "")[:2], "English")
+        )
+    )
+    response = await process_honeypot_request_async(request)
+    state = await asyncio.to_thread(log_exchange, session_id, message, response["reply"])
+    return response["reply"], state
+
+
+# =====================================================
+# 🤖 Handlers
+# =====================================================
+
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     welcome = """
 🛡️ **Scam Detection & Honeypot Bot**
@@ -33,7 +164,7 @@ async def honeypot_mode(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(
         "🕵️ **Honeypot Mode ACTIVATED**\n\n"
         "Forward scammer messages here.\n"
-        "I'll respond as 'Ramesh' to extract their details.\n\n"
+        "I'll respond as a potential victim to extract their details.\n\n"
         "Use /detect to switch back to normal mode.",
         parse_mode='Markdown'
     )
@@ -49,57 +180,80 @@ async def detect_mode(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def reset_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = str(update.effective_user.id)
-    reset_conversation(user_id)
-    await update.message.reply_text("🔄 Conversation reset!")
+
+    async def reset():
+        await asyncio.to_thread(reset_session, honeypot_session_id(user_id))
+        await update.message.reply_text("🔄 Conversation reset!")
+
+    # Queued so a reset cannot overtake messages forwarded before it
+    await run_in_chat(update, reset)
+
+async def run_in_chat(update: Update, job: Callable[[], Awaitable]) -> None:
+    try:
+        await chat_queues.run(update.effective_chat.id, job)
+    except ChatBusy:
+        await update.message.reply_text("⏳ Still working on your earlier messages, please wait a moment.")
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = str(update.effective_user.id)
-    message = update.message.text
-    
-    await update.message.chat.send_action("typing")
-    
-    if user_id in honeypot_mode_users:
-        # HONEYPOT MODE
-        result = honeypot_analyze(user_id, message)
-        
-        intel = result["extracted_intelligence"]
-        intel_found = []
-        if intel["upi_id"]: intel_found.append(f"• UPI: `{intel['upi_id']}`")
-        if intel["bank_account"]: intel_found.append(f"• Bank: `{intel['bank_account']}`")
-        if intel["ifsc"]: intel_found.append(f"• IFSC: `{intel['ifsc']}`")
-        if intel["phishing_links"]: intel_found.append(f"• Links: {intel['phishing_links']}")
-        if intel["phone_numbers"]: intel_found.append(f"• Phones: {intel['phone_numbers']}")
-        
-        response = f"""
+    honeypot = user_id in honeypot_mode_users
+
+    async def reply():
+        await update.message.chat.send_action("typing")
+        if honeypot:
+            await reply_honeypot(update)
+        else:
+            await reply_detection(update)
+
+    await run_in_chat(update, reply)
+
+async def reply_honeypot(update: Update):
+    # HONEYPOT MODE
+    reply, state = await honeypot_turn(update)
+    persona = persona_registry.get(state.persona if state else None)
+
+    intel = state.extracted_intelligence if state else None
+    intel_found = []
+    if intel:
+        if intel.upiIds: intel_found.append(f"• UPI: `{', '.join(intel.upiIds)}`")
+        if intel.bankAccounts: intel_found.append(f"• Bank: `{', '.join(intel.bankAccounts)}`")
+        if intel.phishingLinks: intel_found.append(f"• Links: {', '.join(intel.phishingLinks)}")
+        if intel.phoneNumbers: intel_found.append(f"• Phones: {', '.join(intel.phoneNumbers)}")
+
+    response = f"""
 🕵️ **HONEYPOT ANALYSIS**
 
-**Scam Type:** {result['scam_type']}
-**Confidence:** {int(result['confidence']*100)}%
-**Risk Level:** {result['risk_level'].upper()}
-**Turn:** {result['turn_count']}/6
+**Scam Detected:** {"Yes" if state and state.scam_detected else "No"}
+**Scam Type:** {(state.scam_type if state else None) or 'unknown'}
+**Turn:** {state.turn_count if state else 1}
 
 ---
-📤 **Reply as Ramesh:**
-_{result['honeypot_response']}_
+📤 **Reply as {persona.short_name}:**
+_{reply}_
 
 ---
 🔍 **Intel Extracted:**
 {chr(10).join(intel_found) if intel_found else '• None yet'}
 
 ---
-{"✅ **CONVERSATION COMPLETE** - Intel gathered!" if result['conversation_complete'] else "💬 Continue forwarding scammer replies..."}
-        """
-        await update.message.reply_text(response, parse_mode='Markdown')
-        
-    else:
-        # NORMAL DETECTION MODE
-        from app.services.ai_service import analyze_message
-        result = json.loads(analyze_message(message))
-        
-        emoji = "🚨" if result["is_scam"] else "✅"
-        status = "SCAM DETECTED" if result["is_scam"] else "LOOKS SAFE"
-        
-        response = f"""
+💬 Continue forwarding scammer replies...
+    """
+    await update.message.reply_text(response, parse_mode='Markdown')
+
+async def reply_detection(update: Update):
+    # NORMAL DETECTION MODE
+    try:
+        result = await analyze_shared(update.message.text)
+    except (LLMOutputError, LLMUnavailable):
+        await update.message.reply_text(
+            "⚠️ I couldn't analyze this message right now. Please forward it again in a moment."
+        )
+        return
+
+    emoji = "🚨" if result["is_scam"] else "✅"
+    status = "SCAM DETECTED" if result["is_scam"] else "LOOKS SAFE"
+
+    response = f"""
 {emoji} **{status}**
 
 **Confidence:** {result['confidence']}%
@@ -109,8 +263,8 @@ _{result['honeypot_response']}_
 {chr(10).join(['• ' + f for f in result['red_flags']]) if result['red_flags'] else '• None'}
 
 **Advice:** {result['advice']}
-        """
-        await update.message.reply_text(response, parse_mode='Markdown')
+    """
+    await update.message.reply_text(response, parse_mode='Markdown')
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     help_text = """
@@ -121,7 +275,7 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 - Returns confidence & red flags
 
 **2. Honeypot Mode** (/honeypot)
-- Pretends to be victim "Ramesh"
+- Pretends to be a victim (persona picked per user)
 - Engages scammers
 - Extracts UPI, bank details, links
 
@@ -132,19 +286,72 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     await update.message.reply_text(help_text, parse_mode='Markdown')
 
-def run_bot():
-    print("🤖 Starting Honeypot Bot...")
-    app = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
-    
+
+# =====================================================
+# 🚀 Running the bot
+# =====================================================
+
+def build_application(webhook: bool = False) -> Application:
+    """The bot with concurrent update handling (per-chat order is kept by
+    chat_queues). Webhook mode has no Updater; updates are fed in by the
+    API process instead."""
+    builder = Application.builder().token(TELEGRAM_BOT_TOKEN).concurrent_updates(TELEGRAM_CONCURRENT_UPDATES)
+    if webhook:
+        builder = builder.updater(None)
+    app = builder.build()
+
     app.add_handler(CommandHandler("start", start_command))
     app.add_handler(CommandHandler("help", help_command))
     app.add_handler(CommandHandler("honeypot", honeypot_mode))
     app.add_handler(CommandHandler("detect", detect_mode))
     app.add_handler(CommandHandler("reset", reset_command))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
-    
+    return app
+
+def run_bot():
+    print("🤖 Starting Honeypot Bot...")
+    app = build_application()
     print("✅ Bot running! Press Ctrl+C to stop.")
     app.run_polling(allowed_updates=Update.ALL_TYPES)
 
+
+webhook_app: Optional[Application] = None
+
+async def start_webhook() -> None:
+    """Start the bot inside the API process and register the webhook."""
+    global webhook_app
+    bot_app = build_application(webhook=True)
+    await bot_app.initialize()
+    await bot_app.start()
+    # Published only once running, so feed_update never sees a half-started bot
+    webhook_app = bot_app
+    await webhook_app.bot.set_webhook(
+        url=TELEGRAM_WEBHOOK_URL.rstrip("/") + TELEGRAM_WEBHOOK_PATH,
+        secret_token=TELEGRAM_WEBHOOK_SECRET,
+        allowed_updates=Update.ALL_TYPES,
+        max_connections=100
+    )
+    print("✅ Telegram webhook registered")
+
+async def stop_webhook() -> None:
+    global webhook_app
+    if webhook_app is None:
+        return
+    bot_app, webhook_app = webhook_app, None
+    await bot_app.stop()
+    await bot_app.shutdown()
+
+async def feed_update(data: dict) -> bool:
+    """Hand a webhook update to the bot; it is processed in the background.
+    
+    Returns False when the bot is not running (not yet started, failed to
+    start, or shut down) so the caller can ask Telegram to retry.
+    """
+    bot_app = webhook_app
+    if bot_app is None:
+        return False
+    await bot_app.update_queue.put(Update.de_json(data, bot_app.bot))
+    return True
+
 if __name__ == "__main__":
-    run_bot()
\ No newline at end of file
+    run_bot()
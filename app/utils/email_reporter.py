@@ -1,50 +1,303 @@
 import smtplib
+import threading
+from collections import OrderedDict
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import os
+from typing import Dict, List, Optional, Set
 
-CYBERCRIME_EMAIL = "report@cybercrime.gov.in"  # demo target
+from app.config import (
+    SMTP_HOST,
+    SMTP_PORT,
+    SMTP_STARTTLS,
+    SMTP_TIMEOUT_SECONDS,
+    REPORT_EMAIL,
+    REPORT_EMAIL_PASSWORD,
+    REPORT_EMAIL_TO,
+    REPORT_DIGEST_SECONDS,
+    REPORT_MAX_RETRIES,
+    REPORT_BACKOFF_SECONDS
+)
+from app.utils import metrics
 
+CYBERCRIME_EMAIL = REPORT_EMAIL_TO  # demo target
+MAX_DIGEST_MESSAGES = 20
+MAX_REPORTED_SESSIONS = 10000
 
-def send_scam_report(session_id, message, upi, phone, timestamp):
-    sender_email = os.getenv("REPORT_EMAIL")
-    sender_password = os.getenv("REPORT_EMAIL_PASSWORD")
-    
-    print("Sender:", sender_email)
-    print("Password loaded:", bool(sender_password))
+# Outcomes of one send attempt
+SEND_OK = "sent"
+SEND_REJECTED = "rejected"
+SEND_RETRY = "retry"
 
-    subject = f"Scam Report - Session {session_id}"
 
-    body = f"""
-    🚨 Scam Interaction Detected
-
-    Session ID: {session_id}
-    Timestamp: {timestamp}
+def connect_smtp() -> smtplib.SMTP:
+    """Open one SMTP connection, authenticated if the server offers AUTH."""
+    server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT_SECONDS)
+    server.ehlo()
+    if SMTP_STARTTLS and server.has_extn("starttls"):
+        server.starttls()
+        server.ehlo()
+    # Local debugging servers (aiosmtpd, DebuggingServer) have no AUTH
+    if REPORT_EMAIL and REPORT_EMAIL_PASSWORD and server.has_extn("auth"):
+        server.login(REPORT_EMAIL, REPORT_EMAIL_PASSWORD)
+    return server
 
-    Message:
-    {message}
 
-    Extracted Intelligence:
-    UPI ID: {upi}
-    Phone: {phone}
+def build_digest_email(digest: dict) -> MIMEMultipart:
+    """One report email for everything a session revealed since the last digest."""
+    session_id = digest["session_id"]
+    messages = digest["messages"]
 
-    Generated by AI Scam Honeypot System
-    """
+    lines = [
+        "🚨 Scam Interaction Detected",
+        "",
+        f"Session ID: {session_id}",
+        f"First seen: {digest['first_seen']}",
+        f"Last seen: {messages[-1][0]}",
+        "",
+        "Extracted Intelligence:",
+        f"UPI IDs: {', '.join(digest['upi_ids']) or 'N/A'}",
+        f"Phones: {', '.join(digest['phone_numbers']) or 'N/A'}",
+        "",
+        f"Messages ({digest['message_count']}):",
+    ]
+    lines.extend(f"[{timestamp}] {text}" for timestamp, text in messages)
+    lines.extend(["", "Generated by AI Scam Honeypot System"])
 
     msg = MIMEMultipart()
-    msg["From"] = sender_email
+    msg["From"] = REPORT_EMAIL or "honeypot@localhost"
     msg["To"] = CYBERCRIME_EMAIL
-    msg["Subject"] = subject
+    msg["Subject"] = f"Scam Report - Session {session_id}"
+    msg.attach(MIMEText("\n".join(lines), "plain"))
+    return msg
 
-    msg.attach(MIMEText(body, "plain"))
 
-    try:
-        server = smtplib.SMTP("smtp.gmail.com", 587)
-        server.starttls()
-        server.login(sender_email, sender_password)
-        server.send_message(msg)
-        server.quit()
-        print("✅ Scam report email sent")
+# =====================================================
+# 📮 Background Reporter
+# =====================================================
+
+class ScamReporter:
+    """Mail scam reports from a background thread.
+
+    Reports are merged into one digest per session and flushed every
+    `interval` seconds over a single SMTP connection that stays open
+    between flushes. Intel already mailed (or already waiting in a digest)
+    for a session is not reported again.
+
+    A transient failure ends the flush: the unsent digests go back in the
+    queue and the next flush is attempted on a fresh connection after an
+    exponential backoff (the first `max_retries` retries come sooner than
+    `interval`). Digests the server rejects outright are dropped. Without
+    an SMTP host and recipient (`enabled` false) reports are not queued.
+    """
+
+    def __init__(
+        self,
+        interval: float = REPORT_DIGEST_SECONDS,
+        max_retries: int = REPORT_MAX_RETRIES,
+        backoff: float = REPORT_BACKOFF_SECONDS,
+        connect=connect_smtp,
+        enabled: bool = bool(SMTP_HOST and REPORT_EMAIL_TO)
+    ):
+        self.interval = interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.connect = connect
+        self.enabled = enabled
+        self.stats = {
+            "queued": 0, "deduplicated": 0, "disabled": 0, "sent": 0,
+            "failed": 0, "requeued": 0, "connections": 0
+        }
+        # Consecutive flushes that ended in a transient failure
+        self._failed_flushes = 0
+
+        self._digests: Dict[str, dict] = {}
+        # session_id -> intel already mailed (bounded)
+        self._reported: "OrderedDict[str, Set[str]]" = OrderedDict()
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(
+        self,
+        session_id: str,
+        message: str,
+        upi_ids: List[str],
+        phone_numbers: List[str],
+        timestamp: str
+    ) -> bool:
+        """Add a report to the session's digest; False if it adds no new intel."""
+        if not self.enabled:
+            self.stats["disabled"] += 1
+            return False
+
+        with self._lock:
+            digest = self._digests.get(session_id)
+            seen = set(self._reported.get(session_id, ()))
+            if digest is not None:
+                seen.update(digest["upi_ids"], digest["phone_numbers"])
+
+            new_upi = [v for v in dict.fromkeys(upi_ids) if v not in seen]
+            new_phones = [v for v in dict.fromkeys(phone_numbers) if v not in seen]
+            if not new_upi and not new_phones:
+                self.stats["deduplicated"] += 1
+                return False
+
+            if digest is None:
+                digest = self._digests[session_id] = {
+                    "session_id": session_id,
+                    "first_seen": timestamp,
+                    "message_count": 0,
+                    "messages": [],
+                    "upi_ids": [],
+                    "phone_numbers": []
+                }
+            digest["message_count"] += 1
+            digest["messages"].append((timestamp, message))
+            del digest["messages"][:-MAX_DIGEST_MESSAGES]
+            digest["upi_ids"].extend(new_upi)
+            digest["phone_numbers"].extend(new_phones)
+            self.stats["queued"] += 1
+            self._ensure_worker()
+            return True
+
+    def pending(self) -> int:
+        return len(self._digests)
+
+    def flush(self) -> int:
+        """Send every waiting digest now; returns how many were delivered.
+
+        Stops at the first transient failure and puts the unsent digests
+        back in the queue.
+        """
+        with self._lock:
+            digests, self._digests = self._digests, {}
+
+        pending = list(digests.values())
+        sent = 0
+        while pending:
+            digest = pending[0]
+            with metrics.stage("email"):
+                outcome = self._send(build_digest_email(digest))
+            if outcome == SEND_RETRY:
+                self._requeue(pending)
+                self._failed_flushes += 1
+                return sent
+
+            pending.pop(0)
+            if outcome == SEND_OK:
+                sent += 1
+                self.stats["sent"] += 1
+                metrics.EMAIL_RESULTS.inc(1, "sent")
+                self._mark_reported(digest)
+            else:
+                self.stats["failed"] += 1
+                metrics.EMAIL_RESULTS.inc(1, "failed")
+                print(f"❌ Scam report for session {digest['session_id']} rejected")
+
+        self._failed_flushes = 0
+        return sent
+
+    def next_flush_delay(self) -> float:
+        """Seconds until the next flush: `interval`, or a backoff after failures."""
+        if not self._failed_flushes or self._failed_flushes > self.max_retries:
+            return self.interval
+        return min(self.interval, self.backoff * (2 ** (self._failed_flushes - 1)))
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Flush what is waiting, then stop the worker and close the connection."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="scam-reporter", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.next_flush_delay()):
+            self.flush()
+        self.flush()
+        self._disconnect()
+        if self._digests:
+            print(f"❌ {len(self._digests)} scam report(s) unsent at shutdown")
+
+    def _requeue(self, digests: List[dict]) -> None:
+        """Put unsent digests back, merging reports that arrived meanwhile."""
+        with self._lock:
+            for digest in digests:
+                newer = self._digests.get(digest["session_id"])
+                if newer is not None:
+                    digest["message_count"] += newer["message_count"]
+                    digest["messages"].extend(newer["messages"])
+                    del digest["messages"][:-MAX_DIGEST_MESSAGES]
+                    digest["upi_ids"] = list(dict.fromkeys(digest["upi_ids"] + newer["upi_ids"]))
+                    digest["phone_numbers"] = list(dict.fromkeys(
+                        digest["phone_numbers"] + newer["phone_numbers"]
+                    ))
+                self._digests[digest["session_id"]] = digest
+            self.stats["requeued"] += len(digests)
+
+    def _mark_reported(self, digest: dict) -> None:
+        with self._lock:
+            reported = self._reported.setdefault(digest["session_id"], set())
+            reported.update(digest["upi_ids"], digest["phone_numbers"])
+            self._reported.move_to_end(digest["session_id"])
+            while len(self._reported) > MAX_REPORTED_SESSIONS:
+                self._reported.popitem(last=False)
+
+    def _send(self, msg: MIMEMultipart) -> str:
+        """One attempt: SEND_OK, SEND_REJECTED (permanent) or SEND_RETRY."""
+        try:
+            self._connection().send_message(msg)
+            print("✅ Scam report email sent")
+            return SEND_OK
+        except smtplib.SMTPRecipientsRefused as e:
+            print("❌ Email rejected:", e)
+            return SEND_REJECTED
+        except smtplib.SMTPResponseException as e:
+            print("❌ Email failed:", e)
+            self._disconnect()
+            # 5xx is permanent; the same message will not go through
+            return SEND_REJECTED if e.smtp_code >= 500 else SEND_RETRY
+        except (smtplib.SMTPException, OSError) as e:
+            print("❌ Email failed:", e)
+            self._disconnect()
+            return SEND_RETRY
+
+    def _connection(self) -> smtplib.SMTP:
+        """The open connection, reconnecting if the server dropped it."""
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._disconnect()
+
+        self._smtp = self.connect()
+        self.stats["connections"] += 1
+        return self._smtp
+
+    def _disconnect(self) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+
+
+scam_reporter = ScamReporter()
+
 
-    except Exception as e:
-        print("❌ Email failed:", e)
\ No newline at end of file
+def send_scam_report(session_id, message, upi_ids, phone_numbers, timestamp) -> bool:
+    """Queue a report for the next digest (non-blocking)."""
+    return scam_reporter.submit(session_id, message, upi_ids, phone_numbers, timestamp)
@@ -0,0 +1,231 @@
+"""Turning LLM output into JSON.
+
+`parse_llm_output` is the one entry point for complete replies: it finds
+the first balanced object (ignoring prose and code fences around it),
+repairs the defects models commonly emit, validates the result against a
+Pydantic model and counts clean, repaired and failed parses per schema.
+`StreamingFieldExtractor` decodes one field while the reply is streaming.
+"""
+import json
+import re
+from typing import List, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from app.utils import metrics
+
+ESCAPES = {
+    '"': '"', "\\": "\\", "/": "/",
+    "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t",
+}
+
+# Contents of the first ``` fence (the closing fence may be cut off)
+CODE_FENCE = re.compile(r"```[a-zA-Z]*\s*(.*?)(?:```|$)", re.DOTALL)
+# What the brace scanner stops at; escape pairs are consumed whole
+STRUCTURAL = re.compile(r'\\.|["\'{}\[\]]', re.DOTALL)
+# One repair pass: strings are matched first so nothing inside them is touched
+REPAIRABLE = re.compile(
+    r'"(?:[^"\\]|\\.)*"'
+    r"|'((?:[^'\\]|\\.)*)'"
+    r"|,(?=\s*[}\]])"
+    r"|\b(True|False|None)\b",
+    re.DOTALL
+)
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class LLMOutputError(ValueError):
+    """The model's reply held no usable JSON for the expected schema."""
+
+
+def strip_code_fences(text: str) -> str:
+    match = CODE_FENCE.search(text)
+    return match.group(1) if match else text
+
+
+def find_json_object(text: str) -> Tuple[Optional[str], bool]:
+    """The first top-level {...} in `text` and whether it was complete.
+
+    Braces are matched by depth outside strings (single- or double-quoted),
+    so trailing prose or a second object is ignored where a greedy regex
+    would swallow it. An object cut off mid-way is closed (open string,
+    then brackets in reverse) and reported as incomplete.
+    """
+    start = text.find("{")
+    if start < 0:
+        return None, False
+
+    closers: List[str] = []
+    quote = None
+    for match in STRUCTURAL.finditer(text, start):
+        c = match.group()
+        if quote:
+            if c == quote:
+                quote = None
+        elif c in "\"'":
+            quote = c
+        elif c == "{":
+            closers.append("}")
+        elif c == "[":
+            closers.append("]")
+        elif c in "}]" and closers:
+            closers.pop()
+            if not closers:
+                return text[start:match.end()], True
+
+    candidate = text[start:]
+    if candidate.endswith("\\"):
+        candidate = candidate[:-1]
+    return candidate + (quote or "") + "".join(reversed(closers)), False
+
+
+def _repair_token(match) -> str:
+    token = match.group()
+    if token.startswith('"'):
+        return token
+    if token.startswith("'"):
+        body = match.group(1).replace("\\'", "'").replace('"', '\\"')
+        return '"' + body + '"'
+    if token == ",":
+        return ""
+    return PYTHON_LITERALS[match.group(2)]
+
+
+def repair_json(candidate: str) -> str:
+    """Fix single-quoted strings, trailing commas and Python literals."""
+    return REPAIRABLE.sub(_repair_token, candidate)
+
+
+def parse_json_object(text: str) -> Tuple[dict, bool]:
+    """Parse the first JSON object in a model reply; returns (object, repaired)."""
+    candidate, complete = find_json_object(strip_code_fences(text or ""))
+    if candidate is None:
+        raise LLMOutputError("No JSON object found")
+
+    repaired = not complete
+    try:
+        result = json.loads(candidate)
+    except ValueError:
+        try:
+            result = json.loads(repair_json(candidate))
+        except ValueError as e:
+            raise LLMOutputError(f"Unparseable JSON: {e}") from e
+        repaired = True
+
+    if not isinstance(result, dict):
+        raise LLMOutputError("Expected a JSON object")
+    return result, repaired
+
+
+def parse_llm_output(text: str, model: Type[T], schema: str) -> T:
+    """Parse and validate a model reply, counting the outcome under `schema`."""
+    try:
+        data, repaired = parse_json_object(text)
+        result = model.parse_obj(data)
+    except (LLMOutputError, ValidationError) as e:
+        metrics.LLM_JSON_PARSE.inc(1, schema, "failed")
+        raise LLMOutputError(str(e)) from e
+    metrics.LLM_JSON_PARSE.inc(1, schema, "repaired" if repaired else "clean")
+    return result
+
+
+class StreamingFieldExtractor:
+    """Pull one top-level string field out of a JSON object while it streams.
+
+    Feed raw model output chunk by chunk; `feed` returns the newly decoded
+    characters of the target field's value, so the reply can be shown
+    before the rest of the object (is_scam, scam_type, ...) has arrived.
+    Anything before the first "{" (prose, code fences) is ignored, and the
+    full text is kept in `text` for a final parse.
+    """
+
+    def __init__(self, field: str = "reply"):
+        self.field = field
+        self.text_parts: List[str] = []
+        self.value_parts: List[str] = []
+        self.done = False
+
+        self._depth = 0
+        self._in_string = False
+        self._is_target = False
+        self._escape = False
+        self._unicode: Optional[List[str]] = None
+        self._high_surrogate: Optional[int] = None
+        self._buffer: List[str] = []
+        self._last_key: Optional[str] = None
+        self._after_colon = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self.text_parts)
+
+    @property
+    def value(self) -> str:
+        return "".join(self.value_parts)
+
+    def feed(self, chunk: str) -> str:
+        self.text_parts.append(chunk)
+        out: List[str] = []
+
+        for c in chunk:
+            if self._in_string:
+                self._string_char(c, out)
+            elif self._depth == 0:
+                if c == "{":
+                    self._depth = 1
+            elif c == '"':
+                self._in_string = True
+                self._is_target = (
+                    self._depth == 1 and self._after_colon
+                    and self._last_key == self.field and not self.done
+                )
+                self._buffer = []
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+            elif c == ":":
+                self._after_colon = True
+            elif c == ",":
+                self._after_colon = False
+                self._last_key = None
+
+        decoded = "".join(out)
+        self.value_parts.append(decoded)
+        return decoded
+
+    def _string_char(self, c: str, out: List[str]) -> None:
+        target = out if self._is_target else self._buffer
+
+        if self._unicode is not None:
+            self._unicode.append(c)
+            if len(self._unicode) == 4:
+                code = int("".join(self._unicode), 16)
+                self._unicode = None
+                if 0xD800 <= code < 0xDC00:
+                    self._high_surrogate = code
+                    return
+                if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+                    code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+                self._high_surrogate = None
+                target.append(chr(code))
+        elif self._escape:
+            self._escape = False
+            if c == "u":
+                self._unicode = []
+            else:
+                target.append(ESCAPES.get(c, c))
+        elif c == "\\":
+            self._escape = True
+        elif c == '"':
+            self._in_string = False
+            if self._is_target:
+                self.done = True
+                self._is_target = False
+            elif self._depth == 1 and not self._after_colon:
+                self._last_key = "".join(self._buffer)
+            self._after_colon = False
+        else:
+            target.append(c)
@@ -0,0 +1,109 @@
+import re
+from typing import List
+
+from app.config import (
+    CONTEXT_TOKEN_BUDGET,
+    CONTEXT_KEEP_TURNS,
+    CONTEXT_SUMMARY_TOKENS
+)
+from app.models.schemas import HoneypotRequest, SessionState
+
+SENTENCE_END = re.compile(r"(?<=[.!?।])\s")
+SUMMARY_LINE_CHARS = 160
+DEFAULT_PERSONA_NAME = "Ramesh"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for Latin/Hinglish text)."""
+    return len(text) // 4 + 1
+
+
+def speaker(sender: str, persona_name: str = DEFAULT_PERSONA_NAME) -> str:
+    """Transcript label: SCAMMER, or the persona's name for our own messages."""
+    return "SCAMMER" if sender == "scammer" else persona_name.upper()
+
+
+def summarize_message(sender: str, text: str, persona_name: str = DEFAULT_PERSONA_NAME) -> str:
+    """One compact summary line: the first sentence, clipped."""
+    first = SENTENCE_END.split(text.strip(), 1)[0]
+    if len(first) > SUMMARY_LINE_CHARS:
+        first = first[:SUMMARY_LINE_CHARS - 1] + "…"
+    return f"{speaker(sender, persona_name)}: {first}"
+
+
+def fold_into_summary(state: SessionState, lines: List[str], max_tokens: int) -> None:
+    """Append summary lines and drop the oldest ones beyond the budget."""
+    summary_lines = state.summary.split("\n") if state.summary else []
+    summary_lines.extend(lines)
+    while len(summary_lines) > 1 and estimate_tokens("\n".join(summary_lines)) > max_tokens:
+        summary_lines.pop(0)
+    state.summary = "\n".join(summary_lines)
+
+
+def build_context(
+    request: HoneypotRequest,
+    state: SessionState,
+    budget: int = CONTEXT_TOKEN_BUDGET,
+    keep_turns: int = CONTEXT_KEEP_TURNS,
+    summary_budget: int = CONTEXT_SUMMARY_TOKENS,
+    persona_name: str = DEFAULT_PERSONA_NAME
+) -> str:
+    """Conversation context for the prompt, bounded to `budget` tokens.
+
+    The last `keep_turns` history messages and the current message are kept
+    verbatim. Older messages are folded into `state.summary` exactly once
+    (tracked by `state.summarized_count`), so each turn only summarizes the
+    messages that just aged out of the verbatim window. Window messages
+    that do not fit the budget are folded in the same way rather than
+    dropped. Our own messages are labelled with `persona_name`, the
+    session persona's short name.
+    """
+    history = request.conversationHistory
+
+    # History was reset or rewritten by the client: start the summary over
+    if state.summarized_count > len(history):
+        state.summary = ""
+        state.summarized_count = 0
+
+    current = f"SCAMMER: {request.message.text}"
+    verbatim_start = max(state.summarized_count, len(history) - keep_turns)
+
+    while True:
+        if verbatim_start > state.summarized_count:
+            fold_into_summary(state, [
+                summarize_message(msg.sender, msg.text, persona_name)
+                for msg in history[state.summarized_count:verbatim_start]
+            ], summary_budget)
+            state.summarized_count = verbatim_start
+
+        remaining = budget - estimate_tokens(state.summary) - estimate_tokens(current)
+
+        # Newest first, until the verbatim budget runs out
+        recent: List[str] = []
+        for msg in reversed(history[verbatim_start:]):
+            line = f"{speaker(msg.sender, persona_name)}: {msg.text}"
+            cost = estimate_tokens(line)
+            if cost > remaining:
+                break
+            recent.append(line)
+            remaining -= cost
+        recent.reverse()
+
+        # Older window messages that did not fit go to the summary, which
+        # may now crowd out more of the window
+        fits_from = len(history) - len(recent)
+        if fits_from == verbatim_start:
+            break
+        verbatim_start = fits_from
+
+    if remaining < 0:
+        # The current message alone is over budget
+        current = current[:max(0, budget - estimate_tokens(state.summary)) * 4] + "…"
+
+    parts = []
+    if state.summary:
+        parts.append("[Earlier in the conversation, summarized]\n" + state.summary)
+        parts.append("[Recent messages]")
+    parts.extend(recent)
+    parts.append(current)
+    return "\n".join(parts)
@@ -0,0 +1,245 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Counters and histograms are updated from request handlers and worker
+threads (each metric has its own lock); gauges are callbacks evaluated at
+scrape time, so nothing has to keep them current.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; spans regex-fast stages up to slow LLM calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+
+class Registry:
+    """The metrics rendered together on one scrape."""
+
+    def __init__(self):
+        self._metrics: List = []
+        self._lock = threading.Lock()
+
+    def register(self, metric) -> None:
+        with self._lock:
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        """All registered metrics as a Prometheus text payload."""
+        with self._lock:
+            registered = list(self._metrics)
+        lines: List[str] = []
+        for metric in registered:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Served by /metrics; metrics register here unless given another registry
+REGISTRY = Registry()
+
+
+def _escape(value) -> str:
+    """A label value as the exposition format requires: \\, \" and \n escaped."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labelnames: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Registry = REGISTRY
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(self.labelnames, labels)} {_format(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Registry = REGISTRY
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> (per-bucket counts incl. +Inf, sum)
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format(bound) + '"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, labels, le)} {cumulative}")
+            label_text = _label_text(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """A value read at scrape time; `cache_seconds` reuses a costly read."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        read: Callable[[], float],
+        cache_seconds: float = 0.0,
+        registry: Registry = REGISTRY
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+        self.cache_seconds = cache_seconds
+        self._cached: Optional[Tuple[float, float]] = None  # (read at, value)
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def value(self) -> float:
+        if not self.cache_seconds:
+            return self.read()
+        with self._lock:
+            now = time.monotonic()
+            if self._cached is None or now - self._cached[0] >= self.cache_seconds:
+                self._cached = (now, self.read())
+            return self._cached[1]
+
+    def render(self) -> List[str]:
+        try:
+            value = self.value()
+        except Exception:
+            # A broken gauge must not take the whole scrape down
+            return []
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {_format(value)}"
+        ]
+
+
+def render() -> str:
+    """Everything in REGISTRY as a Prometheus text payload."""
+    return REGISTRY.render()
+
+
+# =====================================================
+# 📊 Honeypot pipeline metrics
+# =====================================================
+
+STAGE_SECONDS = Histogram(
+    "honeypot_stage_seconds",
+    "Time spent in each honeypot pipeline stage.",
+    ("stage",)
+)
+LLM_TTFT_SECONDS = Histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from sending a streaming LLM request to its first content delta."
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "LLM tokens sent and received (provider usage, or estimated when absent).",
+    ("direction",)
+)
+LLM_ENDPOINT_RESULTS = Counter(
+    "llm_endpoint_requests_total",
+    "Requests sent by the LLM router per endpoint, by outcome.",
+    ("endpoint", "outcome")
+)
+LLM_HEDGES = Counter(
+    "llm_hedged_requests_total",
+    "Hedged LLM requests by which request answered first (primary or hedge).",
+    ("winner",)
+)
+LLM_JSON_RESULTS = Counter(
+    "llm_json_results_total",
+    "Outcome of turning an LLM reply into a result (ok or fallback).",
+    ("outcome",)
+)
+LLM_JSON_PARSE = Counter(
+    "llm_json_parse_total",
+    "LLM replies parsed per schema: clean, repaired (fixed up before it validated) or failed.",
+    ("schema", "outcome")
+)
+CALLBACK_RESULTS = Counter(
+    "guvi_callback_results_total",
+    "GUVI callback attempts by outcome.",
+    ("outcome",)
+)
+INDEX_LOADS = Counter(
+    "index_loads_total",
+    "Rebuilds of an in-memory index from the DB, by index and outcome (ok or failed).",
+    ("index", "outcome")
+)
+EMAIL_RESULTS = Counter(
+    "scam_report_emails_total",
+    "Scam report email sends by outcome.",
+    ("outcome",)
+)
+
+
+def stage(name: str):
+    """Time a pipeline stage: `with metrics.stage("extraction"): ...`"""
+    return STAGE_SECONDS.time(name)
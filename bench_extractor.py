@@ -0,0 +1,52 @@
+"""Microbenchmark: legacy per-pattern extraction vs the compiled extractor engine."""
+import re
+import timeit
+
+from app.agents.intelligence_extractor import SUSPICIOUS_KEYWORDS, extract
+
+MESSAGES = [
+    "URGENT: Your SBI account will be blocked today. Update KYC immediately "
+    "at http://sbi-kyc-update.in/verify or call 9876543210.",
+    "Sir aapka lottery prize Rs 25,00,000 nikla hai. Processing fee bhejo "
+    "winner.claim@okaxis pe, account 123456789012 IFSC SBIN0001234.",
+    "Hello, this is from the refund department. Share the OTP sent to "
+    "+91 9123456780 to receive your cashback.",
+    "Kal milte hain shop pe, 5 baje tak aa jana.",
+]
+
+
+def legacy_extract(text: str) -> dict:
+    """The previous five-regex + keyword-loop implementation."""
+    extracted = {
+        "upiIds": list(set(re.findall(r'[a-zA-Z0-9.\-_]{3,}@[a-zA-Z]{3,}', text.lower()))),
+        "bankAccounts": list(set(re.findall(r'\b\d{9,18}\b', text))),
+        "phishingLinks": list(set(re.findall(r'https?://[^\s<>"{}|\\^`\[\]]+', text))),
+        "phoneNumbers": list(set(re.findall(r'(?:\+91[\-\s]?)?[6-9]\d{9}\b', text))),
+        "suspiciousKeywords": [],
+    }
+    extracted["bankAccounts"].extend(re.findall(r'\b[A-Z]{4}0[A-Z0-9]{6}\b', text.upper()))
+    text_lower = text.lower()
+    for keyword in SUSPICIOUS_KEYWORDS:
+        if keyword in text_lower:
+            extracted["suspiciousKeywords"].append(keyword)
+    return extracted
+
+
+def run_all(fn):
+    for message in MESSAGES:
+        fn(message)
+
+
+if __name__ == "__main__":
+    number = 20000
+    print("Benchmarking intelligence extraction...")
+    print("=" * 50)
+
+    for name, fn in (("legacy", legacy_extract), ("compiled", extract)):
+        seconds = min(timeit.repeat(lambda: run_all(fn), number=number, repeat=5))
+        per_message_us = seconds / (number * len(MESSAGES)) * 1e6
+        print(f"{name:>12}: {per_message_us:.2f} µs/message")
+
+    print("=" * 50)
+    for message in MESSAGES:
+        print(extract(message))
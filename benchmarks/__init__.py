@@ -0,0 +1 @@
+"""Offline load tests and a fake LLM server (see load_test.py)."""
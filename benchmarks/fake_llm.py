@@ -0,0 +1,169 @@
+"""Local stand-in for the Groq / OpenAI chat completions API.
+
+Answers with canned JSON in the shape the honeypot and /analyze prompts
+ask for, after a configurable time-to-first-token and at a configurable
+token rate, so load tests measure our code instead of the provider.
+
+    python -m benchmarks.fake_llm --port 9100 --latency-ms 300 --tokens-per-second 200
+    GROQ_BASE_URL=http://127.0.0.1:9100 uvicorn app.main:app
+
+Failure injection (--error-rate, --slow-rate/--slow-ms) makes it a stand-in
+for a provider incident; run two on different ports and list both in
+LLM_ENDPOINTS to exercise the router's failover, breakers and hedging:
+
+    LLM_ENDPOINTS='[{"name": "a", "base_url": "http://127.0.0.1:9100/v1"},
+                    {"name": "b", "base_url": "http://127.0.0.1:9101/v1"}]'
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+HONEYPOT_REPLIES = [
+    "Sir, mujhe samajh nahi aaya. Aap konse bank se bol rahe ho?",
+    "Theek hai sir, UPI ID phir se bhejiye, mere phone mein nahi dikha.",
+    "Kya aap sure hain? Mera account safe hai na? Link kaha click karun?",
+    "Sir mera beta ghar pe nahi hai, aap apna number de do main call karta hoon.",
+]
+
+
+class FakeLLMConfig:
+    latency_ms = 300.0
+    jitter_ms = 50.0
+    tokens_per_second = 200.0
+    # Fraction of requests answered with HTTP 503
+    error_rate = 0.0
+    # Fraction of requests delayed by slow_ms on top of the normal latency
+    slow_rate = 0.0
+    slow_ms = 5000.0
+
+
+config = FakeLLMConfig()
+app = FastAPI(title="Fake LLM")
+
+
+def completion_text(messages: list) -> str:
+    """JSON the calling prompt expects (honeypot persona or scam analysis)."""
+    system = " ".join(m.get("content", "") for m in messages if m.get("role") == "system")
+    if "Agentic Honeypot" in system:
+        return json.dumps({
+            "is_scam": True,
+            "scam_type": "upi_fraud",
+            "confidence": 0.9,
+            "reply": random.choice(HONEYPOT_REPLIES),
+            "suspicious_keywords": ["urgent", "kyc"],
+            "reasoning": "Asks for payment to an unknown UPI ID"
+        })
+    return json.dumps({
+        "is_scam": True,
+        "confidence": 90,
+        "scam_type": "phishing",
+        "red_flags": ["Urgency", "Requests payment"],
+        "explanation": "The message pressures the reader to pay immediately.",
+        "advice": "Do not pay or share OTPs; report to 1930."
+    })
+
+
+def split_tokens(text: str) -> list:
+    # ~4 characters per token, like the providers' tokenizers on average
+    return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+
+async def first_token_delay() -> None:
+    delay = config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)
+    if random.random() < config.slow_rate:
+        delay += config.slow_ms
+    await asyncio.sleep(max(0.0, delay) / 1000)
+
+
+@app.post("/openai/v1/chat/completions")
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    if random.random() < config.error_rate:
+        return JSONResponse(
+            {"error": {"message": "Service unavailable (injected)", "type": "server_error"}},
+            status_code=503
+        )
+    text = completion_text(body.get("messages", []))
+    tokens = split_tokens(text)
+    prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+    model = body.get("model", "fake-model")
+
+    if not body.get("stream"):
+        await first_token_delay()
+        await asyncio.sleep(len(tokens) / config.tokens_per_second)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(tokens),
+                "total_tokens": prompt_tokens + len(tokens)
+            }
+        }
+
+    async def events():
+        await first_token_delay()
+        for token in tokens:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(1 / config.tokens_per_second)
+        done = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+        }
+        yield f"data: {json.dumps(done)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=config.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=config.jitter_ms)
+    parser.add_argument("--tokens-per-second", type=float, default=config.tokens_per_second)
+    parser.add_argument("--error-rate", type=float, default=config.error_rate)
+    parser.add_argument("--slow-rate", type=float, default=config.slow_rate)
+    parser.add_argument("--slow-ms", type=float, default=config.slow_ms)
+    args = parser.parse_args()
+
+    config.latency_ms = args.latency_ms
+    config.jitter_ms = args.jitter_ms
+    config.tokens_per_second = args.tokens_per_second
+    config.error_rate = args.error_rate
+    config.slow_rate = args.slow_rate
+    config.slow_ms = args.slow_ms
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Load driver for /honeypot, /analyze and /api/guvi/honeypot.
+
+By default everything runs in one process: the fake LLM server is started
+on a local port, the API is driven through an in-process ASGI transport
+(no network hop) inside the app's lifespan against a throwaway SQLite
+database, and memory growth is measured as the change in RSS divided by
+the number of sessions. /api/guvi/honeypot is the GUVI event path
+(session row, entities, campaign, report queue, dashboard), which does
+not call the LLM.
+
+    python -m benchmarks.load_test --sessions 200 --turns 4 --concurrency 32
+    python -m benchmarks.load_test --base-url http://127.0.0.1:8000   # running server
+
+Reports throughput and p50/p95/p99 latency per endpoint.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.scenarios import ScenarioGenerator
+
+API_KEY_HEADER = "x-api-key"
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size (Linux), or None where unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+class EndpointStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.started = 0.0
+        self.finished = 0.0
+
+    def row(self) -> str:
+        latencies = sorted(self.latencies)
+        elapsed = max(self.finished - self.started, 1e-9)
+        return (
+            f"{self.name:<22}{len(latencies):>8}{self.errors:>8}"
+            f"{len(latencies) / elapsed:>10.1f}"
+            f"{percentile(latencies, 50) * 1000:>10.1f}"
+            f"{percentile(latencies, 95) * 1000:>10.1f}"
+            f"{percentile(latencies, 99) * 1000:>10.1f}"
+        )
+
+
+async def timed_post(client: httpx.AsyncClient, stats: EndpointStats, path: str, body: dict) -> None:
+    started = time.perf_counter()
+    try:
+        response = await client.post(path, json=body)
+        ok = response.status_code == 200
+    except httpx.HTTPError:
+        ok = False
+    if ok:
+        stats.latencies.append(time.perf_counter() - started)
+    else:
+        stats.errors += 1
+
+
+async def run_phase(stats: EndpointStats, jobs: List, concurrency: int) -> None:
+    """Run coroutine factories with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(job):
+        async with semaphore:
+            await job()
+
+    stats.started = time.perf_counter()
+    await asyncio.gather(*(run(job) for job in jobs))
+    stats.finished = time.perf_counter()
+
+
+async def drive(client: httpx.AsyncClient, args) -> Dict[str, EndpointStats]:
+    generator = ScenarioGenerator(seed=args.seed)
+    results: Dict[str, EndpointStats] = {}
+
+    # /honeypot: each session's turns run in order, sessions in parallel
+    honeypot = results["/honeypot"] = EndpointStats("/honeypot")
+    sessions = [
+        generator.honeypot_requests(f"bench-{args.seed}-{i}", args.turns)
+        for i in range(args.sessions)
+    ]
+
+    def session_job(requests):
+        async def job():
+            for body in requests:
+                await timed_post(client, honeypot, "/honeypot", body)
+        return job
+
+    await run_phase(honeypot, [session_job(s) for s in sessions], args.concurrency)
+
+    analyze = results["/analyze"] = EndpointStats("/analyze")
+    await run_phase(analyze, [
+        (lambda text=text: timed_post(client, analyze, "/analyze", {"message": text}))
+        for text in generator.messages(args.analyze)
+    ], args.concurrency)
+
+    guvi = results["/api/guvi/honeypot"] = EndpointStats("/api/guvi/honeypot")
+    await run_phase(guvi, [
+        (lambda body=body: timed_post(client, guvi, "/api/guvi/honeypot", body))
+        for body in (s[0] for s in sessions)
+    ], args.concurrency)
+
+    return results
+
+
+def start_fake_llm(port: int, latency_ms: float, tokens_per_second: float) -> None:
+    import uvicorn
+    from benchmarks import fake_llm
+
+    fake_llm.config.latency_ms = latency_ms
+    fake_llm.config.tokens_per_second = tokens_per_second
+    server = uvicorn.Server(uvicorn.Config(fake_llm.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="fake-llm", daemon=True).start()
+
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            sys.exit("fake LLM server did not start")
+        time.sleep(0.05)
+
+
+async def main_async(args) -> None:
+    headers = {API_KEY_HEADER: args.api_key}
+    rss_before = rss_after = None
+    session_count = None
+
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=60) as client:
+            results = await drive(client, args)
+    else:
+        # Configure the app before it is imported
+        if not args.llm_url:
+            start_fake_llm(args.llm_port, args.latency_ms, args.tokens_per_second)
+        os.environ["GROQ_BASE_URL"] = args.llm_url or f"http://127.0.0.1:{args.llm_port}"
+        os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+        os.environ.setdefault("GUVI_CALLBACK_URL", "http://127.0.0.1:9/callback")
+        os.environ.setdefault("SECRET_API_KEY", args.api_key)
+
+        from app.init_db import init_database
+        from app.main import app
+        from app.services.session_store import session_store
+
+        init_database()
+        # ASGITransport sends no lifespan events; run startup and shutdown
+        # (index loads, queue drains) around the run as a server would
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=60) as client:
+                rss_before = rss_bytes()
+                results = await drive(client, args)
+                rss_after = rss_bytes()
+            session_count = len(session_store)
+
+    print(f"\n{'endpoint':<22}{'ok':>8}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stats in results.values():
+        print(stats.row())
+
+    if rss_before is not None and rss_after is not None:
+        growth = rss_after - rss_before
+        print(
+            f"\nRSS growth: {growth / 1024 / 1024:.1f} MiB over {args.sessions} sessions "
+            f"({growth / max(args.sessions, 1) / 1024:.1f} KiB/session, {session_count} in store)"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", help="drive a running server instead of the in-process app")
+    parser.add_argument("--api-key", default=os.getenv("SECRET_API_KEY", "my_secret_hackathon_key_789"))
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--analyze", type=int, default=200, help="number of /analyze requests")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--llm-url", help="use an already running fake LLM server")
+    parser.add_argument("--llm-port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
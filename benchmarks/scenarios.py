@@ -0,0 +1,105 @@
+"""Synthetic Hinglish scam conversations for load tests.
+
+Each scenario is a scripted scammer side (UPI collect, KYC update, lottery,
+refund) with randomized names, amounts, UPI IDs, phone numbers and links,
+plus canned victim replies. Output is deterministic for a given seed.
+"""
+import random
+from typing import Iterator, List
+
+PSP_HANDLES = ["ybl", "okaxis", "oksbi", "paytm", "ibl", "upi"]
+BANKS = ["SBI", "HDFC", "ICICI", "Axis", "PNB", "Kotak"]
+NAMES = ["rahul", "vikram", "suresh", "anita", "priya", "deepak", "amit", "neha"]
+DOMAINS = ["kyc-update", "bank-verify", "refund-claim", "lucky-draw", "secure-login"]
+TLDS = ["in", "com", "co.in", "online", "xyz"]
+
+SCRIPTS = {
+    "upi": [
+        "Namaste sir, main {bank} customer care se {name} bol raha hoon. Aapke account mein Rs {amount} ka refund pending hai.",
+        "Refund lene ke liye aapko {upi} pe Rs 1 ka collect request accept karna hoga, bas PIN daalna hai.",
+        "Sir jaldi kijiye, 10 minute mein request expire ho jayegi. Koi problem ho to {phone} pe call karo.",
+        "PIN daala? Agar nahi hua to {upi} pe Rs {small} bhej do, hum turant double refund karenge.",
+    ],
+    "kyc": [
+        "Dear customer your {bank} account KYC expired today. Account will be blocked within 24 hours.",
+        "Turant KYC update karo is link pe: {link} warna aapka account band ho jayega.",
+        "Link nahi khul raha to apna account number aur OTP batao, main yahin se update kar deta hoon.",
+        "Sir OTP jaldi bataiye, system mein timer chal raha hai. Helpline {phone}.",
+    ],
+    "lottery": [
+        "Congratulations! Aapka number KBC lucky draw mein select hua hai, prize Rs {amount}!",
+        "Prize claim karne ke liye Rs {small} processing fee {upi} pe bhejiye.",
+        "Fee bhejne ke baad screenshot {phone} pe WhatsApp karo, prize 2 ghante mein account mein.",
+        "Sir aaj last date hai, fee nahi bheji to prize cancel ho jayega. Details ke liye {link}",
+    ],
+    "refund": [
+        "Hello sir, aapka electricity bill double deduct hua hai, Rs {amount} refund milega.",
+        "Refund ke liye AnyDesk app install karo aur code batao, hum process kar denge.",
+        "App nahi chal raha to account {account} IFSC {ifsc} pe Rs {small} verification charge bhejo.",
+        "Verification ke baad full refund. Supervisor ka number {phone} hai, abhi call karo.",
+    ],
+}
+
+VICTIM_REPLIES = [
+    "Sir mujhe samajh nahi aaya, thoda detail mein batao.",
+    "Kaun sa bank bol rahe ho aap? Mera account safe hai na?",
+    "Theek hai, UPI ID phir se bhejo, mere phone mein dikh nahi raha.",
+    "Beta ghar aayega to usse puchh ke karta hoon, aap number de do.",
+]
+
+
+class ScenarioGenerator:
+    """Random but reproducible scam conversations."""
+
+    def __init__(self, seed: int = 7):
+        self.random = random.Random(seed)
+
+    def fill(self, template: str) -> str:
+        r = self.random
+        name = r.choice(NAMES)
+        return template.format(
+            bank=r.choice(BANKS),
+            name=name.title(),
+            amount=f"{r.randrange(5, 500) * 1000:,}",
+            small=r.choice([99, 499, 999, 1999, 4999]),
+            upi=f"{name}{r.randrange(10, 9999)}@{r.choice(PSP_HANDLES)}",
+            phone=f"+91 {r.choice('6789')}{r.randrange(10 ** 8, 10 ** 9)}",
+            link=f"http://{r.choice(BANKS).lower()}-{r.choice(DOMAINS)}.{r.choice(TLDS)}/verify?id={r.randrange(10 ** 5, 10 ** 6)}",
+            account=str(r.randrange(10 ** 10, 10 ** 12)),
+            ifsc=f"{r.choice(['SBIN', 'HDFC', 'ICIC', 'UTIB'])}0{r.randrange(100000, 999999)}",
+        )
+
+    def conversation(self, scam_type: str = None) -> List[str]:
+        """The scammer's messages for one session."""
+        scam_type = scam_type or self.random.choice(list(SCRIPTS))
+        return [self.fill(template) for template in SCRIPTS[scam_type]]
+
+    def honeypot_requests(self, session_id: str, turns: int = 4, start_ms: int = 1700000000000) -> List[dict]:
+        """Successive /honeypot request bodies for one session, history included."""
+        scammer = self.conversation()
+        requests: List[dict] = []
+        history: List[dict] = []
+        timestamp = start_ms
+
+        for turn in range(turns):
+            text = scammer[turn % len(scammer)]
+            message = {"sender": "scammer", "text": text, "timestamp": timestamp}
+            requests.append({
+                "sessionId": session_id,
+                "message": message,
+                "conversationHistory": list(history),
+                "metadata": {"channel": "SMS", "language": "Hinglish", "locale": "IN"}
+            })
+            history.append(message)
+            history.append({
+                "sender": "user",
+                "text": self.random.choice(VICTIM_REPLIES),
+                "timestamp": timestamp + 1000
+            })
+            timestamp += 60000
+        return requests
+
+    def messages(self, count: int) -> Iterator[str]:
+        """Standalone scam texts (for /analyze)."""
+        for _ in range(count):
+            yield self.random.choice(self.conversation())
@@ -0,0 +1,61 @@
+"""Access checks for the live dashboard.
+
+The page needs the API key; its WebSocket needs the short-lived token the
+page embeds, and is rejected without one.
+
+    python test_dashboard_auth.py
+"""
+import json
+import os
+import re
+import tempfile
+
+os.environ.setdefault(
+    "DATABASE_URL",
+    "sqlite:///" + os.path.join(tempfile.mkdtemp(), "dashboard_auth.db")
+)
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.main import app, SECRET_API_KEY, issue_dashboard_token
+
+client = TestClient(app)
+
+
+def test_dashboard_page_requires_api_key():
+    assert client.get("/dashboard").status_code == 401
+    assert client.get("/dashboard", params={"key": "wrong"}).status_code == 401
+    assert client.get("/dashboard", headers={"x-api-key": SECRET_API_KEY}).status_code == 200
+    assert client.get("/dashboard", params={"key": SECRET_API_KEY}).status_code == 200
+
+
+def test_unauthenticated_websocket_is_rejected():
+    for url in ("/ws/dashboard", "/ws/dashboard?token=123.abc"):
+        with pytest.raises(WebSocketDisconnect) as rejected:
+            with client.websocket_connect(url):
+                pass
+        assert rejected.value.code == 1008
+
+
+def test_expired_token_is_rejected():
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/ws/dashboard?token=" + issue_dashboard_token(ttl=-1)):
+            pass
+
+
+def test_page_token_opens_websocket():
+    page = client.get("/dashboard", params={"key": SECRET_API_KEY}).text
+    token = re.search(r'encodeURIComponent\("([^"]+)"\)', page).group(1)
+
+    with client.websocket_connect("/ws/dashboard?token=" + token) as ws:
+        assert json.loads(ws.receive_text())["type"] == "snapshot"
+
+
+if __name__ == "__main__":
+    test_dashboard_page_requires_api_key()
+    test_unauthenticated_websocket_is_rejected()
+    test_expired_token_is_rejected()
+    test_page_token_opens_websocket()
+    print("✅ Dashboard access checks passed")
@@ -0,0 +1,106 @@
+"""Event-loop responsiveness check for the GUVI event path.
+
+Fires concurrent POST /api/guvi/honeypot requests while a ticker coroutine
+measures how late the loop wakes it up. DB work and the (deliberately
+slow) email reports must run off the loop, so the lag stays small even
+though every event carries a UPI ID.
+
+    python test_event_loop_lag.py
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+
+os.environ.setdefault(
+    "DATABASE_URL",
+    "sqlite:///" + os.path.join(tempfile.mkdtemp(), "loop_lag.db")
+)
+
+from app.init_db import init_database
+from app.main import app, SECRET_API_KEY
+from app.utils import email_reporter
+
+CONCURRENT_EVENTS = 50
+TICK_SECONDS = 0.01
+MAX_LAG_SECONDS = 0.1
+SLOW_SMTP_SECONDS = 0.5
+
+
+class SlowSMTP:
+    """Stands in for an SMTP server with a half-second handshake."""
+
+    def __init__(self):
+        time.sleep(SLOW_SMTP_SECONDS)
+
+    def noop(self):
+        return (250, b"OK")
+
+    def send_message(self, msg):
+        time.sleep(0.01)
+
+    def quit(self):
+        pass
+
+
+async def measure_lag(stop: asyncio.Event) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        worst = max(worst, time.perf_counter() - started - TICK_SECONDS)
+    return worst
+
+
+async def run_load() -> float:
+    events = [
+        {
+            "sessionId": f"lag-{i}",
+            "message": {"text": f"Pay Rs 500 to refund{i}@ybl or call +91 98765 4{i:04d}"}
+        }
+        for i in range(CONCURRENT_EVENTS)
+    ]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://test",
+        headers={"x-api-key": SECRET_API_KEY}
+    ) as client:
+        # One request first, so lazy imports and index loads are not counted
+        warmup = await client.post("/api/guvi/honeypot", json={
+            "sessionId": "lag-warmup",
+            "message": {"text": "Pay Rs 100 to warmup@ybl"}
+        })
+        assert warmup.status_code == 200
+
+        stop = asyncio.Event()
+        ticker = asyncio.create_task(measure_lag(stop))
+        responses = await asyncio.gather(
+            *(client.post("/api/guvi/honeypot", json=e) for e in events)
+        )
+        # Let the reporter mail everything while the loop is still measured
+        await asyncio.to_thread(email_reporter.scam_reporter.stop)
+        stop.set()
+        worst = await ticker
+
+    assert all(r.status_code == 200 and r.json()["reply"] for r in responses)
+    assert email_reporter.scam_reporter.stats["sent"] == CONCURRENT_EVENTS + 1
+    return worst
+
+
+def test_event_loop_lag():
+    init_database()
+    email_reporter.scam_reporter = email_reporter.ScamReporter(
+        interval=TICK_SECONDS, connect=SlowSMTP, enabled=True
+    )
+
+    worst = asyncio.run(run_load())
+    print(f"Worst event-loop lag: {worst * 1000:.1f} ms over {CONCURRENT_EVENTS} events")
+    assert worst < MAX_LAG_SECONDS, f"event loop blocked for {worst * 1000:.0f} ms"
+
+
+if __name__ == "__main__":
+    test_event_loop_lag()
+    print("✅ Event loop stayed responsive")
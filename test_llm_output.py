@@ -0,0 +1,37 @@
+"""Parsing checks for the honeypot model's JSON reply.
+
+Well-formed replies must survive the fields models leave null; only a
+reply without usable text is rejected.
+
+    python test_llm_output.py
+"""
+import pytest
+
+from app.models.schemas import HoneypotAIResult
+from app.utils.llm_json import LLMOutputError, parse_llm_output
+
+NULL_FIELDS_REPLY = """```json
+{"is_scam": false, "scam_type": null, "confidence": 0.1,
+ "reply": "Who is this? I don't know any bank officer.",
+ "suspicious_keywords": null, "reasoning": null}
+```"""
+
+
+def test_null_fields_take_their_defaults():
+    result = parse_llm_output(NULL_FIELDS_REPLY, HoneypotAIResult, "honeypot")
+    assert result.reply == "Who is this? I don't know any bank officer."
+    assert result.is_scam is False
+    assert result.scam_type == "unknown"
+    assert result.suspicious_keywords == []
+    assert result.reasoning == ""
+
+
+def test_reply_is_still_required():
+    with pytest.raises(LLMOutputError):
+        parse_llm_output('{"is_scam": true, "reply": null}', HoneypotAIResult, "honeypot")
+
+
+if __name__ == "__main__":
+    test_null_fields_take_their_defaults()
+    test_reply_is_still_required()
+    print("✅ LLM output parsing checks passed")
@@ -0,0 +1,51 @@
+"""Checks for the Prometheus /metrics endpoint and text format.
+
+    python test_metrics.py
+"""
+import os
+import tempfile
+
+os.environ.setdefault(
+    "DATABASE_URL",
+    "sqlite:///" + os.path.join(tempfile.mkdtemp(), "metrics.db")
+)
+
+from fastapi.testclient import TestClient
+
+from app.main import app, SECRET_API_KEY
+from app.utils import metrics
+
+client = TestClient(app)
+
+
+def test_metrics_requires_api_key():
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+    by_header = client.get("/metrics", headers={"x-api-key": SECRET_API_KEY})
+    by_bearer = client.get("/metrics", headers={"Authorization": f"Bearer {SECRET_API_KEY}"})
+    assert by_header.status_code == by_bearer.status_code == 200
+    assert "honeypot_live_sessions" in by_bearer.text
+
+
+def test_label_values_are_escaped():
+    registry = metrics.Registry()
+    counter = metrics.Counter("test_escaped_total", "Escaping check.", ("value",), registry=registry)
+    counter.inc(1, 'a\\b"c\nd')
+    assert registry.render().splitlines()[-1] == 'test_escaped_total{value="a\\\\b\\"c\\nd"} 1'
+    assert "test_escaped_total" not in metrics.render()
+
+
+def test_gauge_caches_costly_reads():
+    reads = []
+    gauge = metrics.Gauge("test_cached", "Caching check.", lambda: reads.append(1) or len(reads),
+                          cache_seconds=60, registry=metrics.Registry())
+    assert gauge.render()[-1] == gauge.render()[-1] == "test_cached 1"
+    assert len(reads) == 1
+
+
+if __name__ == "__main__":
+    test_metrics_requires_api_key()
+    test_label_values_are_escaped()
+    test_gauge_caches_costly_reads()
+    print("✅ Metrics checks passed")
@@ -0,0 +1,46 @@
+"""Keyword matching checks for the rule-based scam detector.
+
+Keywords must match whole words: "pin" inside "shopping" or "pay" inside
+"repay" is not evidence of anything.
+
+    python test_scam_detector.py
+"""
+from app.agents import intelligence_extractor, scam_detector
+
+BENIGN_MESSAGES = [
+    "I went shopping with my family yesterday",
+    "I will repay you next week, thanks for lending",
+    "Please send me more information about the event",
+    "The spinning class is at the platform near the bankside cafe",
+]
+
+SCAM_MESSAGE = "URGENT: your account is blocked. Share the OTP and PIN immediately"
+
+
+def keywords(text):
+    return intelligence_extractor.extract(text)["suspiciousKeywords"]
+
+
+def test_benign_sentences_have_no_keywords():
+    for text in BENIGN_MESSAGES:
+        assert keywords(text) == [], (text, keywords(text))
+        verdict = scam_detector.classify(text)
+        assert verdict.score < 0.5, (text, verdict)
+
+
+def test_inflected_keywords_still_match():
+    assert keywords("Your card was blocked, click the links") == ["blocked", "click", "link"]
+    assert keywords("KYC expired, paying now") == ["kyc", "expire", "pay"]
+
+
+def test_scam_message_is_flagged():
+    verdict = scam_detector.classify(SCAM_MESSAGE)
+    assert verdict.is_scam is True
+    assert {"otp", "pin", "urgent", "blocked"} <= set(verdict.features)
+
+
+if __name__ == "__main__":
+    test_benign_sentences_have_no_keywords()
+    test_inflected_keywords_still_match()
+    test_scam_message_is_flagged()
+    print("✅ Keyword matching ok")
@@ -0,0 +1,44 @@
+"""Brand-impersonation checks for link hosts.
+
+Government and bank-only registries, and the banks' own group companies,
+must not be reported as lookalikes; real lookalikes still must be.
+
+    python test_url_intelligence.py
+"""
+from app.agents.url_intelligence import impersonated_brand
+
+LEGITIMATE_HOSTS = [
+    "incometaxindia.gov.in",
+    "www.incometaxindia.gov.in",
+    "uidai.nic.in",
+    "netbanking.sbi.bank.in",
+    "www.icicidirect.com",
+    "kotaksecurities.com",
+    "paytmmall.com",
+    "www.hdfclife.com",
+    "sbicard.com",
+]
+
+LOOKALIKE_HOSTS = {
+    "sbi-kyc.xyz": "sbi",
+    "icici-direct.xyz": "icici",
+    "paytmm4ll.com": "paytm",
+    "hdfc.verify-kyc.in": "hdfc",
+    "incometaxindia.gov.in.refund-claim.top": "incometax",
+}
+
+
+def test_restricted_and_group_domains_are_not_flagged():
+    for host in LEGITIMATE_HOSTS:
+        assert impersonated_brand(host) is None, host
+
+
+def test_lookalikes_are_still_flagged():
+    for host, brand in LOOKALIKE_HOSTS.items():
+        assert impersonated_brand(host) == brand, host
+
+
+if __name__ == "__main__":
+    test_restricted_and_group_domains_are_not_flagged()
+    test_lookalikes_are_still_flagged()
+    print("✅ Brand impersonation checks passed")